@@ -0,0 +1,353 @@
+"""
+Cache Compartilhado de Arquivos Estáticos - Multi-Zap
+Os pacotes JS/CSS/fontes do WhatsApp Web têm nome com hash (imutáveis), mas
+cada perfil baixava e guardava a sua própria cópia. Com o cache compartilhado
+(opcional, MULTIZAP_SHARED_CACHE=1) essas requisições são redirecionadas para
+um esquema próprio, servido de uma pasta endereçada por conteúdo comum a
+todos os perfis, com despejo LRU e estatísticas de acerto
+
+Nunca passam pelo cache: requisições com query string, de hosts fora da
+lista, de tipos que não sejam script/estilo/fonte/imagem, nem respostas com
+cookies ou marcadas como privadas. O download é feito sem cookies.
+"""
+import os
+import re
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from PyQt6.QtCore import QObject, QTimer, QUrl, QBuffer, QByteArray, QIODevice
+from PyQt6.QtNetwork import QNetworkAccessManager, QNetworkRequest, QNetworkReply, QNetworkCookieJar
+from PyQt6.QtWebEngineCore import (QWebEngineUrlScheme, QWebEngineUrlSchemeHandler,
+                                   QWebEngineUrlRequestInfo, QWebEngineUrlRequestJob)
+from login import PROFILES_DIR
+
+ENABLED = os.environ.get("MULTIZAP_SHARED_CACHE", "0") == "1"
+CACHE_DIR = os.path.join(PROFILES_DIR, ".shared_assets")
+MAX_SIZE_MB = int(os.environ.get("MULTIZAP_SHARED_CACHE_MB", "200"))
+HOSTS = tuple(
+    host.strip() for host in
+    os.environ.get("MULTIZAP_SHARED_CACHE_HOSTS", "static.whatsapp.net,web.whatsapp.com").split(",")
+    if host.strip()
+)
+
+# O índice é gravado em lote (e ao fechar), não a cada arquivo novo
+INDEX_FLUSH_INTERVAL = 30000  # ms
+# Acertos só atualizam last_used: vão para o disco no fechamento ou após este tempo
+LAST_USED_FLUSH_INTERVAL = 3600  # s
+
+# Esquema próprio -> esquema original (o http só é aceito para o próprio computador)
+SCHEMES = {'mzasset': 'https', 'mzasset-local': 'http'}
+LOOPBACK_HOSTS = ('127.0.0.1', 'localhost')
+
+STATIC_EXTENSIONS = ('.js', '.css', '.woff', '.woff2', '.ttf', '.otf', '.png', '.svg', '.webp', '.gif')
+# Nome com hash de conteúdo: app.3f2a9c1d7e4b.js, rsrc.php/.../r/Xy8_kP2aQzW.js
+HEX_HASH = re.compile(r"^[0-9a-f]{8,}$")
+BASE64_HASH = re.compile(r"^(?=.*\d)(?=.*[a-z])(?=.*[A-Z])[A-Za-z0-9_]{10,}$")
+
+ResourceType = QWebEngineUrlRequestInfo.ResourceType
+STATIC_TYPES = (
+    ResourceType.ResourceTypeScript,
+    ResourceType.ResourceTypeStylesheet,
+    ResourceType.ResourceTypeFontResource,
+    ResourceType.ResourceTypeImage,
+)
+
+
+def register_schemes():
+    """Registra os esquemas; precisa ser chamado ANTES de criar o QApplication"""
+    for name, original in SCHEMES.items():
+        if QWebEngineUrlScheme.schemeByName(name.encode()).name():
+            continue
+        scheme = QWebEngineUrlScheme(name.encode())
+        scheme.setSyntax(QWebEngineUrlScheme.Syntax.HostAndPort)
+        scheme.setDefaultPort(443 if original == 'https' else 80)
+        scheme.setFlags(
+            QWebEngineUrlScheme.Flag.SecureScheme
+            | QWebEngineUrlScheme.Flag.CorsEnabled
+            | QWebEngineUrlScheme.Flag.CspBypassing
+            | QWebEngineUrlScheme.Flag.FetchApiAllowed
+        )
+        QWebEngineUrlScheme.registerScheme(scheme)
+
+
+def is_cacheable(url):
+    """URL de arquivo estático imutável de um host permitido"""
+    if url.hasQuery() or url.hasFragment():
+        return False
+    if url.scheme() not in SCHEMES.values() or url.host() not in HOSTS:
+        return False
+    if url.scheme() == 'http' and url.host() not in LOOPBACK_HOSTS:
+        return False
+    stem, extension = os.path.splitext(url.fileName())
+    return extension.lower() in STATIC_EXTENSIONS and looks_hashed(stem)
+
+
+def looks_hashed(stem):
+    """Algum trecho do nome (separado por '.' ou '-') é um hash hexadecimal ou base64"""
+    return any(HEX_HASH.match(part) or BASE64_HASH.match(part) for part in re.split(r"[.-]", stem))
+
+
+def to_cache_url(url):
+    cache_url = QUrl(url)
+    cache_url.setScheme(next(k for k, v in SCHEMES.items() if v == url.scheme()))
+    return cache_url
+
+
+def to_origin_url(url):
+    origin = QUrl(url)
+    origin.setScheme(SCHEMES[url.scheme()])
+    return origin
+
+
+class AssetStore:
+    """
+    Pasta endereçada por conteúdo: o arquivo é gravado pelo SHA-256 (conteúdos
+    iguais em URLs diferentes ocupam espaço uma única vez) e um índice liga
+    URL -> hash. Ao passar do tamanho máximo, os menos usados são removidos.
+    O índice fica em memória e só vai para o disco em flush(): novas entradas
+    e remoções marcam o índice como alterado, acertos apenas atualizam
+    last_used em memória (gravado no fechamento ou a cada hora)
+    """
+    def __init__(self, directory=CACHE_DIR, max_bytes=MAX_SIZE_MB * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.index_file = os.path.join(directory, "index.json")
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(directory, "objects"), exist_ok=True)
+        self.entries = self._load_index()  # url -> {sha256, size, content_type, last_used}
+        # URLs por conteúdo e tamanho em disco, mantidos a cada alteração
+        self.refs = {}
+        self.stored_bytes = 0
+        for entry in self.entries.values():
+            self._add_ref(entry)
+        self.dirty = False
+        self.touched = False
+        self.last_write = time.time()
+
+    def _load_index(self):
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # Entradas cujo arquivo sumiu são descartadas
+        return {url: e for url, e in entries.items() if os.path.exists(self._object_path(e['sha256']))}
+
+    def _object_path(self, digest):
+        return os.path.join(self.directory, "objects", digest[:2], digest)
+
+    def total_bytes(self):
+        """Tamanho em disco (cada conteúdo conta uma vez)"""
+        return self.stored_bytes
+
+    def _add_ref(self, entry):
+        digest = entry['sha256']
+        self.refs[digest] = self.refs.get(digest, 0) + 1
+        if self.refs[digest] == 1:
+            self.stored_bytes += entry['size']
+
+    def _drop(self, url):
+        """Remove a URL; o arquivo só sai quando nenhuma outra URL aponta para ele"""
+        entry = self.entries.pop(url)
+        digest = entry['sha256']
+        self.refs[digest] -= 1
+        if self.refs[digest]:
+            return
+        del self.refs[digest]
+        self.stored_bytes -= entry['size']
+        try:
+            os.remove(self._object_path(digest))
+        except OSError:
+            pass
+
+    def get(self, url):
+        with self._lock:
+            entry = self.entries.get(url)
+            if entry is None:
+                return None
+            try:
+                with open(self._object_path(entry['sha256']), 'rb') as f:
+                    data = f.read()
+            except OSError:
+                self._drop(url)
+                self.dirty = True
+                return None
+            entry['last_used'] = time.time()
+            self.touched = True
+            return data, entry['content_type']
+
+    def put(self, url, data, content_type):
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        with self._lock:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.replace(temp_path, path)
+            entry = {
+                'sha256': digest, 'size': len(data),
+                'content_type': content_type, 'last_used': time.time(),
+            }
+            # Adiciona antes de soltar a versão anterior (mesmo conteúdo não é apagado)
+            self._add_ref(entry)
+            if url in self.entries:
+                self._drop(url)
+            self.entries[url] = entry
+            self.dirty = True
+            self._evict()
+
+    def _evict(self):
+        if self.stored_bytes <= self.max_bytes:
+            return
+        for url, _ in sorted(self.entries.items(), key=lambda item: item[1]['last_used']):
+            if self.stored_bytes <= self.max_bytes:
+                break
+            self._drop(url)
+
+    def _write_index(self):
+        fd, temp_path = tempfile.mkstemp(prefix=".index_", dir=self.directory)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f)
+        os.replace(temp_path, self.index_file)
+
+    def flush(self, final=False):
+        """Grava o índice se algo mudou (timer periódico; final=True no fechamento)"""
+        with self._lock:
+            if not self.dirty and self.touched:
+                # Só a ordem de uso mudou: perder isso numa queda não custa nada
+                if not final and time.time() - self.last_write < LAST_USED_FLUSH_INTERVAL:
+                    return
+            elif not self.dirty:
+                return
+            self._write_index()
+            self.dirty = False
+            self.touched = False
+            self.last_write = time.time()
+
+
+class AssetInterceptor:
+    """Etapa da cadeia de requisições: redireciona os estáticos elegíveis para o cache"""
+    def intercept(self, info):
+        if info.requestMethod() != b"GET" or info.resourceType() not in STATIC_TYPES:
+            return False
+        url = info.requestUrl()
+        if not is_cacheable(url):
+            return False
+        info.redirect(to_cache_url(url))
+        return True
+
+
+class AssetSchemeHandler(QWebEngineUrlSchemeHandler):
+    """Responde do cache ou baixa (sem cookies), guarda e responde"""
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.network = QNetworkAccessManager(self)
+        # Um pote de cookies novo e nunca preenchido: downloads anônimos
+        self.network.setCookieJar(QNetworkCookieJar(self.network))
+        self.pending = {}  # resposta de rede -> job
+        self.stats = {'hits': 0, 'misses': 0, 'bytes_served': 0, 'bytes_fetched': 0, 'errors': 0}
+
+    def requestStarted(self, job):
+        url = to_origin_url(job.requestUrl())
+        key = url.toString()
+        cached = self.store.get(key) if is_cacheable(url) else None
+        if cached is not None:
+            self.stats['hits'] += 1
+            self.stats['bytes_served'] += len(cached[0])
+            self._reply(job, *cached)
+            return
+
+        request = QNetworkRequest(url)
+        request.setAttribute(QNetworkRequest.Attribute.CookieLoadControlAttribute,
+                             QNetworkRequest.LoadControl.Manual)
+        request.setAttribute(QNetworkRequest.Attribute.CookieSaveControlAttribute,
+                             QNetworkRequest.LoadControl.Manual)
+        reply = self.network.get(request)
+        # Guardado pela URL pedida: com redirecionamento, reply.url() é o destino final
+        self.pending[reply] = (job, key)
+        reply.finished.connect(lambda: self._on_finished(reply))
+        # Página fechada ou navegação cancelada: o download é abortado
+        job.destroyed.connect(lambda: self._on_job_destroyed(reply))
+
+    def _on_job_destroyed(self, reply):
+        if self.pending.pop(reply, None) is not None:
+            reply.abort()
+
+    def _on_finished(self, reply):
+        pending = self.pending.pop(reply, None)
+        reply.deleteLater()
+        if pending is None:
+            return
+        job, key = pending
+        status = reply.attribute(QNetworkRequest.Attribute.HttpStatusCodeAttribute)
+        if reply.error() != QNetworkReply.NetworkError.NoError or status != 200:
+            self.stats['errors'] += 1
+            job.fail(QWebEngineUrlRequestJob.Error.RequestFailed)
+            return
+
+        data = bytes(reply.readAll())
+        content_type = bytes(reply.rawHeader(b"Content-Type")).decode('latin-1') or "application/octet-stream"
+        cache_control = bytes(reply.rawHeader(b"Cache-Control")).decode('latin-1').lower()
+        url = reply.url()
+        self.stats['misses'] += 1
+        self.stats['bytes_fetched'] += len(data)
+        if (is_cacheable(url) and not reply.hasRawHeader(b"Set-Cookie")
+                and "private" not in cache_control and "no-store" not in cache_control):
+            self.store.put(key, data, content_type)
+        self._reply(job, data, content_type)
+
+    def _reply(self, job, data, content_type):
+        # Scripts com crossorigin exigem o cabeçalho CORS (disponível a partir do Qt 6.6)
+        if hasattr(job, 'setAdditionalResponseHeaders'):
+            job.setAdditionalResponseHeaders({
+                QByteArray(b"Access-Control-Allow-Origin"): QByteArray(b"*"),
+                QByteArray(b"Cache-Control"): QByteArray(b"public, max-age=31536000, immutable"),
+            })
+        buffer = QBuffer(job)
+        buffer.setData(data)
+        buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+        job.reply(content_type.split(";")[0].encode('latin-1'), buffer)
+
+
+class SharedAssetCache(QObject):
+    """
+    Um cache por processo: install() registra o esquema no perfil e o
+    interceptor entra na cadeia de requisições do perfil
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.store = AssetStore()
+        self.interceptor = AssetInterceptor()
+        self.handler = AssetSchemeHandler(self.store, self)
+        self.flush_timer = QTimer(self)
+        self.flush_timer.timeout.connect(self.store.flush)
+        self.flush_timer.start(INDEX_FLUSH_INTERVAL)
+
+    def install(self, profile, chain):
+        for name in SCHEMES:
+            profile.installUrlSchemeHandler(name.encode(), self.handler)
+        chain.add(self.interceptor)
+
+    def stats(self):
+        stats = dict(self.handler.stats)
+        requests = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / requests if requests else 0.0
+        stats['entries'] = len(self.store.entries)
+        stats['disk_bytes'] = self.store.total_bytes()
+        return stats
+
+
+_shared_cache = None
+
+
+def shared_cache():
+    """O cache do processo, ou None se o recurso estiver desativado"""
+    global _shared_cache
+    if ENABLED and _shared_cache is None:
+        _shared_cache = SharedAssetCache()
+    return _shared_cache
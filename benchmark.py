@@ -0,0 +1,546 @@
+"""
+Benchmark de Inicialização - Multi-Zap
+Mede a inicialização das instâncias sem rede e sem GPU: um servidor local
+serve uma página substituta do WhatsApp Web (pacote estático de tamanho
+realista, service worker e IndexedDB) e o Multi-Zap é iniciado na
+plataforma Qt 'offscreen' com N perfis novos
+
+Uso:
+    python benchmark.py --instances 4 --runs 3
+    python benchmark.py --save-baseline          # grava bench_baseline.json
+    python benchmark.py --baseline bench_baseline.json --tolerance 0.15
+
+    python benchmark.py --presets LOW HIGH       # A/B entre presets de flags
+    python benchmark.py --presets HIGH "HIGH --disable-gpu-rasterization"
+
+Métricas por instância: criação do perfil, tempo até loadFinished, tempo até
+a primeira pintura e pico de RSS do processo de renderização; por rodada, o
+tempo de CPU somado de todos os processos do Multi-Zap
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+DEFAULT_BASELINE = "bench_baseline.json"
+DEFAULT_OUTPUT = "bench_results.json"
+
+# Métricas resumidas (todas: quanto menor, melhor)
+SUMMARY_METRICS = (
+    'profile_creation_ms_mean',
+    'first_load_finished_ms',
+    'last_load_finished_ms',
+    'first_paint_ms_min',
+    'peak_rss_mb_max',
+    'peak_rss_mb_total',
+    'cpu_seconds_total',
+)
+
+
+# ==========================================
+# PÁGINA SUBSTITUTA
+# ==========================================
+
+def _generate_bundle(size_kb, seed=42):
+    """JavaScript determinístico com funções e literais, no tamanho pedido"""
+    rng = random.Random(seed)
+    words = ["mensagem", "contato", "grupo", "status", "chamada", "midia",
+             "conversa", "arquivo", "audio", "figurinha", "lista", "perfil"]
+    chunks = ["(function(){'use strict';var registry={};"]
+    size = len(chunks[0])
+    index = 0
+    while size < size_kb * 1024:
+        name = f"{rng.choice(words)}_{index}"
+        literal = " ".join(rng.choice(words) for _ in range(12))
+        chunk = (f"registry['{name}']=function(a,b){{var t='{literal}';"
+                 f"return (a|0)+(b|0)+t.length+{rng.randint(0, 9999)};}};")
+        chunks.append(chunk)
+        size += len(chunk)
+        index += 1
+    chunks.append("window.__bundle=registry;})();")
+    return "".join(chunks)
+
+
+def _generate_css(rules=2000, seed=7):
+    rng = random.Random(seed)
+    lines = []
+    for i in range(rules):
+        lines.append(f".c{i}{{color:#{rng.randint(0, 0xFFFFFF):06x};"
+                     f"padding:{rng.randint(0, 12)}px;margin:{rng.randint(0, 8)}px}}")
+    return "\n".join(lines)
+
+
+INDEX_HTML = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>carregando</title>
+<link rel="stylesheet" href="/{css}"></head>
+<body><header style="height:60px;background:#202c33"></header>
+<div id="side"></div>
+<script src="/{js}"></script>
+<script>
+(function() {{
+    // Lista de conversas para gerar uma pintura realista
+    var side = document.getElementById('side');
+    for (var i = 0; i < 200; i++) {{
+        var row = document.createElement('div');
+        row.className = 'c' + i;
+        row.textContent = 'Conversa ' + i + ' - ultima mensagem de exemplo';
+        side.appendChild(row);
+    }}
+
+    function openDb() {{
+        return new Promise(function(resolve, reject) {{
+            var request = indexedDB.open('standin', 1);
+            request.onupgradeneeded = function() {{
+                request.result.createObjectStore('messages', {{keyPath: 'id'}});
+            }};
+            request.onsuccess = function() {{ resolve(request.result); }};
+            request.onerror = function() {{ reject(request.error); }};
+        }});
+    }}
+
+    function fillDb(db) {{
+        return new Promise(function(resolve) {{
+            var tx = db.transaction('messages', 'readwrite');
+            var store = tx.objectStore('messages');
+            var text = new Array(64).join('mensagem ');
+            for (var i = 0; i < 500; i++) {{
+                store.put({{id: i, text: text, time: Date.now()}});
+            }}
+            tx.oncomplete = resolve;
+            tx.onerror = resolve;
+        }});
+    }}
+
+    var sw = navigator.serviceWorker
+        ? navigator.serviceWorker.register('/sw.js').then(function() {{
+              return navigator.serviceWorker.ready;
+          }}).catch(function() {{}})
+        : Promise.resolve();
+
+    Promise.all([openDb().then(fillDb), sw]).then(function() {{
+        document.title = 'ready';
+    }}, function() {{
+        document.title = 'ready';
+    }});
+}})();
+</script></body></html>
+"""
+
+SERVICE_WORKER = """
+var ASSETS = ['/', '/{js}', '/{css}'];
+self.addEventListener('install', function(event) {{
+    event.waitUntil(caches.open('standin-v1').then(function(cache) {{
+        return cache.addAll(ASSETS);
+    }}));
+    self.skipWaiting();
+}});
+self.addEventListener('activate', function(event) {{
+    event.waitUntil(self.clients.claim());
+}});
+self.addEventListener('fetch', function(event) {{
+    event.respondWith(caches.match(event.request).then(function(hit) {{
+        return hit || fetch(event.request);
+    }}));
+}});
+"""
+
+
+def build_standin_site(directory, bundle_kb=3000):
+    """Gera a página substituta com nomes de arquivo por hash de conteúdo"""
+    bundle = _generate_bundle(bundle_kb).encode('utf-8')
+    css = _generate_css().encode('utf-8')
+    js_name = f"app.{hashlib.sha256(bundle).hexdigest()[:12]}.js"
+    css_name = f"style.{hashlib.sha256(css).hexdigest()[:12]}.css"
+
+    with open(os.path.join(directory, js_name), 'wb') as f:
+        f.write(bundle)
+    with open(os.path.join(directory, css_name), 'wb') as f:
+        f.write(css)
+    with open(os.path.join(directory, "index.html"), 'w', encoding='utf-8') as f:
+        f.write(INDEX_HTML.format(js=js_name, css=css_name))
+    with open(os.path.join(directory, "sw.js"), 'w', encoding='utf-8') as f:
+        f.write(SERVICE_WORKER.format(js=js_name, css=css_name))
+    return directory
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    """Serve os arquivos sem log e com cache imutável para os nomes com hash"""
+    def log_message(self, format, *args):
+        pass
+
+    def end_headers(self):
+        name = os.path.basename(self.path)
+        if name.count(".") >= 2:
+            self.send_header("Cache-Control", "public, max-age=31536000, immutable")
+        else:
+            self.send_header("Cache-Control", "no-cache")
+        super().end_headers()
+
+
+class StandinServer:
+    """Servidor HTTP local em uma thread (127.0.0.1 conta como origem segura)"""
+    def __init__(self, directory):
+        handler = partial(_QuietHandler, directory=directory)
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+# ==========================================
+# PROCESSO TRABALHADOR (uma execução)
+# ==========================================
+
+class StartupRecorder:
+    """Registra os tempos de cada instância de uma MainWindow recém-criada"""
+    def __init__(self, window, t0, timeout):
+        from PyQt6.QtCore import QTimer
+
+        self.window = window
+        self.t0 = t0
+        self.epoch_t0 = time.time() * 1000 - (time.perf_counter() - t0) * 1000
+        self.results = {}
+        for instance in window.instances:
+            self.results[instance] = {
+                'profile_id': instance.profile_name,
+                'profile_creation_ms': instance.setup_duration * 1000,
+                'load_started_ms': None,
+                'load_finished_ms': None,
+                'first_paint_ms': None,
+                'peak_rss_mb': 0.0,
+                'ready': False,
+            }
+            instance.browser.loadStarted.connect(partial(self._on_load_started, instance))
+            instance.browser.loadFinished.connect(partial(self._on_load_finished, instance))
+            instance.browser.titleChanged.connect(partial(self._on_title_changed, instance))
+
+        self.rss_timer = QTimer()
+        self.rss_timer.timeout.connect(self._sample_rss)
+        self.rss_timer.start(250)
+        QTimer.singleShot(int(timeout * 1000), self._finish)
+
+    def _elapsed_ms(self):
+        return (time.perf_counter() - self.t0) * 1000
+
+    def _on_load_started(self, instance):
+        if self.results[instance]['load_started_ms'] is None:
+            self.results[instance]['load_started_ms'] = self._elapsed_ms()
+
+    def _on_load_finished(self, instance, ok):
+        result = self.results[instance]
+        if result['load_finished_ms'] is not None:
+            return
+        result['load_finished_ms'] = self._elapsed_ms()
+        result['ok'] = ok
+        script = ("JSON.stringify({origin: performance.timeOrigin, paints: "
+                  "performance.getEntriesByType('paint').map(function(e) {"
+                  "return [e.name, e.startTime]; })})")
+        instance.page.runJavaScript(script, 0, partial(self._on_paint_timing, instance))
+
+    def _on_paint_timing(self, instance, value):
+        try:
+            data = json.loads(value)
+        except (TypeError, ValueError):
+            return
+        paints = dict(data.get('paints', []))
+        start = paints.get('first-contentful-paint', paints.get('first-paint'))
+        if start is not None:
+            # Converte para o mesmo relógio do início do benchmark
+            self.results[instance]['first_paint_ms'] = data['origin'] + start - self.epoch_t0
+
+    def _on_title_changed(self, instance, title):
+        if title == 'ready':
+            self.results[instance]['ready'] = True
+            if all(result['ready'] for result in self.results.values()):
+                # Um último intervalo para o pico de RSS após o IndexedDB
+                from PyQt6.QtCore import QTimer
+                QTimer.singleShot(1000, self._finish)
+
+    def _sample_rss(self):
+        for instance, result in self.results.items():
+            sample = self.window.telemetry.sample(instance)
+            if sample:
+                result['peak_rss_mb'] = max(result['peak_rss_mb'], sample['rss'] / (1024**2))
+
+    def _finish(self):
+        from PyQt6.QtWidgets import QApplication
+        self._sample_rss()
+        self.rss_timer.stop()
+        QApplication.instance().quit()
+
+    def report(self):
+        return list(self.results.values())
+
+
+def process_tree_cpu_seconds():
+    """Tempo de CPU (usuário + sistema) deste processo e de todos os filhos"""
+    import psutil
+    root = psutil.Process()
+    total = 0.0
+    for process in [root] + root.children(recursive=True):
+        try:
+            times = process.cpu_times()
+            total += times.user + times.system
+        except psutil.Error:
+            continue
+    return total
+
+
+def run_worker(options):
+    """Executa uma inicialização completa e grava o resultado em JSON"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    os.environ["MULTIZAP_URL"] = options.url
+    # Todas as instâncias na mesma página, para medir a primeira pintura de cada uma
+    os.environ["MULTIZAP_PAGE_ROWS"] = str(max(1, -(-options.instances // 2)))
+
+    # Diretório limpo: perfis novos a cada execução (partida a frio)
+    workdir = tempfile.mkdtemp(prefix="multizap-bench-")
+    os.chdir(workdir)
+    profiles = [
+        {'name': f"Bench {i}", 'profile_id': f"bench_{i}", 'color': "#0d7377", 'enabled': True}
+        for i in range(options.instances)
+    ]
+    with open("profiles_config.json", 'w', encoding='utf-8') as f:
+        json.dump(profiles, f)
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import main as multizap
+    from login import ProfileManager
+
+    ProfileManager.ensure_profiles_directory()
+    extra_flags = "" if options.keep_gpu else "--disable-gpu "
+    multizap.configure_environment(extra_flags)
+    app = multizap.create_application([sys.argv[0]])
+
+    t0 = time.perf_counter()
+    window = multizap.MainWindow()
+    window.show()
+    recorder = StartupRecorder(window, t0, options.timeout)
+    app.exec()
+
+    result = {
+        'tier': multizap.SYSTEM_CONFIG['profile'],
+        'flags': os.environ.get("QTWEBENGINE_CHROMIUM_FLAGS", ""),
+        'cpu_seconds': process_tree_cpu_seconds(),
+        'instances': recorder.report(),
+    }
+    shared_cache = multizap.asset_cache.shared_cache()
+    if shared_cache is not None:
+        result['shared_cache'] = shared_cache.stats()
+    with open(options.result, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=4)
+
+    window.close()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+# ==========================================
+# PROCESSO PRINCIPAL
+# ==========================================
+
+def summarize(instances):
+    def values(key):
+        return [item[key] for item in instances if item.get(key) is not None]
+
+    def pick(function, key):
+        found = values(key)
+        return function(found) if found else None
+
+    return {
+        'profile_creation_ms_mean': pick(statistics.mean, 'profile_creation_ms'),
+        'first_load_finished_ms': pick(min, 'load_finished_ms'),
+        'last_load_finished_ms': pick(max, 'load_finished_ms'),
+        'first_paint_ms_min': pick(min, 'first_paint_ms'),
+        'peak_rss_mb_max': pick(max, 'peak_rss_mb'),
+        'peak_rss_mb_total': pick(sum, 'peak_rss_mb'),
+    }
+
+
+def run_once(options, url, env=None):
+    """Roda um processo trabalhador e retorna o resultado dele"""
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as handle:
+        result_path = handle.name
+    command = [sys.executable, os.path.abspath(__file__), "--worker",
+               "--instances", str(options.instances), "--url", url,
+               "--timeout", str(options.timeout), "--result", result_path]
+    if options.keep_gpu:
+        command.append("--keep-gpu")
+
+    worker_env = dict(os.environ, **(env or {}))
+    worker_env["QT_QPA_PLATFORM"] = "offscreen"
+    try:
+        subprocess.run(command, env=worker_env, check=True, timeout=options.timeout + 60)
+        with open(result_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    finally:
+        os.remove(result_path)
+
+
+def run_benchmark(options, env=None):
+    """Executa todas as rodadas contra a página substituta e agrega as medianas"""
+    site_dir = tempfile.mkdtemp(prefix="multizap-standin-")
+    try:
+        build_standin_site(site_dir, options.bundle_kb)
+        with StandinServer(site_dir) as server:
+            runs = []
+            for index in range(options.runs):
+                print(f"[Benchmark] Rodada {index + 1}/{options.runs} ({options.instances} instâncias)")
+                run = run_once(options, server.url, env)
+                run['summary'] = summarize(run['instances'])
+                run['summary']['cpu_seconds_total'] = run.get('cpu_seconds')
+                runs.append(run)
+    finally:
+        shutil.rmtree(site_dir, ignore_errors=True)
+
+    summary = {}
+    for metric in SUMMARY_METRICS:
+        found = [run['summary'][metric] for run in runs if run['summary'][metric] is not None]
+        summary[metric] = statistics.median(found) if found else None
+
+    return {
+        'meta': {
+            'date': time.strftime("%Y-%m-%d %H:%M:%S"),
+            'instances': options.instances,
+            'runs': options.runs,
+            'bundle_kb': options.bundle_kb,
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'env': env or {},
+        },
+        'summary': summary,
+        'runs': runs,
+    }
+
+
+def compare(summary, baseline, tolerance):
+    """Imprime a comparação com a linha de base; retorna True se houve regressão"""
+    regression = False
+    print(f"\n{'Métrica':<28}{'Base':>12}{'Atual':>12}{'Variação':>11}")
+    for metric in SUMMARY_METRICS:
+        current, previous = summary.get(metric), baseline.get(metric)
+        if current is None or not previous:
+            print(f"{metric:<28}{str(previous):>12}{str(current):>12}{'-':>11}")
+            continue
+        delta = (current - previous) / previous
+        flag = "  REGRESSÃO" if delta > tolerance else ""
+        regression = regression or delta > tolerance
+        print(f"{metric:<28}{previous:>12.1f}{current:>12.1f}{delta:>+10.1%}{flag}")
+    return regression
+
+
+def preset_env(spec):
+    """'LOW', 'HIGH --flag=1' ou só '--flag' -> variáveis do processo trabalhador"""
+    tier, _, flags = spec.strip().partition(" ")
+    if tier.startswith("--"):
+        tier, flags = "", spec
+    env = {}
+    if tier:
+        env["MULTIZAP_FLAG_PRESET"] = tier.upper()
+    if flags.strip():
+        env["MULTIZAP_CHROMIUM_FLAGS"] = flags.strip()
+    return env
+
+
+def compare_presets(options):
+    """Roda o benchmark com dois presets de flags e mostra a diferença de B para A"""
+    results = {}
+    for spec in options.presets:
+        print(f"[Benchmark] Preset '{spec}'")
+        results[spec] = run_benchmark(options, dict(preset_env(spec), **(options.env or {})))
+
+    first, second = options.presets
+    a, b = results[first]['summary'], results[second]['summary']
+    print(f"\n{'Métrica':<28}{'A':>12}{'B':>12}{'B vs A':>11}")
+    print(f"{'':<28}{first[:12]:>12}{second[:12]:>12}")
+    for metric in SUMMARY_METRICS:
+        if a.get(metric) is None or b.get(metric) is None:
+            print(f"{metric:<28}{str(a.get(metric)):>12}{str(b.get(metric)):>12}{'-':>11}")
+            continue
+        delta = (b[metric] - a[metric]) / a[metric] if a[metric] else 0.0
+        print(f"{metric:<28}{a[metric]:>12.1f}{b[metric]:>12.1f}{delta:>+10.1%}")
+
+    with open(options.output, 'w', encoding='utf-8') as f:
+        json.dump({'presets': results}, f, indent=4)
+    print(f"[Benchmark] Resultados gravados em {options.output}")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark de inicialização do Multi-Zap")
+    parser.add_argument("--instances", type=int, default=4, help="instâncias por rodada")
+    parser.add_argument("--runs", type=int, default=3, help="rodadas (usa a mediana)")
+    parser.add_argument("--bundle-kb", type=int, default=3000, help="tamanho do pacote JS em KB")
+    parser.add_argument("--timeout", type=float, default=120, help="limite por rodada (s)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="arquivo JSON de resultados")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="linha de base para comparação")
+    parser.add_argument("--save-baseline", action="store_true", help="grava o resultado como linha de base")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="piora tolerada (fração)")
+    parser.add_argument("--keep-gpu", action="store_true", help="não adiciona --disable-gpu")
+    parser.add_argument("--shared-cache", action="store_true",
+                        help="ativa o cache compartilhado de arquivos estáticos (asset_cache.py)")
+    parser.add_argument("--presets", nargs=2, metavar=("A", "B"),
+                        help="compara dois presets de flags: perfil (LOW/MEDIUM/HIGH) e/ou flags")
+    # Uso interno: processo trabalhador
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--url", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    return parser
+
+
+def main():
+    options = build_parser().parse_args()
+    if options.worker:
+        run_worker(options)
+        return 0
+
+    options.env = None
+    if options.shared_cache:
+        options.env = {"MULTIZAP_SHARED_CACHE": "1", "MULTIZAP_SHARED_CACHE_HOSTS": "127.0.0.1"}
+    if options.presets:
+        return compare_presets(options)
+
+    results = run_benchmark(options, options.env)
+    with open(options.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=4)
+    print(f"[Benchmark] Resultados gravados em {options.output}")
+
+    if options.save_baseline:
+        with open(options.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results['summary'], f, indent=4)
+        print(f"[Benchmark] Linha de base gravada em {options.baseline}")
+        return 0
+
+    if os.path.exists(options.baseline):
+        with open(options.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare(results['summary'], baseline, options.tolerance):
+            return 1
+    else:
+        print(f"[Benchmark] Sem linha de base em {options.baseline} (use --save-baseline)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""
+Ponte de Estado - Multi-Zap
+Um script injetado observa a página do WhatsApp Web (MutationObserver com
+limite de frequência) e envia ao Python, via QWebChannel, apenas as mudanças
+de mensagens não lidas e do estado da conexão
+"""
+import json
+from PyQt6.QtCore import QObject, QFile, QIODevice, pyqtSignal, pyqtSlot
+from PyQt6.QtWebChannel import QWebChannel
+from PyQt6.QtWebEngineCore import QWebEngineScript
+
+# Intervalo mínimo entre dois envios da mesma página (ms)
+REPORT_THROTTLE = 1000
+
+# Estados da conexão informados pela página
+CONNECTION_STATES = {
+    'loading': ("⏳", "Carregando o WhatsApp Web"),
+    'qr': ("🔳", "Aguardando leitura do QR Code"),
+    'connected': ("", "Conectado"),
+    'offline': ("🔌", "Sem conexão com a internet"),
+    'phone_disconnected': ("📵", "Celular desconectado"),
+}
+
+# Roda num mundo isolado: a página do WhatsApp não enxerga o canal
+OBSERVER_SCRIPT = """
+(function() {
+    if (window.__multizapBridge) return;
+    window.__multizapBridge = true;
+
+    new QWebChannel(qt.webChannelTransport, function(channel) {
+        var bridge = channel.objects.multizap;
+        var last = '';
+        var timer = null;
+
+        function unreadCount() {
+            // O título "(N) WhatsApp" já traz o total de conversas não lidas
+            var match = /^\\((\\d+)\\)/.exec(document.title);
+            if (match) return parseInt(match[1], 10);
+            var total = 0;
+            document.querySelectorAll('#pane-side [aria-label*="unread" i], ' +
+                                      '#pane-side [aria-label*="não lida" i]').forEach(function(el) {
+                var value = parseInt(el.textContent, 10);
+                if (!isNaN(value)) total += value;
+            });
+            return total;
+        }
+
+        function connectionState() {
+            if (!navigator.onLine || document.querySelector('[data-icon="alert-computer"]')) return 'offline';
+            if (document.querySelector('[data-icon="alert-phone"]')) return 'phone_disconnected';
+            if (document.querySelector('#pane-side')) return 'connected';
+            if (document.querySelector('[data-ref], canvas[aria-label]')) return 'qr';
+            return 'loading';
+        }
+
+        function report() {
+            timer = null;
+            var state = JSON.stringify({unread: unreadCount(), connection: connectionState()});
+            if (state !== last) {
+                last = state;
+                bridge.report(state);
+            }
+        }
+
+        function schedule() {
+            if (timer === null) timer = setTimeout(report, %(throttle)d);
+        }
+
+        new MutationObserver(schedule).observe(document.documentElement, {
+            childList: true, subtree: true, characterData: true
+        });
+        window.addEventListener('online', schedule);
+        window.addEventListener('offline', schedule);
+        report();
+    });
+})();
+""" % {'throttle': REPORT_THROTTLE}
+
+_qwebchannel_js = None
+
+
+def qwebchannel_source():
+    """Conteúdo do qwebchannel.js embutido no Qt (lido uma única vez)"""
+    global _qwebchannel_js
+    if _qwebchannel_js is None:
+        resource = QFile(":/qtwebchannel/qwebchannel.js")
+        if not resource.open(QIODevice.OpenModeFlag.ReadOnly):
+            raise RuntimeError("qwebchannel.js não encontrado nos recursos do Qt")
+        _qwebchannel_js = bytes(resource.readAll()).decode('utf-8')
+        resource.close()
+    return _qwebchannel_js
+
+
+def _make_script(name, source):
+    script = QWebEngineScript()
+    script.setName(name)
+    script.setSourceCode(source)
+    script.setInjectionPoint(QWebEngineScript.InjectionPoint.DocumentReady)
+    script.setWorldId(QWebEngineScript.ScriptWorldId.ApplicationWorld)
+    script.setRunsOnSubFrames(False)
+    return script
+
+
+class StatusBridge(QObject):
+    """Objeto exposto à página como 'multizap'; emite status_changed(dict)"""
+    status_changed = pyqtSignal(dict)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.status = {'unread': 0, 'connection': 'loading'}
+
+    @pyqtSlot(str)
+    def report(self, payload):
+        try:
+            status = json.loads(payload)
+        except ValueError:
+            return
+        # A página é código de terceiros: qualquer valor fora do formato é ignorado
+        if not isinstance(status, dict):
+            return
+        try:
+            unread = max(0, int(status.get('unread', 0)))
+        except (TypeError, ValueError, OverflowError):
+            return
+        connection = status.get('connection')
+        status = {
+            'unread': unread,
+            'connection': connection if isinstance(connection, str) and connection in CONNECTION_STATES else 'loading',
+        }
+        if status != self.status:
+            self.status = status
+            self.status_changed.emit(status)
+
+    def attach(self, page):
+        """Registra o canal e os scripts numa página (também após recriá-la)"""
+        channel = QWebChannel(page)
+        channel.registerObject("multizap", self)
+        page.setWebChannel(channel, QWebEngineScript.ScriptWorldId.ApplicationWorld)
+
+        scripts = page.scripts()
+        for name in ("multizap-qwebchannel", "multizap-observer"):
+            for existing in scripts.find(name):
+                scripts.remove(existing)
+        scripts.insert(_make_script("multizap-qwebchannel", qwebchannel_source()))
+        scripts.insert(_make_script("multizap-observer", OBSERVER_SCRIPT))
@@ -0,0 +1,190 @@
+"""
+Flags do Chromium - Multi-Zap
+As flags são montadas a partir de presets estruturados (base + perfil de
+hardware + ajustes do usuário) em vez de uma única string fixa. A junção
+entende as flags de lista: --enable-features/--disable-features são unidas
+(e um recurso ligado num nível sai da lista de desligados, e vice-versa) e as
+opções de --js-flags são combinadas pelo nome
+
+Ajustes do usuário (aplicados por último):
+    chromium_flags.json        {"flags": ["--flag=valor"], "remove": ["--flag"]}
+    MULTIZAP_CHROMIUM_FLAGS    "--flag=valor !--flag-removida"
+    MULTIZAP_FLAG_PRESET       LOW | MEDIUM | HIGH (ignora o hardware detectado)
+"""
+import os
+import json
+import shlex
+from resources import TIER_CONFIGS
+
+USER_FLAGS_FILE = "chromium_flags.json"
+
+# Flags cujo valor é uma lista separada por vírgulas
+FEATURE_FLAGS = ('--enable-features', '--disable-features')
+JS_FLAGS = '--js-flags'
+
+
+class FlagSet:
+    """Flags em ordem, sem repetição; None indica flag sem valor"""
+    def __init__(self, flags=None):
+        self.flags = {}
+        self.removed = set()
+        for name, value in (flags or {}).items():
+            self.set(name, value)
+
+    @classmethod
+    def parse(cls, text):
+        """Converte '--a --b=1 !--c' em um FlagSet ('!' marca remoção)"""
+        flag_set = cls()
+        for token in shlex.split(text or ""):
+            if token.startswith('!'):
+                flag_set.remove(token[1:])
+                continue
+            name, has_value, value = token.partition('=')
+            flag_set.set(name, value if has_value else None)
+        return flag_set
+
+    def set(self, name, value=None):
+        self.removed.discard(name)
+        if name in FEATURE_FLAGS or name == JS_FLAGS:
+            self._merge_list(name, value)
+        else:
+            self.flags[name] = value
+
+    def remove(self, name):
+        self.flags.pop(name, None)
+        self.removed.add(name)
+
+    def _merge_list(self, name, value):
+        items = [item for item in (value or "").split(',') if item]
+        if name == JS_FLAGS:
+            # Opções do V8 combinadas pelo nome: a última definição vale
+            current = {item.partition('=')[0]: item for item in (self.flags.get(name) or "").split(',') if item}
+            for item in items:
+                current[item.partition('=')[0]] = item
+            merged = list(current.values())
+        else:
+            other = FEATURE_FLAGS[1] if name == FEATURE_FLAGS[0] else FEATURE_FLAGS[0]
+            # Um recurso não pode estar ligado e desligado ao mesmo tempo
+            if other in self.flags:
+                remaining = [f for f in self.flags[other].split(',') if f and f not in items]
+                if remaining:
+                    self.flags[other] = ",".join(remaining)
+                else:
+                    del self.flags[other]
+            merged = [f for f in (self.flags.get(name) or "").split(',') if f]
+            merged += [item for item in items if item not in merged]
+        if merged:
+            self.flags[name] = ",".join(merged)
+
+    def merge(self, other):
+        """Aplica outro FlagSet por cima deste (remoções incluídas)"""
+        for name in other.removed:
+            self.remove(name)
+        for name, value in other.flags.items():
+            self.set(name, value)
+        return self
+
+    def render(self):
+        return " ".join(name if value is None else f"{name}={value}" for name, value in self.flags.items())
+
+
+# Valem para qualquer perfil de hardware
+BASE_FLAGS = {
+    # === Economia de Memória ===
+    '--disable-dev-shm-usage': None,                # Evita problemas com /dev/shm
+    '--disable-background-timer-throttling': None,  # Não throttle timers em background
+    '--disable-backgrounding-occluded-windows': None,  # Não desativa janelas ocultas
+    '--disable-renderer-backgrounding': None,       # Mantém renderer ativo
+
+    # === Segurança Relaxada (Performance) ===
+    '--no-sandbox': None,                           # Remove sandbox (reduz overhead)
+    '--disable-setuid-sandbox': None,               # Remove setuid sandbox
+    '--disable-web-security': None,                 # Desativa algumas verificações de segurança
+
+    # === JavaScript Otimizado === (o limite do heap vem do perfil)
+    '--js-flags': "--expose-gc",                    # GC manual
+
+    # === Recursos Desabilitados ===
+    '--disable-sync': None,                         # Sem sincronização
+    '--disable-breakpad': None,                     # Desabilita crash reporter
+    '--disable-extensions': None,                   # Sem extensões
+    '--disable-plugins': None,                      # Sem plugins
+    '--disable-print-preview': None,                # Sem preview de impressão
+    '--disable-component-update': None,             # Sem atualizações de componentes
+    '--disable-background-networking': None,       # Reduz networking em background
+    '--disable-features': "TranslateUI,MediaRouter",  # Tradução e media router
+    '--disable-domain-reliability': None,           # Desabilita relatórios de confiabilidade
+
+    # === GPU e Renderização (Mantém aceleração) ===
+    '--enable-accelerated-2d-canvas': None,         # Mantém aceleração 2D
+    '--ignore-gpu-blocklist': None,                 # Força uso da GPU
+    '--enable-gpu-rasterization': None,             # Rasterização por GPU
+
+    # === Rede e Cache ===
+    '--media-cache-size': "20971520",               # Cache de mídia 20MB
+
+    # === Áudio/Vídeo (Essencial para WhatsApp) ===
+    '--autoplay-policy': "no-user-gesture-required",  # Permite autoplay
+    '--use-fake-ui-for-media-stream': None,         # UI fake para mídia
+    '--enable-features': "WebRTC-H264WithOpenH264FFmpeg",  # Codec H264
+
+    # === Performance Geral ===
+    '--process-per-site': None,                     # Um processo por site
+    '--in-process-gpu': None,                       # GPU no mesmo processo
+    '--metrics-recording-only': None,               # Apenas métricas essenciais
+    '--disable-software-rasterizer': None,          # Força rasterização por hardware
+    '--v8-cache-options': "code",                   # Cache de código V8
+}
+
+# Flags extras de cada perfil de hardware
+TIER_FLAGS = {
+    'LOW': {
+        '--enable-low-end-device-mode': None,       # Modo para dispositivos fracos
+        '--enable-low-res-tiling': None,            # Tiles de baixa resolução
+    },
+    'MEDIUM': {
+        '--enable-low-res-tiling': None,
+    },
+    'HIGH': {},
+}
+
+
+def tier_flags(tier):
+    """Flags do perfil, com os valores calculados a partir da sua configuração"""
+    config = TIER_CONFIGS[tier]
+    flags = FlagSet(TIER_FLAGS[tier])
+    flags.set('--js-flags', f"--max-old-space-size={config['max_heap']}")
+    flags.set('--num-raster-threads', str(config['raster_threads']))
+    flags.set('--disk-cache-size', str(config['cache_size'] * 1024 * 1024))
+    return flags
+
+
+def user_flags():
+    """Ajustes do arquivo chromium_flags.json e da variável MULTIZAP_CHROMIUM_FLAGS"""
+    flags = FlagSet()
+    if os.path.exists(USER_FLAGS_FILE):
+        try:
+            with open(USER_FLAGS_FILE, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+            flags.merge(FlagSet.parse(" ".join(shlex.quote(flag) for flag in config.get('flags', []))))
+            for name in config.get('remove', []):
+                flags.remove(name)
+        except (OSError, ValueError) as e:
+            print(f"[Sistema] Erro ao ler {USER_FLAGS_FILE}: {e}")
+    flags.merge(FlagSet.parse(os.environ.get("MULTIZAP_CHROMIUM_FLAGS", "")))
+    return flags
+
+
+def flag_preset(tier):
+    """Perfil cujas flags serão usadas (MULTIZAP_FLAG_PRESET tem prioridade)"""
+    preset = os.environ.get("MULTIZAP_FLAG_PRESET", "").upper()
+    return preset if preset in TIER_CONFIGS else tier
+
+
+def build_flags(tier, extra_flags=""):
+    """Base + perfil + usuário + extras (ex.: --disable-gpu do benchmark)"""
+    flags = FlagSet(BASE_FLAGS)
+    flags.merge(tier_flags(flag_preset(tier)))
+    flags.merge(user_flags())
+    flags.merge(FlagSet.parse(extra_flags))
+    return flags
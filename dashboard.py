@@ -9,11 +9,24 @@ from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                              QListWidget, QListWidgetItem, QDialog, QColorDialog,
                              QMessageBox, QCheckBox, QGridLayout, QGroupBox,
                              QSpinBox, QDialogButtonBox)
-from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 from PyQt6.QtGui import QColor
 from login import ProfileManager
+import storage
 import subprocess
 
+# Partida a quente: abre a grade no mesmo processo (MULTIZAP_WARM_START=0 desativa)
+WARM_START = os.environ.get("MULTIZAP_WARM_START", "1") != "0"
+
+def load_engine():
+    """Importa o motor (main.py) para a partida a quente, ou None se indisponível"""
+    try:
+        import main as engine
+        return engine
+    except ImportError as e:
+        print(f"[Partida a quente] Indisponível, usando processo separado: {e}")
+        return None
+
 def show_message(parent, title, text, icon_type="info"):
     """Exibe uma mensagem estilizada que funciona no Windows 10"""
     msg = QMessageBox(parent)
@@ -154,12 +167,28 @@ class ProfileDialog(QDialog):
 
 class DashboardWindow(QMainWindow):
     """Janela principal do dashboard"""
-    def __init__(self):
+    def __init__(self, engine=None):
         super().__init__()
         self.profile_manager = ProfileManager()
         ProfileManager.ensure_profiles_directory()
         self.setup_ui()
         self.load_profiles_list()
+        
+        # A lista é atualizada item a item conforme as alterações nos perfis
+        self.profile_manager.subscribe(self.on_profiles_changed)
+        
+        # Com o motor carregado, perfis são pré-criados enquanto o usuário escolhe
+        self.engine = engine
+        self.warm_pool = None
+        self.grid_window = None
+        if engine is not None:
+            from warmup import WarmPool
+            self.warm_pool = WarmPool(engine.create_profile, self)
+            QTimer.singleShot(500, self.prewarm_profiles)
+    
+    def prewarm_profiles(self):
+        enabled = self.profile_manager.get_enabled_profiles()
+        self.warm_pool.prewarm([p['profile_id'] for p in enabled])
     
     def setup_ui(self):
         self.setWindowTitle("Multi-Zap Dashboard | LKA - Gerenciador")
@@ -265,6 +294,11 @@ class DashboardWindow(QMainWindow):
         layout_config.addLayout(grid_layout)
         layout_config.addStretch()
         
+        # Limpeza dos caches descartáveis (o login é preservado)
+        self.clean_btn = QPushButton("🧹 Limpar caches")
+        self.clean_btn.clicked.connect(self.clean_caches)
+        layout_config.addWidget(self.clean_btn)
+        
         layout_group.setLayout(layout_config)
         content_layout.addWidget(layout_group, 1)
         
@@ -297,23 +331,59 @@ class DashboardWindow(QMainWindow):
         profiles = self.profile_manager.get_all_profiles()
         
         for profile in profiles:
-            item = QListWidgetItem(f"● {profile['name']} ({profile['profile_id']})")
-            item.setData(Qt.ItemDataRole.UserRole, profile)
+            item = QListWidgetItem()
             item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
-            item.setCheckState(
-                Qt.CheckState.Checked if profile.get('enabled', True) 
-                else Qt.CheckState.Unchecked
-            )
-            
-            # Aplicar cor
-            item.setForeground(QColor(profile['color']))
+            self.fill_item(item, profile)
             self.profiles_list.addItem(item)
     
+    def fill_item(self, item, profile):
+        """Preenche o item da lista com os dados do perfil (o item guarda só o ID)"""
+        item.setText(f"● {profile['name']} ({profile['profile_id']})")
+        item.setData(Qt.ItemDataRole.UserRole, profile['profile_id'])
+        item.setCheckState(
+            Qt.CheckState.Checked if profile.get('enabled', True) 
+            else Qt.CheckState.Unchecked
+        )
+        
+        # Aplicar cor
+        item.setForeground(QColor(profile['color']))
+    
+    def find_item(self, profile_id):
+        for row in range(self.profiles_list.count()):
+            item = self.profiles_list.item(row)
+            if item.data(Qt.ItemDataRole.UserRole) == profile_id:
+                return item
+        return None
+    
+    def on_profiles_changed(self, event, profile_id, data):
+        """Aplica na lista apenas a diferença notificada pelo ProfileManager"""
+        if event == 'reordered':
+            self.load_profiles_list()
+            return
+        
+        # Evita que a atualização do item dispare on_profile_checked
+        self.profiles_list.blockSignals(True)
+        try:
+            item = self.find_item(profile_id)
+            if event == 'added' and item is None:
+                item = QListWidgetItem()
+                item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+                self.fill_item(item, data)
+                self.profiles_list.addItem(item)
+            elif event == 'removed' and item is not None:
+                self.profiles_list.takeItem(self.profiles_list.row(item))
+            elif event == 'updated' and item is not None:
+                self.fill_item(item, self.profile_manager.get_profile(profile_id))
+        finally:
+            self.profiles_list.blockSignals(False)
+    
     def on_profile_checked(self, item):
         """Atualiza o estado habilitado do perfil"""
-        profile = item.data(Qt.ItemDataRole.UserRole)
+        profile_id = item.data(Qt.ItemDataRole.UserRole)
         enabled = item.checkState() == Qt.CheckState.Checked
-        self.profile_manager.update_profile(profile['profile_id'], enabled=enabled)
+        self.profile_manager.update_profile(profile_id, enabled=enabled)
+        if enabled and self.warm_pool is not None:
+            self.warm_pool.prewarm([profile_id])
     
     def add_profile(self):
         """Adiciona um novo perfil"""
@@ -322,7 +392,6 @@ class DashboardWindow(QMainWindow):
             data = dialog.get_data()
             if self.profile_manager.add_profile(data['name'], data['profile_id'], data['color']):
                 show_message(self, "Sucesso", "Perfil adicionado com sucesso!", "info")
-                self.load_profiles_list()
             else:
                 show_message(self, "Erro", "Perfil com este ID já existe!", "warning")
     
@@ -333,7 +402,7 @@ class DashboardWindow(QMainWindow):
             show_message(self, "Aviso", "Selecione um perfil para editar!", "warning")
             return
         
-        profile = current_item.data(Qt.ItemDataRole.UserRole)
+        profile = self.profile_manager.get_profile(current_item.data(Qt.ItemDataRole.UserRole))
         dialog = ProfileDialog(self, profile)
         
         if dialog.exec() == QDialog.DialogCode.Accepted:
@@ -344,7 +413,6 @@ class DashboardWindow(QMainWindow):
                 color=data['color']
             ):
                 show_message(self, "Sucesso", "Perfil atualizado com sucesso!", "info")
-                self.load_profiles_list()
     
     def remove_profile(self):
         """Remove o perfil selecionado"""
@@ -353,7 +421,7 @@ class DashboardWindow(QMainWindow):
             show_message(self, "Aviso", "Selecione um perfil para remover!", "warning")
             return
         
-        profile = current_item.data(Qt.ItemDataRole.UserRole)
+        profile = self.profile_manager.get_profile(current_item.data(Qt.ItemDataRole.UserRole))
         reply = QMessageBox.question(
             self, 
             "Confirmar Remoção",
@@ -364,7 +432,37 @@ class DashboardWindow(QMainWindow):
         if reply == QMessageBox.StandardButton.Yes:
             self.profile_manager.remove_profile(profile['profile_id'])
             show_message(self, "Sucesso", "Perfil removido com sucesso!", "info")
-            self.load_profiles_list()
+    
+    def clean_caches(self):
+        """Apaga os caches descartáveis dos perfis que não estão abertos"""
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        try:
+            report = storage.analyze()
+        finally:
+            QApplication.restoreOverrideCursor()
+        
+        # Perfis pré-criados pela partida a quente já estão em uso
+        if self.warm_pool is not None:
+            for profile_id in list(self.warm_pool.profiles):
+                report.pop(profile_id, None)
+        
+        reclaimable = sum(e['disposable'] for e in report.values() if not e['running'])
+        if reclaimable == 0:
+            show_message(self, "Limpeza", "Não há caches para limpar.", "info")
+            return
+        
+        reply = QMessageBox.question(
+            self,
+            "Limpar Caches",
+            f"Liberar {reclaimable / (1024**2):.1f} MB de cache dos perfis fechados?\n"
+            "(Sessões e logins não serão apagados)",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        
+        freed = storage.prune(report, prune_all=True)
+        show_message(self, "Limpeza", f"{sum(freed.values()) / (1024**2):.1f} MB liberados!", "info")
     
     def start_multizap(self):
         """Inicia o Multi-Zap com os perfis selecionados"""
@@ -374,6 +472,23 @@ class DashboardWindow(QMainWindow):
             show_message(self, "Aviso", "Selecione pelo menos um perfil!", "warning")
             return
         
+        # Partida a quente: a grade abre neste processo, com os perfis já criados
+        if self.engine is not None:
+            try:
+                self.grid_window = self.engine.MainWindow(
+                    profile_manager=self.profile_manager,
+                    profile_pool=self.warm_pool
+                )
+                self.warm_pool.release_unused()
+                self.grid_window.show()
+                self.close()
+                return
+            except Exception as e:
+                print(f"[Partida a quente] Falhou, usando processo separado: {e}")
+        
+        # O processo separado lê o arquivo: gravar alterações pendentes antes
+        self.profile_manager.flush()
+        
         # Fechar dashboard e iniciar main
         try:
             if getattr(sys, 'frozen', False):
@@ -393,7 +508,17 @@ class DashboardWindow(QMainWindow):
 # BLOCO PRINCIPAL (FORA DA CLASSE)
 # ==========================================
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    window = DashboardWindow()
+    # O ambiente do QtWebEngine precisa ser configurado antes do QApplication
+    engine = load_engine() if WARM_START else None
+    if engine is not None:
+        engine.configure_environment()
+        app = engine.create_application(sys.argv)
+    else:
+        app = QApplication(sys.argv)
+    window = DashboardWindow(engine)
     window.show()
-    sys.exit(app.exec())
\ No newline at end of file
+    exit_code = app.exec()
+    # Grade aberta neste processo: perfis fechados antes da última gravação da RAM
+    if window.grid_window is not None:
+        engine.shutdown_engine(window.grid_window)
+    sys.exit(exit_code)
\ No newline at end of file
@@ -0,0 +1,224 @@
+"""
+Modo Headless - Multi-Zap
+Para turnos em que as contas só precisam ficar conectadas: a janela principal
+nunca é exibida, as páginas rodam ocultas (sem composição nem pintura) com
+viewport pequeno, sem GPU e com timers e renderizadores em ritmo de segundo
+plano (sem keep-alive), e as mensagens não lidas aparecem num ícone na
+bandeja do sistema e no terminal. Qualquer instância pode ser aberta numa
+janela própria pelo menu da bandeja
+
+Sem servidor gráfico (ex.: via SSH) a plataforma offscreen do Qt é usada e
+tudo é informado apenas no terminal
+"""
+import os
+import sys
+import signal
+from PyQt6.QtWidgets import QApplication, QSystemTrayIcon, QMenu
+from PyQt6.QtCore import QObject, QEvent, QSize, QTimer, Qt
+from PyQt6.QtGui import QIcon, QPixmap, QPainter, QColor, QAction
+import notifications
+
+# Sem GPU: as páginas ocultas não pintam, e as abertas usam composição por software.
+# As flags da base que mantêm os renderizadores ocultos em ritmo normal são
+# removidas ('!'): o Chromium volta a reduzir a prioridade e os timers deles
+HEADLESS_FLAGS = ("--disable-gpu --disable-gpu-compositing "
+                  "!--disable-renderer-backgrounding "
+                  "!--disable-background-timer-throttling "
+                  "!--disable-backgrounding-occluded-windows")
+
+# Viewport das páginas ocultas e tamanho da janela de uma instância aberta
+VIEWPORT = QSize(640, 480)
+POPOUT_SIZE = QSize(1000, 750)
+
+TRAY_COLOR = "#25d366"
+
+
+def has_display():
+    """False no Linux sem X11/Wayland (ex.: sessão SSH)"""
+    if not sys.platform.startswith('linux'):
+        return True
+    return bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
+
+def configure_platform():
+    """Escolhe a plataforma Qt - DEVE ser chamado ANTES de criar o QApplication"""
+    if os.environ.get("MULTIZAP_HEADLESS_OFFSCREEN") == "1" or not has_display():
+        os.environ["QT_QPA_PLATFORM"] = "offscreen"
+        print("[Headless] Sem servidor gráfico: plataforma offscreen, avisos apenas no terminal")
+        return True
+    return False
+
+
+def tray_icon(unread):
+    """Círculo verde com o total de não lidas"""
+    pixmap = QPixmap(32, 32)
+    pixmap.fill(Qt.GlobalColor.transparent)
+    painter = QPainter(pixmap)
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    painter.setBrush(QColor("#d32f2f" if unread else TRAY_COLOR))
+    painter.setPen(Qt.PenStyle.NoPen)
+    painter.drawEllipse(1, 1, 30, 30)
+    painter.setPen(QColor("white"))
+    font = painter.font()
+    font.setBold(True)
+    font.setPixelSize(14 if unread < 100 else 11)
+    painter.setFont(font)
+    painter.drawText(pixmap.rect(), Qt.AlignmentFlag.AlignCenter, str(unread) if unread else "Z")
+    painter.end()
+    return QIcon(pixmap)
+
+
+class HeadlessController(QObject):
+    """
+    Mantém as instâncias da MainWindow (oculta) rodando em segundo plano e
+    publica as não lidas na bandeja/terminal. Fechar a janela de uma instância
+    aberta apenas a oculta de novo; o app encerra pelo menu, Ctrl+C ou SIGTERM
+    """
+    def __init__(self, window, offscreen=False, parent=None):
+        super().__init__(parent)
+        self.window = window
+        self.popped_out = set()
+        self.last_unread = {}
+        self.last_notified = None
+
+        app = QApplication.instance()
+        app.setQuitOnLastWindowClosed(False)
+
+        for instance in window.instances:
+            self.register(instance)
+
+        self.tray = None
+        if not offscreen and QSystemTrayIcon.isSystemTrayAvailable():
+            self.tray = QSystemTrayIcon(tray_icon(0), self)
+            self.menu = QMenu()
+            self.menu.aboutToShow.connect(self.rebuild_menu)
+            self.tray.setContextMenu(self.menu)
+            self.tray.messageClicked.connect(self.on_message_clicked)
+            self.tray.activated.connect(self.on_tray_activated)
+            self.tray.show()
+            self.update_tray()
+            # Avisos das páginas usam este mesmo ícone
+            center = notifications.notification_center()
+            if center is not None:
+                center.use_tray(self.tray)
+        else:
+            print("[Headless] Bandeja do sistema indisponível: não lidas apenas no terminal")
+
+        # Ctrl+C e SIGTERM fecham a janela (travas, gravação da RAM) e encerram
+        signal.signal(signal.SIGINT, lambda *args: self.quit())
+        signal.signal(signal.SIGTERM, lambda *args: self.quit())
+        self.signal_timer = QTimer(self)
+        self.signal_timer.timeout.connect(lambda: None)  # devolve o controle ao Python
+        self.signal_timer.start(500)
+
+        print(f"[Headless] {len(window.instances)} instância(s) em segundo plano")
+
+    def register(self, instance):
+        """Também chamado para contas habilitadas com o app aberto"""
+        # Layouts de widgets ocultos não são ativados: o tamanho é definido aqui
+        instance.resize(VIEWPORT)
+        instance.browser.resize(VIEWPORT)
+        self.last_unread[instance] = instance.unread
+        instance.unread_changed.connect(self.on_unread_changed)
+
+    def unregister(self, instance):
+        self.last_unread.pop(instance, None)
+        self.popped_out.discard(instance)
+        if self.last_notified is instance:
+            self.last_notified = None
+        if self.tray is not None:
+            self.update_tray()
+
+    def needs_keep_alive(self, instance):
+        """Só as instâncias abertas em janela própria recebem keep-alive"""
+        return instance in self.popped_out
+
+    def total_unread(self):
+        return sum(instance.unread for instance in self.window.instances)
+
+    def on_unread_changed(self, instance):
+        previous = self.last_unread.get(instance, 0)
+        self.last_unread[instance] = instance.unread
+        total = self.total_unread()
+        print(f"[Headless] {instance.instance_title}: {instance.unread} não lida(s) (total {total})")
+        if self.tray is None:
+            return
+        self.update_tray()
+        # Com a central ativa, os avisos vêm das notificações da página
+        if notifications.ENABLED:
+            return
+        if instance.unread > previous and instance not in self.popped_out:
+            self.last_notified = instance
+            self.tray.showMessage(
+                instance.instance_title,
+                f"{instance.unread} mensagem(ns) não lida(s)",
+                QSystemTrayIcon.MessageIcon.Information,
+                5000
+            )
+
+    def update_tray(self):
+        total = self.total_unread()
+        self.tray.setIcon(tray_icon(total))
+        lines = [f"{self.window.base_title} (segundo plano)"]
+        lines += [
+            f"{instance.instance_title}: {instance.unread}"
+            for instance in self.window.instances if instance.unread
+        ]
+        self.tray.setToolTip("\n".join(lines))
+
+    def rebuild_menu(self):
+        """Uma entrada por instância, com as não lidas atuais"""
+        self.menu.clear()
+        for instance in self.window.instances:
+            badge = f" ({instance.unread})" if instance.unread else ""
+            action = QAction(f"Abrir {instance.instance_title}{badge}", self.menu)
+            action.triggered.connect(lambda checked=False, target=instance: self.pop_out(target))
+            self.menu.addAction(action)
+        self.menu.addSeparator()
+        quit_action = QAction("Sair", self.menu)
+        quit_action.triggered.connect(self.quit)
+        self.menu.addAction(quit_action)
+
+    def on_message_clicked(self):
+        if self.last_notified is not None:
+            self.pop_out(self.last_notified)
+
+    def on_tray_activated(self, reason):
+        # Clique simples abre a conta com mais mensagens não lidas
+        if reason == QSystemTrayIcon.ActivationReason.Trigger:
+            busiest = max(self.window.instances, key=lambda instance: instance.unread, default=None)
+            if busiest is not None and busiest.unread:
+                self.pop_out(busiest)
+
+    def pop_out(self, instance):
+        """Exibe a instância numa janela própria (restaurando-a se hibernada)"""
+        if self.tray is None:
+            print(f"[Headless] Sem servidor gráfico: {instance.instance_title} não pode ser aberta")
+            return
+        if instance not in self.popped_out:
+            self.popped_out.add(instance)
+            instance.setParent(None)
+            instance.setWindowTitle(f"{instance.instance_title} - {self.window.base_title}")
+            instance.installEventFilter(self)
+            instance.resize(POPOUT_SIZE)
+            print(f"[Headless] {instance.instance_title} aberta em janela própria")
+        instance.show()
+        instance.raise_()
+        instance.activateWindow()
+        instance.wake()
+        instance.browser.setFocus()
+
+    def eventFilter(self, obj, event):
+        # Fechar a janela de uma instância só a devolve ao segundo plano
+        if event.type() == QEvent.Type.Close and obj in self.popped_out:
+            event.ignore()
+            obj.capture_snapshot()
+            obj.hide()
+            print(f"[Headless] {obj.instance_title} de volta ao segundo plano")
+            return True
+        return False
+
+    def quit(self):
+        # A MainWindow nunca foi exibida, mas o closeEvent faz a limpeza
+        self.window.close()
+        QApplication.instance().quit()
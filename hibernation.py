@@ -0,0 +1,125 @@
+"""
+Gerenciador de Hibernação - Multi-Zap
+Congela e descarta instâncias ociosas (menos usadas recentemente) quando o
+consumo total de memória dos renderizadores ultrapassa o orçamento configurado
+"""
+import time
+import psutil
+from PyQt6.QtCore import QObject, QEvent
+from PyQt6.QtWidgets import QApplication, QWidget
+from PyQt6.QtWebEngineCore import QWebEnginePage
+
+LifecycleState = QWebEnginePage.LifecycleState
+
+# Eventos que contam como interação do usuário com uma instância
+INTERACTION_EVENTS = (
+    QEvent.Type.MouseButtonPress,
+    QEvent.Type.KeyPress,
+    QEvent.Type.Wheel,
+    QEvent.Type.FocusIn,
+)
+
+
+class HibernationManager(QObject):
+    """
+    Controla o ciclo de vida das páginas (Active → Frozen → Discarded).
+
+    A cada verificação (check_budget, chamada pelo agendador) soma o RSS dos processos de renderização; se passar do
+    orçamento, as instâncias ociosas mais antigas são congeladas e, persistindo
+    o excesso na verificação seguinte, descartadas. Um clique no aviso da
+    instância a restaura.
+    """
+    def __init__(self, budget_mb, idle_seconds=300, parent=None):
+        super().__init__(parent)
+        self.budget_bytes = budget_mb * 1024 * 1024
+        self.idle_seconds = idle_seconds
+        self.instances = []
+
+        # Um único filtro global registra a última interação de cada instância
+        QApplication.instance().installEventFilter(self)
+
+    def register(self, instance):
+        if instance not in self.instances:
+            self.instances.append(instance)
+
+    def unregister(self, instance):
+        if instance in self.instances:
+            self.instances.remove(instance)
+
+    def eventFilter(self, obj, event):
+        if event.type() in INTERACTION_EVENTS and isinstance(obj, QWidget):
+            instance = self._instance_for(obj)
+            if instance is not None:
+                instance.touch()
+        return False
+
+    def _instance_for(self, widget):
+        """Sobe na hierarquia de widgets até encontrar a instância dona"""
+        while widget is not None:
+            if widget in self.instances:
+                return widget
+            widget = widget.parentWidget()
+        return None
+
+    @staticmethod
+    def renderer_rss(instance):
+        """RSS (bytes) do processo de renderização da instância, ou 0"""
+        pid = instance.page.renderProcessPid()
+        if not pid:
+            return 0
+        try:
+            return psutil.Process(pid).memory_info().rss
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return 0
+
+    def measure(self):
+        """Retorna {instância: rss} contando cada processo apenas uma vez"""
+        usage = {}
+        seen_pids = set()
+        for instance in self.instances:
+            pid = instance.page.renderProcessPid()
+            if pid in seen_pids:
+                usage[instance] = 0
+                continue
+            seen_pids.add(pid)
+            usage[instance] = self.renderer_rss(instance)
+        return usage
+
+    def _is_focused(self, instance):
+        focus = QApplication.focusWidget()
+        return focus is not None and (focus is instance or instance.isAncestorOf(focus))
+
+    def candidates(self):
+        """Instâncias elegíveis para hibernar: fora da tela primeiro, depois LRU"""
+        now = time.monotonic()
+        eligible = [
+            instance for instance in self.instances
+            if instance.started
+            and instance.lifecycle_state() != LifecycleState.Discarded
+            and now - instance.last_interaction >= self.idle_seconds
+            and not self._is_focused(instance)
+        ]
+        return sorted(eligible, key=lambda instance: (instance.isVisible(), instance.last_interaction))
+
+    def check_budget(self):
+        usage = self.measure()
+        total = sum(usage.values())
+        if total <= self.budget_bytes:
+            return
+
+        print(f"[Hibernação] Uso {total / (1024**2):.0f} MB acima do orçamento de "
+              f"{self.budget_bytes / (1024**2):.0f} MB")
+
+        # Páginas já congeladas são descartadas antes de congelar novas
+        candidates = sorted(
+            self.candidates(),
+            key=lambda instance: instance.lifecycle_state() != LifecycleState.Frozen
+        )
+        for instance in candidates:
+            if total <= self.budget_bytes:
+                break
+            if instance.lifecycle_state() == LifecycleState.Frozen:
+                instance.hibernate(LifecycleState.Discarded)
+            else:
+                instance.hibernate(LifecycleState.Frozen)
+            total -= usage.get(instance, 0)
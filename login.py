@@ -5,15 +5,60 @@ Atualizado para compatibilidade com PyQt6
 """
 import os
 import json
+import atexit
+import tempfile
+import threading
+import weakref
 
 PROFILES_DIR = "profiles"
 PROFILES_CONFIG = "profiles_config.json"
 
+# Alterações seguidas são agrupadas em uma única gravação após este atraso (s)
+SAVE_DELAY = 0.5
+
+# Gerenciadores vivos: um único flush na saída do programa, sem manter
+# instâncias descartadas presas ao atexit
+_managers = weakref.WeakSet()
+
+
+def _flush_all():
+    for manager in list(_managers):
+        manager.flush()
+
+
+atexit.register(_flush_all)
+
 class ProfileManager:
-    def __init__(self):
+    """
+    Perfis indexados por profile_id (busca O(1), ordem preservada).
+
+    Cada alteração agenda uma gravação atrasada: várias mudanças em sequência
+    (ex.: marcar vários perfis no dashboard) viram uma única escrita. A
+    gravação é atômica (arquivo temporário + rename) e flush() força a escrita
+    imediata. Interessados recebem apenas as diferenças via subscribe().
+    """
+    def __init__(self, config_file=PROFILES_CONFIG, save_delay=SAVE_DELAY):
         self.profiles_dir = PROFILES_DIR
-        self.config_file = PROFILES_CONFIG
-        self.profiles = self.load_profiles()
+        self.config_file = config_file
+        self.save_delay = save_delay
+        self._lock = threading.RLock()
+        self._save_timer = None
+        self._dirty = False
+        # Alterações locais ainda não gravadas: profile_id -> perfil (None = removido)
+        self._pending = {}
+        self._listeners = []
+        self.index = self._build_index(self.load_profiles())
+
+        # Nada agendado se perde ao encerrar o programa
+        _managers.add(self)
+
+    @staticmethod
+    def _build_index(profiles):
+        return {p['profile_id']: p for p in profiles}
+
+    @property
+    def profiles(self):
+        return list(self.index.values())
     
     def load_profiles(self):
         """Carrega a lista de perfis salvos"""
@@ -27,14 +72,67 @@ class ProfileManager:
         return []
     
     def save_profiles(self):
-        """Salva a lista de perfis no arquivo de configuração"""
+        """Agenda a gravação da lista de perfis (agrupando alterações próximas)"""
+        with self._lock:
+            self._dirty = True
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+            self._save_timer = threading.Timer(self.save_delay, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+        return True
+
+    def flush(self):
+        """Grava imediatamente as alterações pendentes"""
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if not self._dirty:
+                return True
+            try:
+                self._write_atomic(self.profiles)
+                self._dirty = False
+                self._pending.clear()
+                return True
+            except Exception as e:
+                print(f"Erro ao salvar perfis: {e}")
+                return False
+
+    def _write_atomic(self, profiles):
+        """Escreve em um temporário no mesmo diretório e substitui o arquivo"""
+        directory = os.path.dirname(os.path.abspath(self.config_file))
+        fd, temp_path = tempfile.mkstemp(prefix=".profiles_", suffix=".tmp", dir=directory)
         try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(self.profiles, f, indent=4, ensure_ascii=False)
-            return True
-        except Exception as e:
-            print(f"Erro ao salvar perfis: {e}")
-            return False
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(profiles, f, indent=4, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.config_file)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def subscribe(self, callback):
+        """
+        Registra callback(evento, profile_id, dados) para mudanças nos perfis
+
+        Eventos: 'added' (dados = perfil), 'removed' (dados = perfil removido),
+        'updated' (dados = {campo: novo valor}) e 'reordered' (dados = lista de ids)
+        """
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self, event, profile_id, data):
+        for callback in list(self._listeners):
+            try:
+                callback(event, profile_id, data)
+            except Exception as e:
+                print(f"Erro ao notificar alteração de perfil: {e}")
     
     def add_profile(self, name, profile_id, color):
         """
@@ -49,7 +147,7 @@ class ProfileManager:
             bool: True se adicionado com sucesso
         """
         # Verificar se o profile_id já existe
-        if any(p['profile_id'] == profile_id for p in self.profiles):
+        if profile_id in self.index:
             return False
         
         # Criar diretório do perfil se não existir
@@ -57,46 +155,94 @@ class ProfileManager:
         if not os.path.exists(profile_path):
             os.makedirs(profile_path)
         
-        # Adicionar perfil à lista
+        # Adicionar perfil ao índice
         profile = {
             'name': name,
             'profile_id': profile_id,
             'color': color,
             'enabled': True
         }
-        self.profiles.append(profile)
+        with self._lock:
+            self.index[profile_id] = profile
+            self._pending[profile_id] = profile
         self.save_profiles()
+        self._notify('added', profile_id, profile)
         return True
     
     def remove_profile(self, profile_id):
         """Remove um perfil da lista (não remove a pasta)"""
-        self.profiles = [p for p in self.profiles if p['profile_id'] != profile_id]
+        with self._lock:
+            profile = self.index.pop(profile_id, None)
+            if profile is None:
+                return
+            self._pending[profile_id] = None
         self.save_profiles()
+        self._notify('removed', profile_id, profile)
     
     def update_profile(self, profile_id, name=None, color=None, enabled=None):
         """Atualiza informações de um perfil"""
-        for profile in self.profiles:
-            if profile['profile_id'] == profile_id:
-                if name is not None:
-                    profile['name'] = name
-                if color is not None:
-                    profile['color'] = color
-                if enabled is not None:
-                    profile['enabled'] = enabled
-                self.save_profiles()
-                return True
-        return False
+        profile = self.index.get(profile_id)
+        if profile is None:
+            return False
+
+        requested = {'name': name, 'color': color, 'enabled': enabled}
+        changes = {
+            field: value for field, value in requested.items()
+            if value is not None and profile.get(field) != value
+        }
+        # Sem mudanças reais, nada é gravado
+        if changes:
+            with self._lock:
+                profile.update(changes)
+                self._pending[profile_id] = profile
+            self.save_profiles()
+            self._notify('updated', profile_id, changes)
+        return True
+
+    def reload(self):
+        """Relê o arquivo (ex.: alterado por outro processo) e notifica só as diferenças"""
+        # Arquivo ausente ou ilegível não pode virar "todos os perfis removidos"
+        try:
+            with open(self.config_file, 'r', encoding='utf-8') as f:
+                new_index = self._build_index(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"Erro ao recarregar perfis: {e}")
+            return
+        with self._lock:
+            # Alterações locais ainda não gravadas são mais recentes que o arquivo:
+            # prevalecem sobre ele, e o resultado da junção é o que será gravado
+            for profile_id, profile in self._pending.items():
+                if profile is None:
+                    new_index.pop(profile_id, None)
+                else:
+                    new_index[profile_id] = profile
+            old_index = self.index
+            self.index = new_index
+
+        for profile_id, profile in old_index.items():
+            if profile_id not in new_index:
+                self._notify('removed', profile_id, profile)
+        for profile_id, profile in new_index.items():
+            old = old_index.get(profile_id)
+            if old is None:
+                self._notify('added', profile_id, profile)
+                continue
+            changes = {k: v for k, v in profile.items() if old.get(k) != v}
+            if changes:
+                self._notify('updated', profile_id, changes)
+
+        common_old = [p for p in old_index if p in new_index]
+        common_new = [p for p in new_index if p in old_index]
+        if common_old != common_new:
+            self._notify('reordered', None, list(new_index))
     
     def get_profile(self, profile_id):
         """Retorna um perfil específico"""
-        for profile in self.profiles:
-            if profile['profile_id'] == profile_id:
-                return profile
-        return None
+        return self.index.get(profile_id)
     
     def get_enabled_profiles(self):
         """Retorna apenas os perfis habilitados"""
-        return [p for p in self.profiles if p.get('enabled', True)]
+        return [p for p in self.index.values() if p.get('enabled', True)]
     
     def get_all_profiles(self):
         """Retorna todos os perfis"""
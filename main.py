@@ -5,73 +5,177 @@ Exibe múltiplas instâncias do WhatsApp Web com perfis separados
 """
 import sys
 import os
+import re
+import time
+import argparse
 import psutil  # Para detectar recursos do sistema
-from PyQt6.QtWidgets import (QApplication, QMainWindow, QGridLayout, 
+from PyQt6.QtWidgets import (QApplication, QMainWindow, 
                              QVBoxLayout, QWidget, QMessageBox,
                              QPushButton, QLabel, QHBoxLayout)
 from PyQt6.QtWebEngineWidgets import QWebEngineView
 from PyQt6.QtWebEngineCore import QWebEngineProfile, QWebEnginePage, QWebEngineSettings
-from PyQt6.QtCore import QUrl, Qt, QTimer
+from PyQt6.QtCore import QUrl, Qt, QTimer, QEvent, QFileSystemWatcher, pyqtSignal
+from PyQt6.QtGui import QShortcut, QKeySequence, QIcon, QPainter, QColor
 from login import ProfileManager
+from hibernation import HibernationManager
+from startup import StartupQueue
+from telemetry import TelemetrySampler
+from resources import ResourceController, detect_system_capabilities, config_overrides
+from scheduler import PeriodicScheduler
+from workspace import PagedGrid
+from bridge import StatusBridge, CONNECTION_STATES
+from shard import ShardLink, run_supervisor, shard_of, shard_profiles, parse_shard
+from warmup import WarmPool
+import storage
+import asset_cache
+import request_filter
+import ramcache
+import headless
+import notifications
+import priority
+import userscripts
+import tracing
+import watchdog
+from priority import PriorityManager
+import chromium_flags
+from request_filter import RequestChain, RequestFilter
 
-def detect_system_capabilities():
-    """Detecta as capacidades do sistema e retorna configurações otimizadas"""
-    try:
-        # Detectar RAM disponível
-        ram_gb = psutil.virtual_memory().total / (1024**3)
-        cpu_count = psutil.cpu_count()
-        
-        # Perfil BAIXO: < 4GB RAM ou <= 2 CPUs
-        if ram_gb < 4 or cpu_count <= 2:
-            return {
-                'profile': 'LOW',
-                'cache_size': 20,  # MB
-                'keep_alive_interval': 60000,  # 60 segundos
-                'max_heap': 256,  # MB
-                'raster_threads': 1
-            }
-        # Perfil MÉDIO: 4-8GB RAM ou 2-4 CPUs
-        elif ram_gb < 8 or cpu_count <= 4:
-            return {
-                'profile': 'MEDIUM',
-                'cache_size': 30,  # MB
-                'keep_alive_interval': 45000,  # 45 segundos
-                'max_heap': 512,  # MB
-                'raster_threads': 2
-            }
-        # Perfil ALTO: >= 8GB RAM e > 4 CPUs
-        else:
-            return {
-                'profile': 'HIGH',
-                'cache_size': 50,  # MB
-                'keep_alive_interval': 30000,  # 30 segundos
-                'max_heap': 1024,  # MB
-                'raster_threads': 4
-            }
-    except:
-        # Fallback para perfil médio se não conseguir detectar
-        return {
-            'profile': 'MEDIUM',
-            'cache_size': 30,
-            'keep_alive_interval': 45000,
-            'max_heap': 512,
-            'raster_threads': 2
-        }
+# Configurações otimizadas (preenchidas por init_system_config e ajustadas em
+# tempo real pelo ResourceController). A detecção não roda na importação para
+# que o módulo possa ser importado barato (ex.: pelo dashboard)
+CONFIG_OVERRIDES = {}
+SYSTEM_CONFIG = {}
+
+def init_system_config():
+    """Detecta o hardware uma única vez e preenche o SYSTEM_CONFIG compartilhado"""
+    if SYSTEM_CONFIG:
+        return SYSTEM_CONFIG
+    with tracing.span('detect_system', 'startup'):
+        CONFIG_OVERRIDES.update(config_overrides())
+        SYSTEM_CONFIG.update(detect_system_capabilities())
+        SYSTEM_CONFIG.update(CONFIG_OVERRIDES)
+    
+    print(f"[Sistema] Perfil detectado: {SYSTEM_CONFIG['profile']}")
+    print(f"[Sistema] RAM Total: {psutil.virtual_memory().total / (1024**3):.1f} GB")
+    print(f"[Sistema] CPUs: {psutil.cpu_count()}")
+    return SYSTEM_CONFIG
+
+# Endereço carregado em cada instância (configurável para testes e benchmarks)
+TARGET_URL = os.environ.get("MULTIZAP_URL", "https://web.whatsapp.com")
 
-# Detectar configurações otimizadas
-SYSTEM_CONFIG = detect_system_capabilities()
-print(f"[Sistema] Perfil detectado: {SYSTEM_CONFIG['profile']}")
-print(f"[Sistema] RAM Total: {psutil.virtual_memory().total / (1024**3):.1f} GB")
-print(f"[Sistema] CPUs: {psutil.cpu_count()}")
+# Recuperação de falhas do renderizador (milissegundos)
+CRASH_BACKOFF_BASE = 2000
+CRASH_BACKOFF_MAX = 120000
+CRASH_MAX_RETRIES = 6
+CRASH_STABLE_PERIOD = 300000  # 5 minutos sem falhas zera o contador
+
+# Grade paginada: colunas fixas e linhas por página (as demais contas viram miniaturas)
+GRID_COLUMNS = 2
+PAGE_ROWS = int(os.environ.get("MULTIZAP_PAGE_ROWS", "2"))
+
+# Perfis desabilitados mantidos pré-criados para aparecerem na hora ao serem habilitados
+HOT_POOL_SIZE = int(os.environ.get("MULTIZAP_HOT_POOL", "2"))
+HOT_POOL_DELAY = 30000  # ms após a abertura (não disputa com a fila de inicialização)
+CONFIG_RELOAD_DELAY = 300  # ms para agrupar gravações seguidas do profiles_config.json
+
+# Título do WhatsApp Web com mensagens não lidas: "(3) WhatsApp"
+UNREAD_TITLE = re.compile(r"^\((\d+)\)")
+
+def create_profile(profile_name, parent=None):
+    """Cria e configura o QWebEngineProfile persistente de um perfil"""
+    with tracing.span('create_profile', 'profile', profile=profile_name):
+        init_system_config()
+        storage_path = os.path.join(os.getcwd(), "profiles", profile_name)
+    
+        # Criar perfil único para cada instância (evita conflitos e tela preta)
+        profile = QWebEngineProfile(profile_name, parent)
+        profile.setPersistentStoragePath(storage_path)
+        profile.setPersistentCookiesPolicy(QWebEngineProfile.PersistentCookiesPolicy.ForcePersistentCookies)
+    
+        # Cache HTTP dentro da pasta do perfil (medido e limpo pelo storage.py);
+        # o do local padrão do Qt, usado por versões anteriores, é apagado
+        legacy_cache = profile.cachePath()
+        profile.setCachePath(os.path.join(storage_path, "Cache"))
+        storage.remove_legacy_cache(legacy_cache, profile.cachePath())
+    
+        # Modo RAM (MULTIZAP_RAM_CACHE): cache e, no modo full, o armazenamento no tmpfs
+        ram_cache = ramcache.ram_cache(SYSTEM_CONFIG)
+        if ram_cache is not None:
+            ram_cache.apply(profile, profile_name, storage_path)
+    
+        # Limitar tamanho do cache baseado no perfil do sistema
+        cache_size = SYSTEM_CONFIG['cache_size'] * 1024 * 1024
+        profile.setHttpCacheMaximumSize(cache_size)
+    
+        # Política de cache HTTP agressiva para economizar banda e processamento
+        profile.setHttpCacheType(QWebEngineProfile.HttpCacheType.DiskHttpCache)
+    
+        user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+        profile.setHttpUserAgent(user_agent)
+    
+        # Cadeia de interceptação: filtro de requisições e depois o cache compartilhado
+        chain = RequestChain(profile)
+        if request_filter.ENABLED:
+            chain.add(RequestFilter(request_filter.load_rules()))
+        shared_cache = asset_cache.shared_cache()
+        if shared_cache is not None:
+            shared_cache.install(profile, chain)
+        if chain.stages:
+            profile.setUrlRequestInterceptor(chain)
+        return profile
 
 class WhatsAppInstance(QWidget):
-    def __init__(self, profile_name, label_title, color_code):
+    # Emitido quando o usuário clica numa instância que ainda aguarda na fila
+    start_requested = pyqtSignal(object)
+    # Emitido quando o contador de mensagens não lidas muda
+    unread_changed = pyqtSignal(object)
+    # Emitido quando a página começa/para de tocar áudio (chamadas, vídeos)
+    media_changed = pyqtSignal(object)
+
+    def __init__(self, profile_name, label_title, color_code, profile=None):
         super().__init__()
         
         # Armazena o título para usar na mensagem de permissão
         self.instance_title = label_title
         self.profile_name = profile_name
         
+        # Trilha da instância no trace (--trace)
+        self.trace_track = tracing.track(label_title)
+        
+        # Momento da última interação (usado pela hibernação LRU)
+        self.last_interaction = time.monotonic()
+        
+        # Momento da última pintura da página (páginas pintando não precisam de keep-alive)
+        self.last_paint = 0.0
+        self._paint_proxy = None
+        
+        # Última captura da tela (miniaturas e aviso de hibernação) e não lidas
+        self.snapshot = None
+        self.unread = 0
+        
+        # Estado enviado pela própria página (não lidas e conexão) via QWebChannel
+        self.connection = 'loading'
+        self.bridge = StatusBridge(self)
+        self.bridge.status_changed.connect(self.on_bridge_status)
+        
+        # A página só começa a carregar quando a fila de inicialização liberar
+        self.started = False
+        
+        # Prioridade do renderizador: último acesso a microfone/câmera e nível aplicado
+        self.media_granted_at = None
+        self.priority_level = 'normal'
+        
+        # Recuperação automática de falhas do renderizador
+        self.crash_count = 0
+        self.recovery_timer = QTimer(self)
+        self.recovery_timer.setSingleShot(True)
+        self.recovery_timer.timeout.connect(self.recover_page)
+        
+        # Depois de alguns minutos estável, o contador de falhas é zerado
+        self.stable_timer = QTimer(self)
+        self.stable_timer.setSingleShot(True)
+        self.stable_timer.timeout.connect(self.reset_crash_count)
+        
         # Layout da instância individual
         self.layout = QVBoxLayout()
         self.layout.setContentsMargins(0, 0, 0, 0)
@@ -90,8 +194,30 @@ class WhatsAppInstance(QWidget):
         self.btn_reload.setStyleSheet("background-color: #333; color: white; border: none; font-size: 14px;")
         self.btn_reload.clicked.connect(self.reload_page)
         
+        # Indicador de estado (fila, hibernação, falhas)
+        self.status_label = QLabel("")
+        self.status_label.setStyleSheet("color: white; font-size: 11px;")
+        
+        # Mini painel de telemetria (RSS/CPU do renderizador)
+        self.telemetry_label = QLabel("")
+        self.telemetry_label.setStyleSheet("color: #ddd; font-size: 10px;")
+        
+        # Contador de mensagens não lidas
+        self.badge_label = QLabel("")
+        self.badge_label.setStyleSheet("background-color: #d32f2f; color: white; font-size: 10px;"
+                                       " font-weight: bold; border-radius: 7px; padding: 0 5px;")
+        self.badge_label.hide()
+        
+        # Estado da conexão (QR Code, celular desconectado, sem internet)
+        self.connection_label = QLabel("")
+        self.connection_label.setStyleSheet("color: white; font-size: 11px;")
+        
         self.control_bar.addWidget(self.label)
+        self.control_bar.addWidget(self.badge_label)
         self.control_bar.addStretch()
+        self.control_bar.addWidget(self.telemetry_label)
+        self.control_bar.addWidget(self.connection_label)
+        self.control_bar.addWidget(self.status_label)
         self.control_bar.addWidget(self.btn_reload)
         
         # Container da barra superior compacta
@@ -101,38 +227,82 @@ class WhatsAppInstance(QWidget):
         self.bar_widget.setStyleSheet(f"background-color: {color_code};")
         self.layout.addWidget(self.bar_widget)
 
-        # Navegador (WebEngine)
+        # Cor da conta (barra e script de cor da página)
+        self.header_color = color_code
+
+        # Navegador (WebEngine) - tempo de criação do perfil fica registrado
         self.browser = QWebEngineView()
-        self.setup_browser(profile_name)
+        setup_started = time.perf_counter()
+        with tracing.span('setup_browser', 'instance', self.trace_track, warm=profile is not None):
+            self.setup_browser(profile_name, profile)
+        self.setup_duration = time.perf_counter() - setup_started
         self.layout.addWidget(self.browser)
 
-        # Cor para injeção CSS posterior
-        self.header_color = color_code
+        # Aviso exibido no lugar da página (fila, hibernação ou recuperação)
+        self.placeholder = QPushButton()
+        self.placeholder.setFlat(True)
+        self.placeholder.setStyleSheet("color: #aaa; font-size: 13px; border: none;")
+        self.placeholder.setSizePolicy(self.browser.sizePolicy())
+        self.placeholder.clicked.connect(self.wake)
+        self.layout.addWidget(self.placeholder)
+        
+        # Até ser liberada pela fila, a instância exibe apenas o aviso de espera
+        self.browser.hide()
+        self.set_placeholder("⏳ Aguardando inicialização...\nClique para priorizar")
+        self.status_label.setText("⏳")
 
-    def setup_browser(self, profile_name):
-        storage_path = os.path.join(os.getcwd(), "profiles", profile_name)
+    def setup_browser(self, profile_name, profile=None):
+        # Perfis pré-criados (partida a quente) passam a pertencer à view
+        if profile is not None:
+            profile.setParent(self.browser)
+            self.profile = profile
+        else:
+            self.profile = create_profile(profile_name, self.browser)
         
-        # Criar perfil único para cada instância (evita conflitos e tela preta)
-        self.profile = QWebEngineProfile(profile_name, self.browser)
-        self.profile.setPersistentStoragePath(storage_path)
-        self.profile.setPersistentCookiesPolicy(QWebEngineProfile.PersistentCookiesPolicy.ForcePersistentCookies)
+        # Contadores de requisições bloqueadas deste perfil (None se o filtro estiver desligado)
+        chain = self.profile.findChild(RequestChain)
+        self.request_filter = chain.stage(RequestFilter) if chain is not None else None
         
-        # Limitar tamanho do cache baseado no perfil do sistema
-        cache_size = SYSTEM_CONFIG['cache_size'] * 1024 * 1024
-        self.profile.setHttpCacheMaximumSize(cache_size)
+        # Notificações da página vão para a central (agrupadas e com limite)
+        center = notifications.notification_center()
+        if center is not None:
+            center.install(self.profile, self)
         
-        # Política de cache HTTP agressiva para economizar banda e processamento
-        self.profile.setHttpCacheType(QWebEngineProfile.HttpCacheType.DiskHttpCache)
+        # Cor e otimizações entram na criação de cada documento do perfil
+        with tracing.span('install_scripts', 'scripts', self.trace_track):
+            self.user_scripts = userscripts.script_library().install(self.profile, profile_name, self.header_color)
         
-        user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        self.profile.setHttpUserAgent(user_agent)
+        self.create_page()
         
+        # Carregamento concluído: acompanha a estabilidade após falhas
+        self.browser.loadFinished.connect(self.on_load_finished)
+    
+    def create_page(self):
+        """Cria a página do perfil (também usada para recriá-la após uma falha)"""
         # Criar página e manter referência forte para evitar garbage collection
         self.page = QWebEnginePage(self.profile, self.browser)
         
         # Conectar o pedido de permissão (microfone/câmera)
         self.page.featurePermissionRequested.connect(self.grant_permission)
         
+        # Detectar morte do processo de renderização
+        self.page.renderProcessTerminated.connect(self.on_render_process_terminated)
+        
+        # Carregamento na linha do tempo (só com --trace)
+        if tracing.enabled():
+            self.page.loadStarted.connect(
+                lambda: tracing.begin((self, 'load'), 'load', 'page', self.trace_track))
+            self.page.loadProgress.connect(
+                lambda progress: tracing.counter(f"{self.instance_title} carregamento", progress=progress))
+            self.page.loadFinished.connect(lambda ok: tracing.end((self, 'load'), ok=ok))
+        
+        # Áudio tocando (chamada em andamento) aumenta a prioridade do renderizador
+        self.page.recentlyAudibleChanged.connect(lambda audible: self.media_changed.emit(self))
+        
+        # Não lidas e conexão chegam pela ponte; o título fica como reserva
+        self.bridge.attach(self.page)
+        self.page.titleChanged.connect(self.on_title_changed)
+        
         # Otimizações de performance agressivas
         settings = self.page.settings()
         
@@ -155,22 +325,86 @@ class WhatsAppInstance(QWidget):
         settings.setAttribute(QWebEngineSettings.WebAttribute.JavascriptEnabled, True)
         
         self.browser.setPage(self.page)
+    
+    def start(self):
+        """Inicia o carregamento do WhatsApp Web (chamado pela fila de inicialização)"""
+        if self.started:
+            return
+        self.started = True
+        tracing.instant('start', 'instance', self.trace_track)
+        self.placeholder.hide()
+        self.status_label.setText("")
+        self.browser.show()
+        self.browser.setUrl(QUrl(TARGET_URL))
+    
+    @watchdog.marked
+    def on_render_process_terminated(self, status, exit_code):
+        """Classifica a falha do renderizador e agenda a recriação da página"""
+        TerminationStatus = QWebEnginePage.RenderProcessTerminationStatus
         
-        # Conectar o sinal de carregamento concluído para injetar CSS (apenas uma vez)
-        self.browser.loadFinished.connect(self.on_load_finished)
+        # Descartes feitos pela hibernação não são falhas
+        if self.lifecycle_state() == QWebEnginePage.LifecycleState.Discarded:
+            return
+        
+        reasons = {
+            TerminationStatus.NormalTerminationStatus: "encerrado normalmente",
+            TerminationStatus.AbnormalTerminationStatus: "encerrado com erro",
+            TerminationStatus.CrashedTerminationStatus: "travou (crash)",
+            TerminationStatus.KilledTerminationStatus: "finalizado pelo sistema (falta de memória?)",
+        }
+        reason = reasons.get(status, "motivo desconhecido")
+        
+        self.crash_count += 1
+        tracing.instant('render_terminated', 'recovery', self.trace_track,
+                        reason=reason, exit_code=exit_code, crashes=self.crash_count)
+        self.stable_timer.stop()
+        print(f"[Recuperação] {self.instance_title}: renderizador {reason} "
+              f"(código {exit_code}, falha nº {self.crash_count})")
         
-        # Timer para manter a view ativa (intervalo baseado no perfil do sistema)
-        self.keep_alive_timer = QTimer(self)
-        self.keep_alive_timer.timeout.connect(self.keep_view_alive)
-        self.keep_alive_timer.start(SYSTEM_CONFIG['keep_alive_interval'])
+        if self.crash_count > CRASH_MAX_RETRIES:
+            self.browser.hide()
+            self.set_placeholder(f"⚠ Renderizador {reason}\n"
+                                 f"{self.crash_count} falhas seguidas — clique para tentar novamente")
+            self.placeholder.show()
+            self.status_label.setText("⚠")
+            return
         
-        self.browser.setUrl(QUrl("https://web.whatsapp.com"))
+        # Backoff exponencial: 2s, 4s, 8s... até o limite
+        delay = min(CRASH_BACKOFF_BASE * 2 ** (self.crash_count - 1), CRASH_BACKOFF_MAX)
+        self.browser.hide()
+        self.set_placeholder(f"⚠ Renderizador {reason}\n"
+                             f"Recuperando em {delay // 1000}s — clique para recuperar agora")
+        self.placeholder.show()
+        self.status_label.setText(f"⚠{self.crash_count}")
+        self.recovery_timer.start(delay)
+    
+    @watchdog.marked
+    def recover_page(self):
+        """Recria a página da instância sem afetar as demais"""
+        self.recovery_timer.stop()
+        tracing.instant('recover_page', 'recovery', self.trace_track)
+        old_page = self.page
+        self.create_page()
+        old_page.deleteLater()
+        
+        self.placeholder.hide()
+        self.status_label.setText(f"⚠{self.crash_count}" if self.crash_count else "")
+        self.browser.show()
+        self.browser.setUrl(QUrl(TARGET_URL))
+    
+    def reset_crash_count(self):
+        self.crash_count = 0
+        if self.lifecycle_state() == QWebEnginePage.LifecycleState.Active:
+            self.status_label.setText("")
     
+    @watchdog.marked
     def grant_permission(self, url, feature):
         """
         Intercepta pedidos de uso de Hardware (Microfone/Câmera) e concede automaticamente
         para o domínio do WhatsApp, ou pede autorização ao usuário para outros domínios.
         """
+        tracing.instant('permission', 'permission', self.trace_track, host=url.host(), feature=feature.name)
+        
         # Permissões de mídia (microfone/câmera)
         media_features = (
             QWebEnginePage.Feature.MediaAudioCapture, 
@@ -182,6 +416,11 @@ class WhatsAppInstance(QWidget):
         if "whatsapp.com" in url.host():
             if feature in media_features:
                 print(f"[DEBUG] Auto-concedendo permissão de mídia para {url.host()}")
+                self.set_media_granted()
+                self.page.setFeaturePermission(url, feature, QWebEnginePage.PermissionPolicy.PermissionGrantedByUser)
+                return
+            # Notificações passam pela central (agrupadas e com limite)
+            if feature == QWebEnginePage.Feature.Notifications and notifications.ENABLED:
                 self.page.setFeaturePermission(url, feature, QWebEnginePage.PermissionPolicy.PermissionGrantedByUser)
                 return
         
@@ -193,16 +432,18 @@ class WhatsAppInstance(QWidget):
             elif feature == QWebEnginePage.Feature.MediaAudioVideoCapture:
                 feature_name = "a Câmera e o Microfone"
 
-            # Pop-up de confirmação
-            resposta = QMessageBox.question(
-                self,
-                "Solicitação de Acesso",
-                f"A instância '{self.instance_title}' deseja acessar {feature_name}.\n\nVocê autoriza?",
-                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
-                QMessageBox.StandardButton.No
-            )
+            # Pop-up de confirmação (o tempo esperando o usuário fica no trace)
+            with tracing.span('permission_prompt', 'permission', self.trace_track, feature=feature.name):
+                resposta = QMessageBox.question(
+                    self,
+                    "Solicitação de Acesso",
+                    f"A instância '{self.instance_title}' deseja acessar {feature_name}.\n\nVocê autoriza?",
+                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                    QMessageBox.StandardButton.No
+                )
 
             if resposta == QMessageBox.StandardButton.Yes:
+                self.set_media_granted()
                 self.page.setFeaturePermission(url, feature, QWebEnginePage.PermissionPolicy.PermissionGrantedByUser)
             else:
                 self.page.setFeaturePermission(url, feature, QWebEnginePage.PermissionPolicy.PermissionDeniedByUser)
@@ -210,73 +451,311 @@ class WhatsAppInstance(QWidget):
             # Para outras permissões não tratadas, negar por padrão
             self.page.setFeaturePermission(url, feature, QWebEnginePage.PermissionPolicy.PermissionDeniedByUser)
 
+    def set_media_granted(self):
+        """Microfone/câmera liberados: provável chamada, o renderizador ganha prioridade"""
+        self.media_granted_at = time.monotonic()
+        self.media_changed.emit(self)
+    
     def reload_page(self):
+        # Na fila ou aguardando recuperação, wake() já carrega a página
+        if not self.started or self.recovery_pending():
+            self.wake()
+            return
+        self.wake()
         self.browser.reload()
     
+    def recovery_pending(self):
+        return self.recovery_timer.isActive() or self.crash_count > CRASH_MAX_RETRIES
+    
+    def show_telemetry(self, sample):
+        """Atualiza o mini painel com a amostra mais recente"""
+        self.telemetry_label.setText(
+            f"{sample['rss'] / (1024**2):.0f} MB · {sample['cpu_percent']:.0f}% CPU"
+        )
+        self.telemetry_label.setToolTip(
+            f"PID {sample['pid']} | {sample['threads']} threads\n"
+            f"Lido: {sample['read_bytes'] / (1024**2):.1f} MB | "
+            f"Escrito: {sample['write_bytes'] / (1024**2):.1f} MB\n"
+            f"Bloqueadas: {sample['blocked_requests']} requisições "
+            f"(~{sample['bytes_saved'] / 1024:.0f} KB economizados)"
+        )
+    
+    @watchdog.marked
+    def on_title_changed(self, title):
+        match = UNREAD_TITLE.match(title)
+        self.set_unread(int(match.group(1)) if match else 0)
+    
+    def on_bridge_status(self, status):
+        """Atualização enviada pela página (somente quando algo muda)"""
+        self.set_unread(status['unread'])
+        if status['connection'] != self.connection:
+            self.connection = status['connection']
+            icon, description = CONNECTION_STATES[self.connection]
+            self.connection_label.setText(icon)
+            self.connection_label.setToolTip(description)
+            print(f"[Ponte] {self.instance_title}: {description}")
+    
+    def set_unread(self, unread):
+        if unread == self.unread:
+            return
+        self.unread = unread
+        self.badge_label.setText(str(unread))
+        self.badge_label.setVisible(unread > 0)
+        self.unread_changed.emit(self)
+    
+    def capture_snapshot(self):
+        """Guarda a imagem atual da página (apenas se estiver sendo exibida)"""
+        if (self.started and self.browser.isVisible()
+                and self.lifecycle_state() == QWebEnginePage.LifecycleState.Active):
+            snapshot = self.browser.grab()
+            if not snapshot.isNull():
+                self.snapshot = snapshot
+    
+    def set_placeholder(self, text, with_snapshot=False):
+        """Define o aviso; com with_snapshot, o texto vai sobre a última captura escurecida"""
+        if with_snapshot and self.snapshot is not None:
+            pixmap = self.snapshot.copy()
+            size = pixmap.deviceIndependentSize()
+            painter = QPainter(pixmap)
+            rect = pixmap.rect().toRectF()
+            rect.setSize(size)
+            painter.fillRect(rect, QColor(0, 0, 0, 150))
+            painter.setPen(QColor("white"))
+            painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, text)
+            painter.end()
+            self.placeholder.setText("")
+            self.placeholder.setIcon(QIcon(pixmap))
+            self.placeholder.setIconSize(size.toSize())
+        else:
+            self.placeholder.setIcon(QIcon())
+            self.placeholder.setText(text)
+    
+    def touch(self):
+        """Registra interação do usuário com a instância"""
+        self.last_interaction = time.monotonic()
+    
+    def lifecycle_state(self):
+        return self.page.lifecycleState()
+    
+    def hibernate(self, state):
+        """Congela ou descarta a página; ela precisa estar oculta para isso"""
+        if self.lifecycle_state() == state:
+            return
+        # A última imagem da página fica no lugar dela enquanto estiver suspensa
+        self.capture_snapshot()
+        self.browser.hide()
+        if state == QWebEnginePage.LifecycleState.Discarded:
+            self.set_placeholder("💤 Descartada para liberar memória\nClique para restaurar", True)
+        else:
+            self.set_placeholder("💤 Hibernada\nClique para restaurar", True)
+        self.placeholder.show()
+        self.status_label.setText("💤")
+        self.page.setLifecycleState(state)
+        print(f"[Hibernação] {self.instance_title}: {state.name}")
+    
+    @watchdog.marked
+    def wake(self):
+        """Restaura a página hibernada (páginas descartadas são recarregadas)"""
+        self.touch()
+        if not self.started:
+            self.start_requested.emit(self)
+            return
+        if self.recovery_pending():
+            self.crash_count = min(self.crash_count, CRASH_MAX_RETRIES)
+            self.recover_page()
+            return
+        if self.lifecycle_state() != QWebEnginePage.LifecycleState.Active:
+            self.page.setLifecycleState(QWebEnginePage.LifecycleState.Active)
+        self.placeholder.hide()
+        self.status_label.setText("")
+        self.browser.show()
+    
+    def track_paints(self):
+        """Observa as pinturas do widget interno de renderização da view"""
+        proxy = self.browser.focusProxy()
+        if proxy is not None and proxy is not self._paint_proxy:
+            proxy.installEventFilter(self)
+            self._paint_proxy = proxy
+    
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Paint:
+            self.last_paint = time.monotonic()
+        return False
+    
+    def needs_keep_alive(self, window):
+        """Só páginas ocultas e sem pintura recente precisam do keep-alive"""
+        self.track_paints()
+        if self.page.isVisible():
+            return False
+        return time.monotonic() - self.last_paint >= window
+    
+    @watchdog.marked
     def keep_view_alive(self):
         """Mantém a view ativa executando um pequeno script JavaScript periodicamente"""
+        # Páginas na fila ou hibernadas devem permanecer suspensas
+        if not self.started or self.lifecycle_state() != QWebEnginePage.LifecycleState.Active:
+            return
         if self.browser and self.browser.page():
             # Executa um script simples para manter o contexto de renderização ativo
+            tracing.instant('keep_alive', 'keep_alive', self.trace_track)
             self.browser.page().runJavaScript("void(0);")
 
-    def on_load_finished(self):
-        # Injeta CSS apenas se ainda não foi injetado (evita re-injeções desnecessárias)
-        if not hasattr(self, '_css_injected'):
-            # Injeta CSS + otimizações de performance do WhatsApp Web
-            js_code = f"""
-                (function() {{
-                    // CSS personalizado
-                    const style = document.createElement('style');
-                    style.textContent = `
-                        header {{ background-color: {self.header_color} !important; }}
-                        #side {{ border-right: 5px solid {self.header_color} !important; }}
-                        
-                        /* Otimizações de performance */
-                        * {{ 
-                            -webkit-font-smoothing: antialiased;
-                            text-rendering: optimizeSpeed;
-                        }}
-                        img {{ 
-                            image-rendering: -webkit-optimize-contrast;
-                        }}
-                    `;
-                    document.head.appendChild(style);
-                    
-                    // Liberar memória do garbage collector após 5 segundos
-                    setTimeout(() => {{
-                        if (window.gc) window.gc();
-                    }}, 5000);
-                }})();
-            """
-            self.browser.page().runJavaScript(js_code)
-            self._css_injected = True
+    def set_title(self, title):
+        """Renomeia a instância (perfil editado com o app aberto)"""
+        self.instance_title = title
+        self.label.setText(title)
+    
+    def set_color(self, color_code):
+        """Troca a cor da barra e do cabeçalho da página sem recarregar"""
+        self.header_color = color_code
+        self.bar_widget.setStyleSheet(f"background-color: {color_code};")
+        with tracing.span('install_scripts', 'scripts', self.trace_track, reason='color'):
+            self.user_scripts = userscripts.script_library().install(self.profile, self.profile_name, color_code)
+        # Os scripts valem para os próximos documentos; o atual recebe a cor agora
+        if self.started:
+            userscripts.apply_now(self.page, self.user_scripts, 'coloring')
+    
+    def shutdown(self):
+        """Para os timers e libera a página antes do perfil (que pode ser reaproveitado)"""
+        self.recovery_timer.stop()
+        self.stable_timer.stop()
+        self.browser.loadFinished.disconnect(self.on_load_finished)
+        self.page.deleteLater()
+    
+    @watchdog.marked
+    def on_load_finished(self, ok=True):
+        # Página carregada: se continuar estável, o contador de falhas é zerado
+        if ok and self.crash_count:
+            self.stable_timer.start(CRASH_STABLE_PERIOD)
+
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, shard=None, ipc_name=None, profile_manager=None, profile_pool=None):
         super().__init__()
-        self.setWindowTitle("Multi-Zap | LKA")
+        init_system_config()
+        
+        # shard = (índice, total) quando este processo é um trabalhador do supervisor
+        self.shard = shard
+        if shard:
+            self.base_title = f"Multi-Zap | LKA (shard {shard[0] + 1}/{shard[1]})"
+        else:
+            self.base_title = "Multi-Zap | LKA"
+        self.setWindowTitle(self.base_title)
         self.resize(1400, 900)
         self.setStyleSheet("background-color: #111b21;")
         
-        # Carregar gerenciador de perfis
-        self.profile_manager = ProfileManager()
+        # Carregar gerenciador de perfis (o dashboard compartilha o seu na partida a quente)
+        self.profile_manager = profile_manager or ProfileManager()
+        
+        # Perfis já criados em segundo plano pelo dashboard
+        self.profile_pool = profile_pool
+        
+        # Controlador do modo --headless (a janela não é exibida)
+        self.headless = None
+        
+        # Perfis desabilitados pré-criados (contas habilitadas com o app aberto)
+        self.hot_pool = WarmPool(create_profile, self, boot=False)
+        
+        # Instâncias ativas e hibernação por orçamento de memória
+        self.instances = []
+        self.hibernation = HibernationManager(
+            SYSTEM_CONFIG['memory_budget'],
+            idle_seconds=SYSTEM_CONFIG['hibernate_idle'],
+            parent=self
+        )
+        
+        # Fila que limita quantas páginas carregam ao mesmo tempo
+        self.startup_queue = StartupQueue(SYSTEM_CONFIG['startup_concurrency'], parent=self)
+        
+        # Telemetria por instância (Ctrl+Shift+T exporta CSV/JSON)
+        self.telemetry = TelemetrySampler(parent=self)
+        export_shortcut = QShortcut(QKeySequence("Ctrl+Shift+T"), self)
+        export_shortcut.activated.connect(self.export_telemetry)
+        
+        # Avisos clicados trazem a instância para frente; Ctrl+Shift+N liga o não perturbe
+        self.notification_center = notifications.notification_center()
+        if self.notification_center is not None:
+            self.notification_center.activated.connect(
+                lambda instance: self.focus_instance(instance.profile_name)
+            )
+            dnd_shortcut = QShortcut(QKeySequence("Ctrl+Shift+N"), self)
+            dnd_shortcut.activated.connect(self.notification_center.toggle_dnd)
+        
+        # Ajuste contínuo do perfil conforme a pressão de memória do sistema
+        self.resource_controller = ResourceController(SYSTEM_CONFIG, CONFIG_OVERRIDES, parent=self)
+        self.resource_controller.tier_changed.connect(self.apply_resource_tier)
+        
+        # Prioridade/afinidade dos renderizadores conforme foco, visibilidade e chamadas
+        self.priority = PriorityManager(self) if priority.ENABLED else None
+        
+        # Atraso do laço de eventos e pilhas quando a interface trava
+        self.loop_watchdog = watchdog.LoopWatchdog(parent=self) if watchdog.ENABLED else None
+        
+        # Um único timer para todo o trabalho periódico das instâncias
+        self.scheduler = PeriodicScheduler(parent=self)
+        self.scheduler.add_task('keep_alive', SYSTEM_CONFIG['keep_alive_interval'], self.keep_alive_tick)
+        self.scheduler.add_task('telemetry', SYSTEM_CONFIG['telemetry_interval'], self.telemetry.sample_all)
+        self.scheduler.add_task('hibernation', 15000, self.hibernation.check_budget)
+        self.scheduler.add_task('resources', 10000, self.resource_controller.evaluate)
+        if self.priority is not None:
+            self.scheduler.add_task('priority', 5000, self.priority.update)
+        ram_cache = ramcache.ram_cache()
+        if ram_cache is not None:
+            self.scheduler.add_task('ram_writeback', ramcache.WRITEBACK_INTERVAL, ram_cache.write_back)
         
         # Widget Central
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
         
-        # Layout em Grade (Grid)
-        self.grid = QGridLayout()
-        self.grid.setSpacing(10)
-        self.grid.setContentsMargins(10, 10, 10, 10)
-        central_widget.setLayout(self.grid)
+        # Grade paginada: só a página atual fica visível
+        self.workspace = PagedGrid(GRID_COLUMNS, PAGE_ROWS)
+        central_layout = QVBoxLayout(central_widget)
+        central_layout.setContentsMargins(0, 0, 0, 0)
+        central_layout.addWidget(self.workspace)
+        if self.priority is not None:
+            self.workspace.page_changed.connect(lambda page: self.priority.update())
+        
+        # Canal de comandos com o supervisor (modo fragmentado)
+        self.shard_link = None
         
         # Carregar perfis habilitados
         self.load_enabled_profiles()
+        
+        if shard and ipc_name:
+            self.shard_link = ShardLink(
+                ipc_name, shard[0],
+                [instance.profile_name for instance in self.instances],
+                parent=self
+            )
+            self.shard_link.reload_requested.connect(self.reload_instance)
+            self.shard_link.focus_requested.connect(self.focus_instance)
+            self.scheduler.add_task('shard_status', 10000, self.send_shard_status)
+        
+        # Só começa a carregar as páginas depois que a janela for exibida
+        QTimer.singleShot(0, self.startup_queue.start)
+        
+        # Alterações nos perfis (dashboard neste ou em outro processo) aplicadas sem reiniciar
+        self.profile_manager.subscribe(self.on_profiles_changed)
+        self.config_path = os.path.abspath(self.profile_manager.config_file)
+        self.config_watcher = QFileSystemWatcher(self)
+        self.config_watcher.fileChanged.connect(self.on_config_file_changed)
+        self.config_watcher.directoryChanged.connect(self.on_config_file_changed)
+        self.reload_timer = QTimer(self)
+        self.reload_timer.setSingleShot(True)
+        self.reload_timer.setInterval(CONFIG_RELOAD_DELAY)
+        self.reload_timer.timeout.connect(self.profile_manager.reload)
+        self.watch_config()
+        QTimer.singleShot(HOT_POOL_DELAY, self.refill_hot_pool)
 
     def load_enabled_profiles(self):
         """Carrega apenas os perfis habilitados do gerenciador"""
         profiles = self.profile_manager.get_enabled_profiles()
+        if self.shard:
+            profiles = shard_profiles(profiles, *self.shard)
+            if not profiles:
+                # Continua aberto: perfis habilitados depois podem pertencer a este shard
+                print(f"[Shard] Nenhum perfil para o shard {self.shard[0]} (aguardando)")
+                return
         
         if not profiles:
             QMessageBox.warning(
@@ -286,103 +765,352 @@ class MainWindow(QMainWindow):
             )
             sys.exit(0)
         
-        # Distribuir perfis em grid (máximo 2 colunas)
-        max_cols = 2
-        for idx, profile in enumerate(profiles):
-            row = idx // max_cols
-            col = idx % max_cols
+        # Distribuir perfis na grade paginada (GRID_COLUMNS colunas)
+        for profile in profiles:
             self.add_instance(
                 profile['name'],
                 profile['profile_id'],
-                profile['color'],
-                row,
-                col
+                profile['color']
             )
     
-    def add_instance(self, title, profile_id, color, row, col):
-        """Adiciona uma instância do WhatsApp ao grid"""
+    def add_instance(self, title, profile_id, color):
+        """Adiciona uma instância do WhatsApp à grade"""
         try:
-            instance = WhatsAppInstance(profile_id, title, color)
-            self.grid.addWidget(instance, row, col)
+            profile = self.profile_pool.take(profile_id) if self.profile_pool else None
+            if profile is None:
+                profile = self.hot_pool.take(profile_id)
+            instance = WhatsAppInstance(profile_id, title, color, profile)
+            self.workspace.add_instance(instance)
+            self.instances.append(instance)
+            # Impede que o storage.py apague caches de um perfil aberto
+            storage.mark_running(profile_id)
+            self.hibernation.register(instance)
+            self.telemetry.register(instance)
+            if self.priority is not None:
+                self.priority.register(instance)
+                instance.media_changed.connect(lambda *args: self.priority.update())
+            instance.start_requested.connect(self.startup_queue.promote)
+            instance.unread_changed.connect(self.update_unread_total)
+            if self.headless is not None:
+                self.headless.register(instance)
+            self.startup_queue.enqueue(instance, self.workspace.position(instance))
+            self.update_shard_profiles()
         except Exception as e:
             QMessageBox.critical(self, "Erro", f"Erro ao criar instância: {str(e)}")
+    
+    def remove_instance(self, instance):
+        """Encerra uma instância sem afetar as demais (o perfil pode voltar ao pool)"""
+        self.startup_queue.remove(instance)
+        self.hibernation.unregister(instance)
+        self.telemetry.unregister(instance)
+        if self.priority is not None:
+            self.priority.unregister(instance)
+        if self.notification_center is not None:
+            self.notification_center.forget(instance)
+        self.workspace.remove_instance(instance)
+        self.instances.remove(instance)
+        if self.headless is not None:
+            self.headless.unregister(instance)
+        instance.shutdown()
+        
+        # Perfil ainda existe (só foi desabilitado): fica pronto para voltar na hora
+        profile_id = instance.profile_name
+        if (not self.shard and self.profile_manager.get_profile(profile_id) is not None
+                and len(self.hot_pool.profiles) < HOT_POOL_SIZE):
+            self.hot_pool.adopt(profile_id, instance.profile)
+            # Sem página: storage.py e snapshot.py podem tratá-lo como fechado
+            storage.mark_running(profile_id, warm=True)
+        else:
+            storage.clear_running(profile_id)
+        instance.hide()
+        instance.deleteLater()
+        self.update_unread_total()
+        self.update_shard_profiles()
+        print(f"[Perfis] {instance.instance_title} encerrada")
+    
+    def owns_profile(self, profile_id):
+        """No modo fragmentado, cada perfil pertence a um único shard"""
+        if not self.shard:
+            return True
+        return shard_of(profile_id, self.shard[1]) == self.shard[0]
+    
+    def on_profiles_changed(self, event, profile_id, data):
+        """Aplica só a diferença: cria, encerra, renomeia, recolore ou reordena"""
+        if event == 'reordered':
+            self.apply_profile_order()
+            return
+        profile = self.profile_manager.get_profile(profile_id)
+        instance = self.find_instance(profile_id)
+        
+        if profile is None or not profile.get('enabled', True):
+            if instance is not None:
+                self.remove_instance(instance)
+            if profile is None:
+                self.hot_pool.discard(profile_id)
+            QTimer.singleShot(0, self.refill_hot_pool)
+            return
+        
+        if instance is None:
+            if self.owns_profile(profile_id):
+                self.add_instance(profile['name'], profile_id, profile['color'])
+                self.apply_profile_order()
+                print(f"[Perfis] {profile['name']} adicionada")
+                QTimer.singleShot(0, self.refill_hot_pool)
+            return
+        if 'name' in data:
+            instance.set_title(profile['name'])
+        if 'color' in data:
+            instance.set_color(profile['color'])
+    
+    def apply_profile_order(self):
+        order = {profile_id: index for index, profile_id in enumerate(self.profile_manager.index)}
+        self.workspace.reorder(sorted(self.instances, key=lambda i: order.get(i.profile_name, len(order))))
+        self.instances = list(self.workspace.instances)
+    
+    def watch_config(self):
+        """O arquivo é substituído a cada gravação (rename): precisa ser observado de novo"""
+        if os.path.exists(self.config_path):
+            if self.config_path not in self.config_watcher.files():
+                self.config_watcher.addPath(self.config_path)
+        else:
+            # Ainda não existe: observa a pasta até ele aparecer
+            self.config_watcher.addPath(os.path.dirname(self.config_path))
+    
+    def on_config_file_changed(self, path):
+        self.watch_config()
+        if os.path.exists(self.config_path):
+            self.reload_timer.start()
+    
+    def refill_hot_pool(self):
+        """Pré-cria os primeiros perfis desabilitados (até HOT_POOL_SIZE)"""
+        if self.shard or HOT_POOL_SIZE <= 0:
+            return
+        running = {instance.profile_name for instance in self.instances}
+        pooled = set(self.hot_pool.profiles) | set(self.hot_pool.queue)
+        wanted = []
+        for profile in self.profile_manager.get_all_profiles():
+            profile_id = profile['profile_id']
+            if profile.get('enabled', True) or profile_id in running:
+                continue
+            # Aberto ou pré-criado por outro processo do Multi-Zap
+            if profile_id not in pooled and storage.lock_state(profile_id) is not None:
+                continue
+            wanted.append(profile_id)
+            if len(wanted) == HOT_POOL_SIZE:
+                break
+        for profile_id in pooled - set(wanted):
+            self.hot_pool.discard(profile_id)
+            storage.clear_running(profile_id)
+        for profile_id in wanted:
+            storage.mark_running(profile_id, warm=True)
+        self.hot_pool.prewarm(wanted)
+    
+    def closeEvent(self, event):
+        for instance in self.instances:
+            storage.clear_running(instance.profile_name)
+        for profile_id in list(self.hot_pool.profiles) + self.hot_pool.queue:
+            storage.clear_running(profile_id)
+        shared_cache = asset_cache.shared_cache()
+        if shared_cache is not None:
+            shared_cache.store.flush(final=True)
+            print(f"[Cache compartilhado] {shared_cache.stats()}")
+        if self.notification_center is not None:
+            print(f"[Notificações] {self.notification_center.stats()}")
+        if self.priority is not None:
+            self.priority.restore()
+        # Grava a sessão agora; a gravação final e a limpeza da RAM rodam na saída do processo
+        ram_cache = ramcache.ram_cache()
+        if ram_cache is not None:
+            ram_cache.write_back(wait=True)
+        if self.loop_watchdog is not None:
+            self.loop_watchdog.stop()
+            print(f"[Watchdog] {self.loop_watchdog.stats()}")
+        tracing.finish()
+        super().closeEvent(event)
+    
+    def release_profiles(self):
+        """
+        Destrói páginas e perfis na hora (o Chromium grava e fecha os bancos de
+        dados do perfil). Chamado depois que o laço de eventos termina
+        """
+        for instance in self.instances:
+            instance.shutdown()
+            instance.profile.deleteLater()
+        self.hot_pool.release_unused()
+        QApplication.sendPostedEvents(None, QEvent.Type.DeferredDelete)
+    
+    def update_unread_total(self, *args):
+        """Total de não lidas de todas as contas no título da janela"""
+        total = sum(instance.unread for instance in self.instances)
+        self.setWindowTitle(f"({total}) {self.base_title}" if total else self.base_title)
+    
+    def find_instance(self, profile_id):
+        for instance in self.instances:
+            if instance.profile_name == profile_id:
+                return instance
+        return None
+    
+    def reload_instance(self, profile_id):
+        instance = self.find_instance(profile_id)
+        if instance is not None:
+            instance.reload_page()
+    
+    def focus_instance(self, profile_id):
+        """Traz a janela para frente e foca a instância (restaurando se hibernada)"""
+        instance = self.find_instance(profile_id)
+        if instance is None:
+            return
+        if self.headless is not None:
+            self.headless.pop_out(instance)
+            return
+        self.showNormal()
+        self.raise_()
+        self.activateWindow()
+        self.workspace.show_instance(instance)
+        instance.wake()
+        instance.browser.setFocus()
+    
+    def update_shard_profiles(self):
+        """Mantém o mapa perfil -> shard do supervisor (reload/focus) atualizado"""
+        if self.shard_link is not None:
+            self.shard_link.update_profiles([instance.profile_name for instance in self.instances])
+    
+    def send_shard_status(self):
+        """Envia ao supervisor o estado resumido das instâncias deste shard"""
+        instances = []
+        for instance in self.instances:
+            sample = self.telemetry.latest(instance)
+            instances.append({
+                'profile_id': instance.profile_name,
+                'title': instance.instance_title,
+                'started': instance.started,
+                'state': instance.lifecycle_state().name,
+                'crash_count': instance.crash_count,
+                'unread': instance.unread,
+                'connection': instance.connection,
+                'rss': sample['rss'] if sample else None,
+            })
+        self.shard_link.send_status(instances)
+    
+    def keep_alive_tick(self):
+        """Keep-alive em lote: ignora instâncias visíveis ou pintadas recentemente"""
+        window = SYSTEM_CONFIG['keep_alive_interval'] / 1000
+        with tracing.span('keep_alive_tick', 'keep_alive'):
+            for instance in self.instances:
+                # No modo headless as contas em segundo plano ficam mesmo suspensas
+                if self.headless is not None and not self.headless.needs_keep_alive(instance):
+                    continue
+                if instance.needs_keep_alive(window):
+                    instance.keep_view_alive()
+    
+    def apply_resource_tier(self, tier):
+        """Aplica o novo perfil às instâncias em execução"""
+        cache_size = SYSTEM_CONFIG['cache_size'] * 1024 * 1024
+        for instance in self.instances:
+            instance.profile.setHttpCacheMaximumSize(cache_size)
+        
+        self.scheduler.set_interval('keep_alive', SYSTEM_CONFIG['keep_alive_interval'])
+        self.scheduler.set_interval('telemetry', SYSTEM_CONFIG['telemetry_interval'])
+        self.startup_queue.concurrency = SYSTEM_CONFIG['startup_concurrency']
+        self.hibernation.budget_bytes = SYSTEM_CONFIG['memory_budget'] * 1024 * 1024
+        self.hibernation.idle_seconds = SYSTEM_CONFIG['hibernate_idle']
+        
+        # Sob pressão, hiberna imediatamente em vez de esperar o próximo ciclo
+        if tier == 'LOW':
+            self.hibernation.check_budget()
+            # e garante a sessão em disco caso o sistema precise matar o processo
+            ram_cache = ramcache.ram_cache()
+            if ram_cache is not None:
+                ram_cache.write_back()
+    
+    def export_telemetry(self):
+        """Exporta as amostras de telemetria para CSV e JSON no diretório atual"""
+        base = time.strftime("telemetry_%Y%m%d_%H%M%S")
+        try:
+            self.telemetry.export_csv(f"{base}.csv")
+            self.telemetry.export_json(f"{base}.json")
+            print(f"[Telemetria] Exportado: {base}.csv / {base}.json")
+            if self.loop_watchdog is not None:
+                self.loop_watchdog.export_json(f"{base}_loop.json")
+                print(f"[Watchdog] Histograma do laço de eventos: {base}_loop.json {self.loop_watchdog.stats()}")
+            print(f"[Agendador] {self.scheduler.stats()}")
+            shared_cache = asset_cache.shared_cache()
+            if shared_cache is not None:
+                print(f"[Cache compartilhado] {shared_cache.stats()}")
+            ram_cache = ramcache.ram_cache()
+            if ram_cache is not None:
+                print(f"[RAM] {ram_cache.stats()}")
+            if self.notification_center is not None:
+                print(f"[Notificações] {self.notification_center.stats()}")
+            if self.priority is not None:
+                print(f"[Prioridade] {self.priority.stats()}")
+            print(f"[Scripts] {userscripts.script_library().stats()}")
+            for instance in self.instances:
+                if instance.started:
+                    userscripts.collect_timings(
+                        instance.page,
+                        lambda timings, title=instance.instance_title: print(f"[Scripts] {title}: {timings}")
+                    )
+        except OSError as e:
+            QMessageBox.warning(self, "Aviso", f"Erro ao exportar telemetria: {e}")
 
 
-def main():
-    """Função principal otimizada para computadores fracos"""
-    # Garantir que o diretório de perfis existe
-    ProfileManager.ensure_profiles_directory()
+def shutdown_engine(window):
+    """Encerramento ordenado: perfis fechados antes da última gravação da RAM"""
+    window.release_profiles()
+    ram_cache = ramcache.ram_cache()
+    if ram_cache is not None:
+        ram_cache.shutdown()
 
+
+def parse_args(argv):
+    """Separa as opções do Multi-Zap dos argumentos repassados ao Qt"""
+    parser = argparse.ArgumentParser(description="Multi-Zap - múltiplas instâncias do WhatsApp Web")
+    parser.add_argument("--shards", type=int, default=0,
+                        help="divide os perfis entre N processos supervisionados")
+    parser.add_argument("--url", help="endereço carregado nas instâncias (padrão: WhatsApp Web)")
+    parser.add_argument("--headless", action="store_true",
+                        help="mantém as contas conectadas sem exibir a grade (não lidas na bandeja)")
+    parser.add_argument("--trace", nargs="?", const=tracing.default_trace_path(), metavar="ARQUIVO",
+                        help="grava a linha do tempo (trace events do Chrome) ao fechar")
+    parser.add_argument("--profile", nargs="?", const=tracing.default_profile_path(), metavar="ARQUIVO",
+                        help="registra as funções Python com o cProfile")
+    # Uso interno: processo trabalhador iniciado pelo supervisor
+    parser.add_argument("--shard", type=parse_shard, help=argparse.SUPPRESS)
+    parser.add_argument("--ipc", help=argparse.SUPPRESS)
+    args, qt_args = parser.parse_known_args(argv[1:])
+    return args, argv[:1] + qt_args
+
+
+def configure_environment(extra_flags=""):
+    """Ambiente Qt e flags do Chromium - DEVE ser chamado ANTES de criar o QApplication"""
+    init_system_config()
+    
+    # Esquemas do cache compartilhado precisam existir antes do QApplication
+    if asset_cache.ENABLED:
+        asset_cache.register_schemes()
+    
     # Otimizações de ambiente Qt
     os.environ["QT_FONT_DPI"] = "96"
     os.environ["QT_SCALE_FACTOR"] = "1"
     os.environ["QT_AUTO_SCREEN_SCALE_FACTOR"] = "0"
     os.environ["QT_ENABLE_HIGHDPI_SCALING"] = "0"
     
-    # Flags do Chromium ULTRA otimizadas para computadores fracos
-    # Balanceamento entre performance e funcionalidade do WhatsApp
-    os.environ["QTWEBENGINE_CHROMIUM_FLAGS"] = (
-        # === Economia de Memória ===
-        "--disable-dev-shm-usage "                # Evita problemas com /dev/shm
-        "--disable-background-timer-throttling "  # Não throttle timers em background
-        "--disable-backgrounding-occluded-windows " # Não desativa janelas ocultas
-        "--disable-renderer-backgrounding "       # Mantém renderer ativo
-        "--max-old-space-size=512 "              # Limita heap do V8 a 512MB
-        
-        # === Segurança Relaxada (Performance) ===
-        "--no-sandbox "                           # Remove sandbox (reduz overhead)
-        "--disable-setuid-sandbox "               # Remove setuid sandbox
-        "--disable-web-security "                 # Desativa algumas verificações de segurança
-        
-        # === JavaScript Otimizado ===
-        f"--js-flags=--expose-gc,--max-old-space-size={SYSTEM_CONFIG['max_heap']} " # GC manual + limite heap
-        
-        # === Modo Dispositivos Fracos ===
-        "--enable-low-end-device-mode "           # Modo para dispositivos fracos
-        "--enable-low-res-tiling "                # Tiles de baixa resolução
-        
-        # === Recursos Desabilitados ===
-        "--disable-sync "                         # Sem sincronização
-        "--disable-breakpad "                     # Desabilita crash reporter
-        "--disable-extensions "                   # Sem extensões
-        "--disable-plugins "                      # Sem plugins
-        "--disable-print-preview "                # Sem preview de impressão
-        "--disable-component-update "             # Sem atualizações de componentes
-        "--disable-background-networking "        # Reduz networking em background
-        "--disable-features=TranslateUI "         # Desabilita tradução
-        "--disable-features=MediaRouter "         # Desabilita media router
-        "--disable-domain-reliability "           # Desabilita relatórios de confiabilidade
-        
-        # === GPU e Renderização (Mantém aceleração) ===
-        "--enable-accelerated-2d-canvas "         # Mantém aceleração 2D
-        "--ignore-gpu-blocklist "                 # Força uso da GPU
-        "--enable-gpu-rasterization "             # Rasterização por GPU
-        f"--num-raster-threads={SYSTEM_CONFIG['raster_threads']} " # Threads baseadas no sistema
-        
-        # === Rede e Cache ===
-        "--disk-cache-size=31457280 "             # Cache de disco 30MB
-        "--media-cache-size=20971520 "            # Cache de mídia 20MB
-        
-        # === Áudio/Vídeo (Essencial para WhatsApp) ===
-        "--autoplay-policy=no-user-gesture-required " # Permite autoplay
-        "--use-fake-ui-for-media-stream "         # UI fake para mídia
-        "--enable-features=WebRTC-H264WithOpenH264FFmpeg " # Codec H264
-        
-        # === Performance Geral ===
-        "--process-per-site "                     # Um processo por site
-        "--in-process-gpu "                       # GPU no mesmo processo
-        "--metrics-recording-only "               # Apenas métricas essenciais
-        "--disable-software-rasterizer "          # Força rasterização por hardware
-        "--v8-cache-options=code "                # Cache de código V8
-    )
+    # Flags do Chromium montadas por preset (base + perfil de hardware + usuário)
+    flags = chromium_flags.build_flags(SYSTEM_CONFIG['profile'], extra_flags)
+    os.environ["QTWEBENGINE_CHROMIUM_FLAGS"] = flags.render()
+    print(f"[Sistema] Flags do Chromium: preset {chromium_flags.flag_preset(SYSTEM_CONFIG['profile'])}, "
+          f"{len(flags.flags)} flags")
 
     # Atributos de performance - DEVE ser definido ANTES de criar QApplication
     QApplication.setAttribute(Qt.ApplicationAttribute.AA_ShareOpenGLContexts, False)
     QApplication.setAttribute(Qt.ApplicationAttribute.AA_UseDesktopOpenGL, True)
     QApplication.setAttribute(Qt.ApplicationAttribute.AA_CompressHighFrequencyEvents, True)
-    
-    # Criar aplicação
-    app = QApplication(sys.argv)
+
+
+def create_application(argv):
+    """Cria o QApplication com o estilo e efeitos mais leves"""
+    app = QApplication(argv)
     
     # Configurar estilo para melhor performance
     app.setStyle("Fusion")  # Estilo Fusion é mais leve
@@ -391,12 +1119,53 @@ def main():
     app.setEffectEnabled(Qt.UIEffect.UI_AnimateMenu, False)
     app.setEffectEnabled(Qt.UIEffect.UI_AnimateCombo, False)
     app.setEffectEnabled(Qt.UIEffect.UI_AnimateTooltip, False)
+    return app
+
+
+def main():
+    """Função principal otimizada para computadores fracos"""
+    global TARGET_URL
+    args, qt_argv = parse_args(sys.argv)
+    
+    # Garantir que o diretório de perfis existe
+    ProfileManager.ensure_profiles_directory()
     
-    # Criar e exibir janela principal
+    if args.url:
+        TARGET_URL = args.url
+        # Repassado aos trabalhadores do modo fragmentado
+        os.environ["MULTIZAP_URL"] = args.url
+    
+    if args.headless:
+        os.environ["MULTIZAP_HEADLESS"] = "1"
+    # Também repassados aos trabalhadores (um arquivo por fragmento)
+    if args.trace:
+        os.environ["MULTIZAP_TRACE"] = args.trace
+    if args.profile:
+        os.environ["MULTIZAP_PROFILE"] = args.profile
+    run_headless = os.environ.get("MULTIZAP_HEADLESS") == "1"
+    
+    # Modo fragmentado: este processo apenas supervisiona os trabalhadores
+    if args.shards > 1:
+        sys.exit(run_supervisor(args.shards))
+    
+    tracing.start(args.shard)
+    offscreen = headless.configure_platform() if run_headless else False
+    with tracing.span('configure_environment', 'startup'):
+        configure_environment(headless.HEADLESS_FLAGS if run_headless else "")
+    with tracing.span('create_application', 'startup'):
+        app = create_application(qt_argv)
+    
+    # Criar e exibir janela principal (no modo headless ela fica oculta)
     try:
-        window = MainWindow()
-        window.show()
-        sys.exit(app.exec())
+        with tracing.span('main_window', 'startup'):
+            window = MainWindow(shard=args.shard, ipc_name=args.ipc)
+        if run_headless:
+            window.headless = headless.HeadlessController(window, offscreen, parent=window)
+        else:
+            window.show()
+        exit_code = app.exec()
+        shutdown_engine(window)
+        sys.exit(exit_code)
     except Exception as e:
         QMessageBox.critical(None, "Erro Fatal", f"Erro ao iniciar aplicação:\n{str(e)}")
         sys.exit(1)
@@ -0,0 +1,260 @@
+"""
+Central de Notificações - Multi-Zap
+As notificações das páginas passam por um único apresentador instalado em
+todos os perfis. Elas entram numa fila e, a cada janela de tempo, são
+agrupadas por instância ("Vendas: 7 novas mensagens"). Um limite global por
+minuto e um intervalo mínimo por instância seguram as rajadas; nos horários
+de não perturbe nada é exibido. O tempo entre a chegada e a exibição fica
+registrado
+
+Configuração:
+    MULTIZAP_NOTIFICATIONS=0            desliga (a permissão volta a ser negada)
+    MULTIZAP_NOTIFY_WINDOW_MS=3000      janela de agrupamento
+    MULTIZAP_NOTIFY_PER_MINUTE=6        avisos exibidos por minuto (todas as contas)
+    MULTIZAP_NOTIFY_INSTANCE_S=20       intervalo mínimo entre avisos da mesma conta
+    MULTIZAP_DND="22:00-07:00,12:00-13:00"  horários de não perturbe
+"""
+import os
+import time
+from collections import deque
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from PyQt6.QtWidgets import QApplication, QSystemTrayIcon
+
+ENABLED = os.environ.get("MULTIZAP_NOTIFICATIONS", "1") != "0"
+COALESCE_WINDOW = int(os.environ.get("MULTIZAP_NOTIFY_WINDOW_MS", "3000"))
+MAX_PER_MINUTE = int(os.environ.get("MULTIZAP_NOTIFY_PER_MINUTE", "6"))
+INSTANCE_INTERVAL = float(os.environ.get("MULTIZAP_NOTIFY_INSTANCE_S", "20"))
+DND_SPEC = os.environ.get("MULTIZAP_DND", "")
+
+# Remetentes citados no texto de um aviso agrupado
+MAX_SENDERS = 3
+LATENCY_SAMPLES = 1000
+
+
+def parse_dnd(spec):
+    """'22:00-07:00,12:00-13:00' -> [(minuto_inicial, minuto_final)]"""
+    windows = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            start, end = part.split('-')
+            windows.append(tuple(int(h) * 60 + int(m) for h, m in (t.split(':') for t in (start, end))))
+        except ValueError:
+            print(f"[Notificações] Horário de não perturbe inválido ignorado: {part}")
+    return windows
+
+
+def in_windows(windows, minute_of_day):
+    for start, end in windows:
+        # Janelas que atravessam a meia-noite (22:00-07:00)
+        if start <= end:
+            if start <= minute_of_day < end:
+                return True
+        elif minute_of_day >= start or minute_of_day < end:
+            return True
+    return False
+
+
+def tray_icon():
+    """
+    Ícone da aplicação ou, se nenhuma janela definiu um, o do modo headless:
+    com um ícone nulo o Qt não mostra a entrada na bandeja nem os balões
+    """
+    icon = QApplication.windowIcon()
+    if icon.isNull():
+        # Importado aqui: o headless importa este módulo
+        from headless import tray_icon as headless_icon
+        icon = headless_icon(0)
+    return icon
+
+
+class NotificationCenter(QObject):
+    """
+    Recebe as QWebEngineNotification de todos os perfis. O apresentador só
+    guarda a notificação na fila (custo mínimo na thread da interface); o
+    agrupamento, os limites e a exibição acontecem num único timer
+    """
+    # Instância cujo aviso foi clicado
+    activated = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pending = {}  # instância -> [(notificação, chegada)]
+        self.last_shown = {}  # instância -> momento do último aviso
+        self.shown_times = deque()  # avisos exibidos no último minuto
+        self.dnd_windows = parse_dnd(DND_SPEC)
+        self.dnd_manual = False
+        self.last_delivered = None
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.counters = {'received': 0, 'replaced': 0, 'shown': 0,
+                         'coalesced': 0, 'rate_limited': 0, 'suppressed': 0}
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.flush)
+
+        self.tray = None
+        self._own_tray = False
+
+    def use_tray(self, tray):
+        """Exibe os avisos num ícone de bandeja já existente (modo headless)"""
+        if self._own_tray and self.tray is not None:
+            self.tray.hide()
+        self.tray = tray
+        self._own_tray = False
+        tray.messageClicked.connect(self.on_message_clicked)
+
+    def _ensure_tray(self):
+        if self.tray is None and QSystemTrayIcon.isSystemTrayAvailable():
+            self.tray = QSystemTrayIcon(tray_icon(), self)
+            self.tray.setToolTip("Multi-Zap")
+            self.tray.messageClicked.connect(self.on_message_clicked)
+            self.tray.show()
+            self._own_tray = True
+        return self.tray
+
+    def install(self, profile, instance):
+        """Instala o apresentador no perfil da instância"""
+        profile.setNotificationPresenter(lambda notification: self.enqueue(instance, notification))
+
+    def enqueue(self, instance, notification):
+        self.counters['received'] += 1
+        queue = self.pending.setdefault(instance, [])
+        # Mesma tag (ex.: a mesma conversa): a nova substitui a anterior
+        for index, (existing, arrived) in enumerate(queue):
+            if existing.matches(notification):
+                existing.close()
+                queue[index] = (notification, arrived)
+                self.counters['replaced'] += 1
+                break
+        else:
+            queue.append((notification, time.monotonic()))
+        if not self.timer.isActive():
+            self.timer.start(COALESCE_WINDOW)
+
+    def in_dnd(self):
+        if self.dnd_manual:
+            return True
+        now = time.localtime()
+        return in_windows(self.dnd_windows, now.tm_hour * 60 + now.tm_min)
+
+    def toggle_dnd(self):
+        self.dnd_manual = not self.dnd_manual
+        print(f"[Notificações] Não perturbe {'ativado' if self.dnd_manual else 'desativado'}")
+        return self.dnd_manual
+
+    def _wait_for(self, instance, now):
+        """Segundos até a instância poder exibir um aviso (0 = liberado)"""
+        while self.shown_times and now - self.shown_times[0] >= 60:
+            self.shown_times.popleft()
+        wait = 0.0
+        if len(self.shown_times) >= MAX_PER_MINUTE:
+            wait = 60 - (now - self.shown_times[0])
+        last = self.last_shown.get(instance)
+        if last is not None:
+            wait = max(wait, INSTANCE_INTERVAL - (now - last))
+        return max(0.0, wait)
+
+    def flush(self):
+        now = time.monotonic()
+        dnd = self.in_dnd()
+        next_wait = None
+        # Contas com avisos mais antigos primeiro
+        for instance in sorted(self.pending, key=lambda i: self.pending[i][0][1]):
+            queue = self.pending[instance]
+            if dnd:
+                self.counters['suppressed'] += len(queue)
+                self._release(instance, queue, now)
+                continue
+            wait = self._wait_for(instance, now)
+            if wait > 0:
+                # Continua na fila e será agrupado com as próximas
+                self.counters['rate_limited'] += 1
+                next_wait = wait if next_wait is None else min(next_wait, wait)
+                continue
+            self._show(instance, queue)
+            self._release(instance, queue, now)
+            self.shown_times.append(now)
+            self.last_shown[instance] = now
+        self.pending = {instance: queue for instance, queue in self.pending.items() if queue}
+        if self.pending and next_wait is not None:
+            self.timer.start(int(next_wait * 1000) + 1)
+
+    def _show(self, instance, queue):
+        latest = queue[-1][0]
+        if len(queue) == 1:
+            title = f"{instance.instance_title}: {latest.title()}"
+            message = latest.message()
+        else:
+            self.counters['coalesced'] += len(queue) - 1
+            senders = []
+            for notification, _ in reversed(queue):
+                if notification.title() not in senders:
+                    senders.append(notification.title())
+            title = f"{instance.instance_title}: {len(queue)} novas mensagens"
+            message = ", ".join(senders[:MAX_SENDERS])
+            if len(senders) > MAX_SENDERS:
+                message += f" e mais {len(senders) - MAX_SENDERS}"
+        self.counters['shown'] += 1
+        # Só a última entregue fica aberta (para o clique no balão); a anterior é
+        # fechada, senão a página e o Chromium a mantêm viva indefinidamente
+        if self.last_delivered is not None and self.last_delivered[1] is not latest:
+            self.last_delivered[1].close()
+        self.last_delivered = (instance, latest)
+        # A página considera a notificação exibida (e pode fechá-la ou substituí-la)
+        latest.show()
+        tray = self._ensure_tray()
+        if tray is not None:
+            tray.showMessage(title, message, QSystemTrayIcon.MessageIcon.Information, 5000)
+        print(f"[Notificações] {title} — {message}")
+
+    def _release(self, instance, queue, now):
+        """Registra a latência e libera as notificações já tratadas"""
+        last = self.last_delivered[1] if self.last_delivered else None
+        for notification, arrived in queue:
+            self.latencies.append((now - arrived) * 1000)
+            if notification is not last:
+                notification.close()
+        queue.clear()
+
+    def on_message_clicked(self):
+        if self.last_delivered is None:
+            return
+        instance, notification = self.last_delivered
+        # Abre a conversa na página e traz a instância para frente
+        notification.click()
+        self.activated.emit(instance)
+
+    def forget(self, instance):
+        """Descarta a fila de uma instância removida"""
+        queue = self.pending.pop(instance, [])
+        for notification, _ in queue:
+            notification.close()
+        self.last_shown.pop(instance, None)
+        if self.last_delivered and self.last_delivered[0] is instance:
+            self.last_delivered[1].close()
+            self.last_delivered = None
+
+    def stats(self):
+        latencies = sorted(self.latencies)
+        summary = dict(self.counters)
+        if latencies:
+            summary['latency_ms'] = {
+                'p50': round(latencies[len(latencies) // 2]),
+                'p95': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]),
+                'max': round(latencies[-1]),
+            }
+        return summary
+
+
+_center = None
+
+
+def notification_center():
+    """Central única do processo (None com as notificações desligadas)"""
+    global _center
+    if _center is None and ENABLED:
+        _center = NotificationCenter()
+    return _center
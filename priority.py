@@ -0,0 +1,198 @@
+"""
+Prioridade dos Renderizadores - Multi-Zap
+Todos os processos de renderização nasciam com a mesma prioridade: uma conta
+em segundo plano decodificando vídeo disputava a CPU de igual para igual com
+a conta em que o operador está digitando. Aqui cada renderizador recebe um
+nível conforme o estado da sua instância:
+
+    boost       instância com foco ou com chamada/áudio ativo
+    normal      visível na grade
+    background  oculta (outra página da grade, hibernada, janela minimizada)
+
+No Windows são usadas as classes de prioridade. No Linux/macOS o nível vira
+um nice relativo ao original, mas só quando o processo pode voltar a baixá-lo
+(root ou RLIMIT_NICE): sem isso um renderizador rebaixado nunca voltaria ao
+normal, então a diferença é feita restringindo os renderizadores em segundo
+plano a parte dos núcleos (o que também pode ser ligado junto com o nice via
+MULTIZAP_PIN_BACKGROUND=1). Tudo volta ao original ao fechar o app
+"""
+import os
+import time
+import psutil
+from PyQt6.QtCore import QObject
+from PyQt6.QtWidgets import QApplication
+
+ENABLED = os.environ.get("MULTIZAP_PRIORITY", "1") != "0"
+PIN_BACKGROUND = os.environ.get("MULTIZAP_PIN_BACKGROUND", "0") == "1"
+
+LEVELS = ('background', 'normal', 'boost')
+
+# Deslocamento do nice em relação ao original (POSIX)
+NICE_OFFSETS = {'boost': -5, 'normal': 0, 'background': 10}
+
+# Classes de prioridade (Windows); as constantes só existem no psutil do Windows
+PRIORITY_CLASSES = {
+    'boost': getattr(psutil, 'ABOVE_NORMAL_PRIORITY_CLASS', None),
+    'normal': getattr(psutil, 'NORMAL_PRIORITY_CLASS', None),
+    'background': getattr(psutil, 'BELOW_NORMAL_PRIORITY_CLASS', None),
+}
+
+# Após conceder microfone/câmera, a instância é tratada como em chamada por este tempo (s)
+CALL_GRACE = 120
+
+
+def nice_floor():
+    """Menor nice que este usuário pode definir (POSIX); None no Windows"""
+    if os.name != 'posix':
+        return None
+    if os.geteuid() == 0:
+        return -20
+    try:
+        import resource
+        soft = resource.getrlimit(resource.RLIMIT_NICE)[0]
+    except (ImportError, AttributeError, ValueError, OSError):
+        # Sem RLIMIT_NICE (macOS): só root baixa o nice
+        return 20
+    if soft == resource.RLIM_INFINITY:
+        return -20
+    return 20 - soft
+
+
+def background_cores():
+    """Metade final dos núcleos (ao menos um) para os renderizadores em segundo plano"""
+    cores = list(range(psutil.cpu_count() or 1))
+    return cores[len(cores) // 2:] or cores
+
+
+class PriorityManager(QObject):
+    """
+    Reavalia os níveis quando o foco muda e a cada chamada de update (feita
+    pelo agendador, para pegar renderizadores recriados). Só chama o sistema
+    quando o nível de um processo muda
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.instances = []
+        self.levels = {}  # pid -> nível aplicado
+        self.originals = {}  # pid -> (psutil.Process, nice, afinidade)
+        self.changes = 0
+        self.floor = nice_floor()
+        # Os renderizadores herdam o nice deste processo
+        reversible = self.nice_reversible(psutil.Process().nice())
+        pin = PIN_BACKGROUND or not reversible
+        self.pinned_cores = background_cores() if pin and hasattr(psutil.Process, 'cpu_affinity') else None
+        if not reversible:
+            if self.pinned_cores is not None:
+                print(f"[Prioridade] Sem permissão para baixar o nice: segundo plano "
+                      f"restrito aos núcleos {self.pinned_cores}")
+            else:
+                print("[Prioridade] Sem permissão para baixar o nice nem afinidade de CPU: desativado")
+
+        QApplication.instance().focusChanged.connect(lambda old, new: self.update())
+
+    def nice_reversible(self, original_nice):
+        """True se o nice pode voltar ao original depois de aumentado"""
+        return self.floor is None or self.floor <= original_nice
+
+    def register(self, instance):
+        if instance not in self.instances:
+            self.instances.append(instance)
+
+    def unregister(self, instance):
+        if instance in self.instances:
+            self.instances.remove(instance)
+
+    @staticmethod
+    def _is_focused(instance):
+        focus = QApplication.focusWidget()
+        return (focus is not None and focus.window().isActiveWindow()
+                and (focus is instance or instance.isAncestorOf(focus)))
+
+    @staticmethod
+    def in_call(instance):
+        """Áudio tocando ou microfone/câmera concedidos há pouco"""
+        if instance.page.recentlyAudible():
+            return True
+        granted = instance.media_granted_at
+        return granted is not None and time.monotonic() - granted < CALL_GRACE
+
+    def level_for(self, instance):
+        if self._is_focused(instance) or self.in_call(instance):
+            return 'boost'
+        window = instance.window()
+        if instance.isVisible() and not window.isMinimized():
+            return 'normal'
+        return 'background'
+
+    def update(self):
+        # Páginas que compartilham o processo ficam com o maior nível entre elas
+        wanted = {}
+        for instance in self.instances:
+            pid = instance.page.renderProcessPid()
+            if not pid:
+                continue
+            level = self.level_for(instance)
+            instance.priority_level = level
+            if pid not in wanted or LEVELS.index(level) > LEVELS.index(wanted[pid]):
+                wanted[pid] = level
+
+        for pid, level in wanted.items():
+            if self.levels.get(pid) != level:
+                self._apply(pid, level)
+
+        # Processos que morreram (recuperação, descarte) saem do registro
+        for pid in list(self.levels):
+            if pid not in wanted:
+                self.levels.pop(pid, None)
+                self.originals.pop(pid, None)
+
+    def _apply(self, pid, level):
+        try:
+            if pid not in self.originals:
+                process = psutil.Process(pid)
+                affinity = process.cpu_affinity() if hasattr(process, 'cpu_affinity') else None
+                self.originals[pid] = (process, process.nice(), affinity)
+            process, original_nice, original_affinity = self.originals[pid]
+            self._set_nice(process, original_nice, level)
+            if self.pinned_cores is not None and original_affinity is not None:
+                process.cpu_affinity(self.pinned_cores if level == 'background' else original_affinity)
+        except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
+            print(f"[Prioridade] PID {pid}: {e}")
+            self.originals.pop(pid, None)
+            return
+        self.levels[pid] = level
+        self.changes += 1
+
+    def _set_nice(self, process, original_nice, level):
+        if PRIORITY_CLASSES[level] is not None:
+            process.nice(PRIORITY_CLASSES[level])
+            return
+        if not self.nice_reversible(original_nice):
+            return
+        # O boost vai até onde o limite do usuário permite
+        target = max(self.floor, min(19, original_nice + NICE_OFFSETS[level]))
+        if process.nice() != target:
+            process.nice(target)
+
+    def restore(self):
+        """Devolve a prioridade e a afinidade originais (chamado ao fechar)"""
+        for pid, (process, nice, affinity) in list(self.originals.items()):
+            try:
+                process.nice(nice)
+                if self.pinned_cores is not None and affinity is not None:
+                    process.cpu_affinity(affinity)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        self.originals.clear()
+        self.levels.clear()
+
+    def stats(self):
+        counts = {level: 0 for level in LEVELS}
+        for level in self.levels.values():
+            counts[level] += 1
+        return {
+            'processes': counts,
+            'changes': self.changes,
+            'nice': self.nice_reversible(psutil.Process().nice()),
+            'pinned_cores': self.pinned_cores,
+        }
@@ -0,0 +1,489 @@
+"""
+Cache em RAM - Multi-Zap
+Em máquinas com HD, o I/O de vários perfis do Chromium é uma das maiores
+fontes de travamentos. Com MULTIZAP_RAM_CACHE os caches voláteis de cada
+perfil (HTTP, GPU, código do V8) vão para um tmpfs (/dev/shm) e, no modo
+'full', todo o armazenamento do perfil roda da RAM: os dados persistentes são
+espelhados de volta para profiles/ periodicamente (só o que mudou) e no
+fechamento normal do app. Cada gravação monta uma cópia completa ao lado
+(hard links para o que não mudou) e só então troca as pastas: uma queda no
+meio da gravação deixa a cópia anterior intacta, nunca um LevelDB pela metade
+
+Modos (MULTIZAP_RAM_CACHE):
+    off     padrão: tudo em disco
+    cache   apenas caches descartáveis em RAM (nada a gravar de volta)
+    full    perfil inteiro em RAM + gravação periódica em disco
+    auto    usa o modo do perfil de hardware (chave ram_cache de TIER_CONFIGS)
+
+Cada perfil cai para um modo mais leve (full → cache → disco) se a estimativa
+do seu tamanho não couber no tmpfs ou na RAM livre, descontado o orçamento de
+memória dos renderizadores
+"""
+import os
+import sys
+import time
+import shutil
+import atexit
+import hashlib
+import tempfile
+import threading
+import uuid
+import psutil
+import storage
+from login import PROFILES_DIR
+
+MODES = ('off', 'cache', 'full')
+REQUESTED_MODE = os.environ.get("MULTIZAP_RAM_CACHE", "off").lower()
+WRITEBACK_INTERVAL = int(os.environ.get("MULTIZAP_RAM_WRITEBACK_MS", "300000"))  # 5 minutos
+
+# GPU/código do V8 além do cache HTTP (MB por perfil)
+VOLATILE_OVERHEAD_MB = 40
+# RAM que deve continuar livre além do orçamento dos renderizadores (MB)
+RESERVE_MB = 256
+
+# Caches que o QWebEngineProfile não deixa mudar de lugar: viram links para a RAM
+LINKED_CACHES = tuple(
+    path for path, category in storage.CATEGORIES.items()
+    if category in ('gpu_cache', 'code_cache') and os.sep not in path
+)
+# Marca de cópia completa na pasta de preparação (pode substituir a do disco)
+WRITEBACK_MARKER = ".multizap-writeback-complete"
+# Geração da última sincronização, gravada nas duas cópias: uma cópia da RAM
+# que sobrou de uma queda só vale se o disco continua nessa mesma geração
+SYNC_MARKER = ".multizap-ram-sync"
+# Nunca espelhados para o disco
+NOT_MIRRORED = tuple(
+    path for path, category in storage.CATEGORIES.items()
+    if category in storage.DISPOSABLE and os.sep not in path
+) + (storage.LOCK_FILE, WRITEBACK_MARKER, SYNC_MARKER)
+# Passadas extras para pegar arquivos que o Chromium alterou durante a cópia
+MIRROR_PASSES = 3
+
+
+def default_root():
+    """/dev/shm/multizap-<hash da pasta de perfis> (uma instalação não invade a outra)"""
+    if os.environ.get("MULTIZAP_RAM_DIR"):
+        return os.environ["MULTIZAP_RAM_DIR"]
+    if not sys.platform.startswith('linux') or not os.path.isdir('/dev/shm'):
+        return None
+    digest = hashlib.sha1(os.path.abspath(PROFILES_DIR).encode()).hexdigest()[:8]
+    return os.path.join('/dev/shm', f"multizap-{digest}")
+
+
+def resolve_mode(config):
+    """Modo efetivo a partir da variável de ambiente e do perfil de hardware"""
+    mode = REQUESTED_MODE
+    if mode == 'auto':
+        mode = config.get('ram_cache', 'off')
+    if mode not in MODES:
+        print(f"[RAM] Modo desconhecido '{mode}', usando disco")
+        return 'off'
+    return mode
+
+
+def _fsync(path, directory=False):
+    if directory and os.name != 'posix':
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def mirror(source, target, skip=(), durable=False):
+    """
+    Deixa target igual a source copiando só os arquivos com tamanho ou data
+    diferentes (cada um de forma atômica) e apagando os que sumiram.
+    Entradas de primeiro nível em skip são ignoradas nos dois lados.
+    Com durable, cada arquivo copiado é gravado fisicamente (fsync)
+    """
+    copied = 0
+    copied_bytes = 0
+    seen = set()
+    for root, dirs, files in os.walk(source):
+        relative_root = os.path.relpath(root, source)
+        if relative_root == '.':
+            dirs[:] = [d for d in dirs if d not in skip]
+            files = [f for f in files if f not in skip]
+            relative_root = ''
+        target_root = os.path.join(target, relative_root)
+        os.makedirs(target_root, exist_ok=True)
+        for name in files:
+            relative = os.path.join(relative_root, name)
+            seen.add(relative)
+            src = os.path.join(root, name)
+            dst = os.path.join(target_root, name)
+            try:
+                src_stat = os.stat(src)
+                try:
+                    dst_stat = os.stat(dst)
+                    if (dst_stat.st_size == src_stat.st_size
+                            and dst_stat.st_mtime_ns == src_stat.st_mtime_ns):
+                        continue
+                except FileNotFoundError:
+                    pass
+                fd, temp_path = tempfile.mkstemp(prefix=".mirror-", dir=target_root)
+                os.close(fd)
+                try:
+                    shutil.copy2(src, temp_path)
+                    if durable:
+                        _fsync(temp_path)
+                    os.replace(temp_path, dst)
+                except BaseException:
+                    os.unlink(temp_path)
+                    raise
+            except FileNotFoundError:
+                # O Chromium apagou o arquivo durante a cópia (ex.: compactação do LevelDB)
+                seen.discard(relative)
+                continue
+            copied += 1
+            copied_bytes += src_stat.st_size
+
+    removed = 0
+    for root, dirs, files in os.walk(target, topdown=False):
+        relative_root = os.path.relpath(root, target)
+        if relative_root == '.':
+            files = [f for f in files if f not in skip]
+            relative_root = ''
+        elif relative_root.split(os.sep)[0] in skip:
+            continue
+        for name in files:
+            if os.path.join(relative_root, name) not in seen:
+                os.unlink(os.path.join(root, name))
+                removed += 1
+        if relative_root and not os.path.exists(os.path.join(source, relative_root)):
+            try:
+                os.rmdir(root)
+            except OSError:
+                pass
+    return {'copied': copied, 'bytes': copied_bytes, 'removed': removed}
+
+
+def read_sync_marker(directory):
+    try:
+        with open(os.path.join(directory, SYNC_MARKER), 'r', encoding='utf-8') as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def write_sync_marker(directory, generation):
+    """Grava a geração de forma atômica (o arquivo pode ser um hard link da cópia anterior)"""
+    path = os.path.join(directory, SYNC_MARKER)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(generation)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def changed_since_sync(directory, skip=()):
+    """True se algum arquivo do perfil foi alterado depois da marca de sincronização"""
+    try:
+        synced_at = os.stat(os.path.join(directory, SYNC_MARKER)).st_mtime_ns
+    except OSError:
+        return True
+    for root, dirs, files in os.walk(directory):
+        if root == directory:
+            dirs[:] = [d for d in dirs if d not in skip]
+            files = [f for f in files if f not in skip]
+        for name in files:
+            try:
+                if os.stat(os.path.join(root, name), follow_symlinks=False).st_mtime_ns > synced_at:
+                    return True
+            except OSError:
+                continue
+    return False
+
+
+def link_tree(source, target):
+    """Réplica de source em target com hard links (sem copiar dados, se possível)"""
+    for root, dirs, files in os.walk(source):
+        target_root = os.path.join(target, os.path.relpath(root, source))
+        os.makedirs(target_root, exist_ok=True)
+        for name in list(dirs) + files:
+            src = os.path.join(root, name)
+            dst = os.path.join(target_root, name)
+            try:
+                if os.path.islink(src):
+                    os.symlink(os.readlink(src), dst)
+                    if name in dirs:
+                        dirs.remove(name)
+                elif name in files:
+                    try:
+                        os.link(src, dst)
+                    except OSError:
+                        shutil.copy2(src, dst)
+            except FileNotFoundError:
+                continue
+
+
+def _staging_paths(target):
+    parent, name = os.path.split(target)
+    # Pastas ocultas: ignoradas pelo storage.py e pelo snapshot.py
+    return os.path.join(parent, f".{name}.writeback"), os.path.join(parent, f".{name}.previous")
+
+
+def recover_commit(target):
+    """Conclui ou descarta uma troca de pastas interrompida por uma queda"""
+    staging, previous = _staging_paths(target)
+    if not os.path.isdir(target):
+        if os.path.exists(os.path.join(staging, WRITEBACK_MARKER)):
+            os.rename(staging, target)
+        elif os.path.isdir(previous):
+            os.rename(previous, target)
+    for leftover in (staging, previous):
+        if os.path.lexists(leftover):
+            shutil.rmtree(leftover, ignore_errors=True)
+
+
+def commit_mirror(source, target, skip=(), generation=None):
+    """
+    mirror consistente contra quedas: a cópia é montada numa pasta de
+    preparação (hard links para o disco atual + arquivos alterados), marcada
+    como completa e trocada com target por renomeação. Com generation, a marca
+    de sincronização é gravada no disco (junto com a troca) e depois em source
+    """
+    recover_commit(target)
+    staging, previous = _staging_paths(target)
+    if os.path.isdir(target):
+        link_tree(target, staging)
+    totals = {'copied': 0, 'bytes': 0, 'removed': 0}
+    for _ in range(MIRROR_PASSES):
+        result = mirror(source, staging, skip, durable=True)
+        for key in totals:
+            totals[key] += result[key]
+        if not result['copied'] and not result['removed']:
+            break
+    if generation is not None:
+        write_sync_marker(staging, generation)
+    with open(os.path.join(staging, WRITEBACK_MARKER), 'w', encoding='utf-8') as f:
+        f.write(str(time.time()))
+        f.flush()
+        os.fsync(f.fileno())
+
+    if os.path.isdir(target):
+        os.rename(target, previous)
+    os.rename(staging, target)
+    parent = os.path.dirname(target)
+    _fsync(parent, directory=True)
+    os.remove(os.path.join(target, WRITEBACK_MARKER))
+    shutil.rmtree(previous, ignore_errors=True)
+    if generation is not None:
+        write_sync_marker(source, generation)
+    return totals
+
+
+class RamCache:
+    """Coloca os perfis na RAM conforme o modo e mantém o disco atualizado"""
+    def __init__(self, mode, root, config):
+        self.mode = mode
+        self.root = root
+        self.config = config
+        self.profiles = {}  # profile_id -> {'mode', 'disk', 'ram', 'estimate_mb'}
+        self.committed_mb = 0
+        self.budget_mb = self._budget_mb()
+        self.writebacks = 0
+        self.last_writeback = None
+        self._lock = threading.Lock()
+        self._thread = None
+        os.makedirs(self.root, exist_ok=True)
+        atexit.register(self.shutdown)
+        print(f"[RAM] Modo {mode} em {root} (até {self.budget_mb} MB)")
+
+    def _budget_mb(self):
+        """Menor entre o espaço livre do tmpfs e a RAM livre menos a reserva"""
+        available = psutil.virtual_memory().available // (1024 * 1024)
+        available -= self.config.get('memory_budget', 0) + RESERVE_MB
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            free = shutil.disk_usage(self.root).free // (1024 * 1024)
+        except OSError:
+            free = 0
+        return max(0, min(available, free))
+
+    def _estimate_mb(self, mode, disk_path):
+        estimate = self.config.get('cache_size', 0) + VOLATILE_OVERHEAD_MB
+        if mode == 'full' and os.path.isdir(disk_path):
+            total = 0
+            with os.scandir(disk_path) as entries:
+                for entry in entries:
+                    if entry.name in NOT_MIRRORED:
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        total += storage.directory_size(entry.path)[0]
+                    else:
+                        total += entry.stat(follow_symlinks=False).st_size
+            estimate += total // (1024 * 1024)
+        return estimate
+
+    def _choose_mode(self, disk_path):
+        """Modo mais completo (até o pedido) cuja estimativa cabe no que sobra"""
+        for mode in MODES[MODES.index(self.mode):0:-1]:
+            estimate = self._estimate_mb(mode, disk_path)
+            if self.committed_mb + estimate <= self.budget_mb:
+                return mode, estimate
+        return 'off', 0
+
+    def apply(self, profile, profile_id, disk_path):
+        """Aponta o cache (e no modo full o armazenamento) do perfil para a RAM"""
+        if profile_id in self.profiles:
+            entry = self.profiles[profile_id]
+        else:
+            mode, estimate = self._choose_mode(disk_path)
+            if mode != self.mode:
+                print(f"[RAM] Pouca memória: perfil {profile_id} em modo {mode}")
+            entry = {'mode': mode, 'disk': disk_path,
+                     'ram': os.path.join(self.root, profile_id), 'estimate_mb': estimate}
+            self.committed_mb += estimate
+            self.profiles[profile_id] = entry
+            if mode == 'full':
+                self._prepare_full(entry)
+            elif mode == 'cache':
+                self._link_caches(entry)
+
+        if entry['mode'] == 'full':
+            profile.setPersistentStoragePath(os.path.join(entry['ram'], "storage"))
+        if entry['mode'] != 'off':
+            profile.setCachePath(os.path.join(entry['ram'], "Cache"))
+
+    def _prepare_full(self, entry):
+        ram_storage = os.path.join(entry['ram'], "storage")
+        recover_commit(entry['disk'])
+        if os.path.isdir(ram_storage):
+            if self._leftover_is_newer(ram_storage, entry['disk']):
+                # Sobrou de uma execução interrompida e o disco não mudou desde então
+                print(f"[RAM] Recuperando dados não gravados de {entry['ram']}")
+                commit_mirror(ram_storage, entry['disk'], NOT_MIRRORED)
+            else:
+                print(f"[RAM] Aviso: cópia antiga em {entry['ram']} descartada "
+                      f"(o perfil foi usado ou restaurado em disco depois dela)")
+                shutil.rmtree(ram_storage, ignore_errors=True)
+        os.makedirs(entry['disk'], exist_ok=True)
+        mirror(entry['disk'], ram_storage, NOT_MIRRORED)
+        # Nova geração: as duas cópias partem do mesmo estado
+        generation = uuid.uuid4().hex
+        write_sync_marker(entry['disk'], generation)
+        write_sync_marker(ram_storage, generation)
+
+    @staticmethod
+    def _leftover_is_newer(ram_storage, disk_path):
+        """
+        A cópia da RAM só substitui o disco se os dois estão na mesma geração e
+        nada foi gravado no disco depois dela (uso em modo disco/cache ou
+        snapshot.py restore)
+        """
+        if not os.path.isdir(disk_path):
+            return True
+        generation = read_sync_marker(ram_storage)
+        if generation is None or generation != read_sync_marker(disk_path):
+            return False
+        return not changed_since_sync(disk_path, NOT_MIRRORED)
+
+    def _link_caches(self, entry):
+        """GPUCache/Code Cache ficam no armazenamento do perfil: viram links para a RAM"""
+        if os.name != 'posix':
+            return
+        os.makedirs(entry['disk'], exist_ok=True)
+        for name in LINKED_CACHES:
+            link = os.path.join(entry['disk'], name)
+            target = os.path.join(entry['ram'], name)
+            os.makedirs(target, exist_ok=True)
+            if os.path.islink(link):
+                if os.readlink(link) == target:
+                    continue
+                os.unlink(link)
+            elif os.path.isdir(link):
+                shutil.rmtree(link, ignore_errors=True)
+            os.symlink(target, link)
+
+    def _unlink_caches(self, entry):
+        for name in LINKED_CACHES:
+            link = os.path.join(entry['disk'], name)
+            if os.path.islink(link):
+                os.unlink(link)
+
+    def write_back(self, wait=False):
+        """
+        Espelha para o disco os perfis em modo full. Em segundo plano por padrão
+        (não trava a interface); ignorado se a gravação anterior ainda roda
+        """
+        if not any(entry['mode'] == 'full' for entry in self.profiles.values()):
+            return
+        if wait:
+            if self._thread is not None:
+                self._thread.join()
+            self._write_back()
+        elif self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._write_back, name="ram-writeback", daemon=True)
+            self._thread.start()
+
+    def _write_back(self):
+        with self._lock:
+            start = time.perf_counter()
+            totals = {'copied': 0, 'bytes': 0, 'removed': 0}
+            for profile_id, entry in list(self.profiles.items()):
+                if entry['mode'] != 'full':
+                    continue
+                try:
+                    result = commit_mirror(os.path.join(entry['ram'], "storage"), entry['disk'],
+                                           NOT_MIRRORED, uuid.uuid4().hex)
+                except OSError as e:
+                    print(f"[RAM] Erro ao gravar {profile_id} em disco: {e}")
+                    continue
+                for key in totals:
+                    totals[key] += result[key]
+            self.writebacks += 1
+            self.last_writeback = time.time()
+            if totals['copied'] or totals['removed']:
+                print(f"[RAM] Gravação em disco: {totals['copied']} arquivos "
+                      f"({totals['bytes'] / 1024:.0f} KB), {totals['removed']} removidos "
+                      f"em {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    def shutdown(self):
+        """
+        Última gravação e liberação da RAM. Deve rodar depois de destruídos as
+        páginas e os perfis (o Chromium fecha os bancos de dados); o atexit
+        é só a rede de segurança
+        """
+        if not self.profiles:
+            return
+        self.write_back(wait=True)
+        for entry in self.profiles.values():
+            if entry['mode'] == 'cache':
+                self._unlink_caches(entry)
+            if entry['mode'] != 'off':
+                shutil.rmtree(entry['ram'], ignore_errors=True)
+        self.profiles.clear()
+        self.committed_mb = 0
+
+    def stats(self):
+        return {
+            'mode': self.mode,
+            'profiles': {profile_id: entry['mode'] for profile_id, entry in self.profiles.items()},
+            'committed_mb': self.committed_mb,
+            'budget_mb': self.budget_mb,
+            'writebacks': self.writebacks,
+        }
+
+
+_ram_cache = None
+_resolved = False
+
+
+def ram_cache(config=None):
+    """Instância única do processo (None com o modo desligado ou sem tmpfs)"""
+    global _ram_cache, _resolved
+    if not _resolved and config is not None:
+        _resolved = True
+        mode = resolve_mode(config)
+        if mode == 'off':
+            return None
+        root = default_root()
+        if root is None:
+            print("[RAM] Nenhum tmpfs disponível, usando disco")
+            return None
+        _ram_cache = RamCache(mode, root, config)
+    return _ram_cache
@@ -0,0 +1,209 @@
+"""
+Filtro de Requisições - Multi-Zap
+Bloqueia telemetria, beacons de log e rastreadores antes de saírem da
+máquina. As regras são compiladas uma vez por processo em estruturas de
+busca rápida (árvore de domínios, conjunto de hosts exatos e uma única
+expressão regular combinada), e cada perfil conta quantas requisições
+bloqueou e quantos bytes estimados deixou de baixar
+
+Formato das regras (uma por linha, '#' inicia comentário):
+    exemplo.com                 domínio e subdomínios
+    =api.exemplo.com            somente este host
+    exemplo.com/log/            domínio + prefixo do caminho
+    re:^https://[^/]+/beacon    expressão regular sobre a URL inteira
+                                (flags só locais, (?i:...); sem \1 nem (?P=nome))
+    @@cdn.exemplo.com           exceção (nunca bloquear)
+"""
+import os
+import re
+from PyQt6.QtWebEngineCore import QWebEngineUrlRequestInterceptor, QWebEngineUrlRequestInfo
+
+ENABLED = os.environ.get("MULTIZAP_REQUEST_FILTER", "1") != "0"
+USER_RULES_FILE = "request_filters.txt"
+
+DEFAULT_RULES = """
+# Telemetria e relatórios de erro do WhatsApp Web
+crashlogs.whatsapp.net
+dit.whatsapp.net/deidentified_telemetry
+# Rastreadores de terceiros
+google-analytics.com
+googletagmanager.com
+doubleclick.net
+connect.facebook.net
+"""
+
+ResourceType = QWebEngineUrlRequestInfo.ResourceType
+
+# Tamanho típico (bytes) de cada tipo de requisição, para estimar a economia
+ESTIMATED_BYTES = {
+    ResourceType.ResourceTypeScript: 60 * 1024,
+    ResourceType.ResourceTypeStylesheet: 20 * 1024,
+    ResourceType.ResourceTypeImage: 15 * 1024,
+    ResourceType.ResourceTypeFontResource: 40 * 1024,
+    ResourceType.ResourceTypeMedia: 200 * 1024,
+    ResourceType.ResourceTypeXhr: 2 * 1024,
+    ResourceType.ResourceTypePing: 1024,
+    ResourceType.ResourceTypeCspReport: 1024,
+}
+DEFAULT_ESTIMATE = 4 * 1024
+
+# Construções que mudam de sentido (ou falham) dentro da expressão combinada:
+# flags globais como (?i) e referências a grupos (\1, (?P=nome))
+UNCOMBINABLE = re.compile(r"\(\?[aiLmsux]+\)|\\[1-9]|\(\?P=")
+
+
+class DomainTrie:
+    """Árvore de rótulos invertidos (com → exemplo → api): busca em O(rótulos)"""
+    # Marcador próprio: '' também aparece como rótulo em hosts malformados
+    TERMINAL = object()
+
+    def __init__(self):
+        self.root = {}
+
+    def add(self, domain, path_prefix=''):
+        node = self.root
+        for label in reversed(domain.rstrip('.').split('.')):
+            node = node.setdefault(label, {})
+        # Lista de prefixos de caminho; '' bloqueia o domínio inteiro
+        node.setdefault(self.TERMINAL, []).append(path_prefix)
+
+    def match(self, host, path):
+        node = self.root
+        # 'crashlogs.whatsapp.net.' (FQDN com ponto final) é o mesmo host
+        for label in reversed(host.rstrip('.').split('.')):
+            node = node.get(label)
+            if node is None:
+                return False
+            prefixes = node.get(self.TERMINAL)
+            if prefixes and any(path.startswith(prefix) for prefix in prefixes):
+                return True
+        return False
+
+
+class RuleSet:
+    """Regras de bloqueio e de exceção já compiladas"""
+    def __init__(self):
+        self.block = self._empty()
+        self.allow = self._empty()
+        self.rule_count = 0
+
+    @staticmethod
+    def _empty():
+        return {'trie': DomainTrie(), 'exact': set(), 'patterns': [], 'regexes': []}
+
+    def add(self, line):
+        line = line.split('#', 1)[0].strip()
+        if not line:
+            return
+        target = self.block
+        if line.startswith('@@'):
+            target, line = self.allow, line[2:]
+
+        if line.startswith('re:'):
+            re.compile(line[3:])  # regra inválida falha aqui, com a linha na mensagem
+            if UNCOMBINABLE.search(line[3:]):
+                raise re.error("flags globais e referências a grupos não são suportadas "
+                               "(use (?i:...) para flags locais)")
+            target['patterns'].append(line[3:])
+        elif line.startswith('='):
+            target['exact'].add(line[1:].rstrip('.').lower())
+        else:
+            domain, slash, path = line.partition('/')
+            target['trie'].add(domain.lower(), slash + path)
+        self.rule_count += 1
+
+    def load(self, text):
+        for number, line in enumerate(text.splitlines(), 1):
+            try:
+                self.add(line)
+            except re.error as e:
+                print(f"[Filtro] Regra {number} ignorada ({e}): {line.strip()}")
+
+    def compile(self):
+        # Todas as expressões viram um único autômato; se a combinação falhar
+        # (ex.: grupos com o mesmo nome), cada expressão é testada separadamente
+        for rules in (self.block, self.allow):
+            if not rules['patterns']:
+                continue
+            try:
+                rules['regexes'] = [re.compile("|".join(f"(?:{p})" for p in rules['patterns']))]
+            except re.error as e:
+                print(f"[Filtro] Expressões não combinadas ({e}): testadas uma a uma")
+                rules['regexes'] = [re.compile(p) for p in rules['patterns']]
+        return self
+
+    @staticmethod
+    def _matches(rules, url, host, path):
+        return (host in rules['exact']
+                or rules['trie'].match(host, path)
+                or any(regex.search(url) is not None for regex in rules['regexes']))
+
+    def blocks(self, url, host, path):
+        return (self._matches(self.block, url, host, path)
+                and not self._matches(self.allow, url, host, path))
+
+
+_rules = None
+
+
+def load_rules():
+    """Regras padrão + request_filters.txt (se existir), compiladas uma vez"""
+    global _rules
+    if _rules is None:
+        _rules = RuleSet()
+        _rules.load(DEFAULT_RULES)
+        if os.path.exists(USER_RULES_FILE):
+            with open(USER_RULES_FILE, 'r', encoding='utf-8') as f:
+                _rules.load(f.read())
+        _rules.compile()
+        print(f"[Filtro] {_rules.rule_count} regras carregadas")
+    return _rules
+
+
+class RequestFilter:
+    """Etapa da cadeia que bloqueia as requisições e conta a economia do perfil"""
+    def __init__(self, rules):
+        self.rules = rules
+        self.blocked = 0
+        self.bytes_saved = 0
+        self.by_host = {}
+
+    def intercept(self, info):
+        url = info.requestUrl()
+        if info.resourceType() == ResourceType.ResourceTypeMainFrame:
+            return False
+        host = url.host().lower().rstrip('.')
+        if not self.rules.blocks(url.toString(), host, url.path()):
+            return False
+        info.block(True)
+        self.blocked += 1
+        self.bytes_saved += ESTIMATED_BYTES.get(info.resourceType(), DEFAULT_ESTIMATE)
+        self.by_host[host] = self.by_host.get(host, 0) + 1
+        return True
+
+    def stats(self):
+        return {'blocked': self.blocked, 'bytes_saved': self.bytes_saved, 'by_host': dict(self.by_host)}
+
+
+class RequestChain(QWebEngineUrlRequestInterceptor):
+    """
+    O perfil aceita um único interceptador: as etapas (filtro, cache
+    compartilhado...) são chamadas em ordem até uma bloquear ou redirecionar
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.stages = []
+
+    def add(self, stage):
+        self.stages.append(stage)
+
+    def stage(self, kind):
+        for stage in self.stages:
+            if isinstance(stage, kind):
+                return stage
+        return None
+
+    def interceptRequest(self, info):
+        for stage in self.stages:
+            if stage.intercept(info):
+                return
@@ -0,0 +1,178 @@
+"""
+Gerenciamento de Recursos - Multi-Zap
+Define os perfis LOW/MEDIUM/HIGH, detecta o hardware e ajusta o perfil em
+tempo de execução conforme a pressão de memória, swap e carga do sistema
+"""
+import os
+import time
+import psutil
+from PyQt6.QtCore import QObject, pyqtSignal
+
+# Ordem crescente de recursos
+TIERS = ('LOW', 'MEDIUM', 'HIGH')
+
+TIER_CONFIGS = {
+    # Perfil BAIXO: < 4GB RAM ou <= 2 CPUs
+    'LOW': {
+        'profile': 'LOW',
+        'cache_size': 20,  # MB
+        'keep_alive_interval': 60000,  # 60 segundos
+        'max_heap': 256,  # MB
+        'raster_threads': 1,
+        'memory_budget': 1200,  # MB (soma dos renderizadores)
+        'hibernate_idle': 180,  # segundos sem interação
+        'startup_concurrency': 1,  # páginas carregando ao mesmo tempo
+        'telemetry_interval': 10000,  # ms
+        'ram_cache': 'cache'  # modo do ramcache com MULTIZAP_RAM_CACHE=auto
+    },
+    # Perfil MÉDIO: 4-8GB RAM ou 2-4 CPUs
+    'MEDIUM': {
+        'profile': 'MEDIUM',
+        'cache_size': 30,  # MB
+        'keep_alive_interval': 45000,  # 45 segundos
+        'max_heap': 512,  # MB
+        'raster_threads': 2,
+        'memory_budget': 2500,  # MB
+        'hibernate_idle': 300,  # segundos
+        'startup_concurrency': 2,
+        'telemetry_interval': 5000,
+        'ram_cache': 'cache'
+    },
+    # Perfil ALTO: >= 8GB RAM e > 4 CPUs
+    'HIGH': {
+        'profile': 'HIGH',
+        'cache_size': 50,  # MB
+        'keep_alive_interval': 30000,  # 30 segundos
+        'max_heap': 1024,  # MB
+        'raster_threads': 4,
+        'memory_budget': 5000,  # MB
+        'hibernate_idle': 600,  # segundos
+        'startup_concurrency': 3,
+        'telemetry_interval': 5000,
+        'ram_cache': 'full'
+    },
+}
+
+# Chaves que podem mudar com o app rodando (heap e threads de rasterização
+# são flags do Chromium, fixadas na inicialização)
+RUNTIME_KEYS = ('profile', 'cache_size', 'keep_alive_interval', 'memory_budget',
+                'hibernate_idle', 'startup_concurrency', 'telemetry_interval')
+
+
+def detect_system_capabilities():
+    """Detecta as capacidades do sistema e retorna configurações otimizadas"""
+    try:
+        # Detectar RAM disponível
+        ram_gb = psutil.virtual_memory().total / (1024**3)
+        cpu_count = psutil.cpu_count()
+
+        if ram_gb < 4 or cpu_count <= 2:
+            tier = 'LOW'
+        elif ram_gb < 8 or cpu_count <= 4:
+            tier = 'MEDIUM'
+        else:
+            tier = 'HIGH'
+    except Exception:
+        # Fallback para perfil médio se não conseguir detectar
+        tier = 'MEDIUM'
+    return dict(TIER_CONFIGS[tier])
+
+
+def config_overrides():
+    """Ajustes do usuário via variáveis de ambiente (valem para qualquer perfil)"""
+    overrides = {}
+    # Orçamento de memória em MB
+    if os.environ.get("MULTIZAP_MEMORY_BUDGET_MB"):
+        overrides['memory_budget'] = int(os.environ["MULTIZAP_MEMORY_BUDGET_MB"])
+    return overrides
+
+
+class ResourceController(QObject):
+    """
+    Reavalia (a cada chamada de evaluate, feita pelo agendador) a pressão do sistema e move o SYSTEM_CONFIG entre
+    os perfis, nunca acima do perfil do hardware. Pioras são aplicadas na hora;
+    melhoras só depois de leituras consecutivas, para evitar oscilação.
+    """
+    tier_changed = pyqtSignal(str)
+
+    # Limites de pressão
+    CRITICAL_AVAILABLE = 0.10   # fração de RAM disponível
+    MODERATE_AVAILABLE = 0.25
+    CRITICAL_SWAP_RATE = 1024 * 1024  # bytes/s trocados com o swap
+    MODERATE_SWAP_RATE = 64 * 1024
+    CRITICAL_LOAD = 1.5  # load average por CPU
+    MODERATE_LOAD = 1.0
+    RELAX_READINGS = 3
+
+    def __init__(self, config, overrides=None, parent=None):
+        super().__init__(parent)
+        self.config = config
+        self.overrides = overrides or {}
+        self.hardware_tier = config['profile']
+        self.cpu_count = psutil.cpu_count() or 1
+        self._last_swap = self._swap_bytes()
+        self._last_read = time.monotonic()
+        self._relax_count = 0
+
+    @staticmethod
+    def _swap_bytes():
+        try:
+            swap = psutil.swap_memory()
+            return swap.sin + swap.sout
+        except Exception:
+            # Alguns sistemas não expõem contadores de swap
+            return 0
+
+    def read_pressure(self):
+        """Retorna (fração de RAM disponível, bytes/s de swap, carga por CPU)"""
+        memory = psutil.virtual_memory()
+        available = memory.available / memory.total
+
+        now = time.monotonic()
+        swap_bytes = self._swap_bytes()
+        elapsed = max(now - self._last_read, 0.001)
+        swap_rate = max(0, swap_bytes - self._last_swap) / elapsed
+        self._last_swap = swap_bytes
+        self._last_read = now
+
+        try:
+            load = psutil.getloadavg()[0] / self.cpu_count
+        except (AttributeError, OSError):
+            load = psutil.cpu_percent() / 100
+        return available, swap_rate, load
+
+    def classify(self, available, swap_rate, load):
+        if (available < self.CRITICAL_AVAILABLE or swap_rate > self.CRITICAL_SWAP_RATE
+                or load > self.CRITICAL_LOAD):
+            tier = 'LOW'
+        elif (available < self.MODERATE_AVAILABLE or swap_rate > self.MODERATE_SWAP_RATE
+                or load > self.MODERATE_LOAD):
+            tier = 'MEDIUM'
+        else:
+            tier = 'HIGH'
+        # Nunca acima do perfil do hardware
+        return TIERS[min(TIERS.index(tier), TIERS.index(self.hardware_tier))]
+
+    def evaluate(self):
+        available, swap_rate, load = self.read_pressure()
+        target = self.classify(available, swap_rate, load)
+        current = self.config['profile']
+        if target == current:
+            self._relax_count = 0
+            return
+
+        if TIERS.index(target) > TIERS.index(current):
+            self._relax_count += 1
+            if self._relax_count < self.RELAX_READINGS:
+                return
+
+        self._relax_count = 0
+        print(f"[Recursos] {current} → {target} (RAM livre {available:.0%}, "
+              f"swap {swap_rate / 1024:.0f} KB/s, carga {load:.2f}/CPU)")
+        self.apply(target)
+
+    def apply(self, tier):
+        """Atualiza o SYSTEM_CONFIG compartilhado e avisa os interessados"""
+        for key in RUNTIME_KEYS:
+            self.config[key] = self.overrides.get(key, TIER_CONFIGS[tier][key])
+        self.tier_changed.emit(tier)
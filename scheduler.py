@@ -0,0 +1,87 @@
+"""
+Agendador Periódico - Multi-Zap
+Um único timer executa todo o trabalho periódico do app (keep-alive,
+telemetria, verificações de saúde), agrupando tarefas próximas no mesmo
+despertar para reduzir wakeups da CPU
+"""
+import random
+import time
+import tracing
+import watchdog
+from PyQt6.QtCore import QObject, QTimer
+
+
+class PeriodicScheduler(QObject):
+    """
+    Cada tarefa tem seu intervalo; no despertar, todas as tarefas vencidas ou
+    que venceriam dentro da folga (fração do próprio intervalo) rodam juntas.
+    O jitter evita que as tarefas fiquem sincronizadas com outros processos.
+    """
+    def __init__(self, slack=0.25, jitter=0.10, parent=None):
+        super().__init__(parent)
+        self.slack = slack
+        self.jitter = jitter
+        self.tasks = {}  # nome -> {'interval', 'callback', 'due', 'runs'}
+        self.wakeups = 0
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self._tick)
+
+    def add_task(self, name, interval, callback):
+        """Registra uma tarefa periódica (intervalo em ms)"""
+        self.tasks[name] = {
+            'interval': interval,
+            'callback': callback,
+            'due': self._next_due(time.monotonic(), interval),
+            'runs': 0,
+        }
+        self._schedule()
+
+    def remove_task(self, name):
+        self.tasks.pop(name, None)
+        self._schedule()
+
+    def set_interval(self, name, interval):
+        task = self.tasks.get(name)
+        if task is None or task['interval'] == interval:
+            return
+        task['interval'] = interval
+        task['due'] = self._next_due(time.monotonic(), interval)
+        self._schedule()
+
+    def stats(self):
+        return {
+            'wakeups': self.wakeups,
+            'runs': {name: task['runs'] for name, task in self.tasks.items()},
+        }
+
+    def _next_due(self, now, interval):
+        spread = interval * self.jitter
+        return now + (interval + random.uniform(-spread, spread)) / 1000
+
+    def _schedule(self):
+        if not self.tasks:
+            self.timer.stop()
+            return
+        due = min(task['due'] for task in self.tasks.values())
+        delay = max(0, int((due - time.monotonic()) * 1000))
+        self.timer.start(delay)
+
+    def _tick(self):
+        self.wakeups += 1
+        now = time.monotonic()
+        for name, task in list(self.tasks.items()):
+            if name not in self.tasks:
+                continue
+            # Adianta tarefas que venceriam logo para aproveitar o despertar
+            if task['due'] - now > task['interval'] * self.slack / 1000:
+                continue
+            task['due'] = self._next_due(now, task['interval'])
+            task['runs'] += 1
+            try:
+                with tracing.span(f"task:{name}", 'scheduler'), watchdog.callback(f"task:{name}"):
+                    task['callback']()
+            except Exception as e:
+                print(f"[Agendador] Erro na tarefa '{name}': {e}")
+        self._schedule()
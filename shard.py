@@ -0,0 +1,352 @@
+"""
+Modo Fragmentado (Shards) - Multi-Zap
+Um supervisor distribui os perfis habilitados entre vários processos
+trabalhadores (cada perfil tem um shard fixo, pelo hash do seu id) (cada um com sua janela e sua thread de interface) e reinicia
+individualmente os que caírem. Comandos chegam por um canal local (JSON por linha)
+
+Uso:
+    python main.py --shards 3          # inicia o supervisor com 3 processos
+    python shard.py status             # estado de cada shard
+    python shard.py reload zap_vendas  # recarrega uma instância
+    python shard.py focus zap_vendas   # traz uma instância para frente
+    python shard.py restart 1          # reinicia o shard 1
+"""
+import json
+import os
+import signal
+import sys
+import zlib
+from functools import partial
+from PyQt6.QtCore import QObject, QProcess, QTimer, QCoreApplication, pyqtSignal
+from PyQt6.QtNetwork import QLocalServer, QLocalSocket
+from login import ProfileManager
+
+# Reinício de shards que caíram (milissegundos)
+RESTART_BACKOFF_BASE = 2000
+RESTART_BACKOFF_MAX = 60000
+
+
+def server_name():
+    """Nome do canal local do supervisor (um por usuário do sistema)"""
+    user = os.environ.get("USER") or os.environ.get("USERNAME") or "default"
+    return f"multizap-supervisor-{user}"
+
+
+def shard_of(profile_id, count):
+    """
+    Shard fixo do perfil (hash estável do profile_id): não depende da lista de
+    perfis habilitados, então habilitar ou desabilitar contas com os shards
+    abertos nunca faz dois processos abrirem a mesma pasta de perfil
+    """
+    return zlib.crc32(profile_id.encode('utf-8')) % count
+
+
+def shard_profiles(profiles, index, count):
+    """Perfis que pertencem ao shard index"""
+    return [profile for profile in profiles if shard_of(profile['profile_id'], count) == index]
+
+
+def parse_shard(value):
+    """Converte 'i/n' em (i, n)"""
+    index, count = value.split("/")
+    return int(index), int(count)
+
+
+class LineChannel(QObject):
+    """Mensagens JSON delimitadas por quebra de linha sobre um QLocalSocket"""
+    message_received = pyqtSignal(dict)
+    disconnected = pyqtSignal()
+
+    def __init__(self, socket, parent=None):
+        super().__init__(parent)
+        self.socket = socket
+        self.buffer = b""
+        self.socket.readyRead.connect(self._on_ready_read)
+        self.socket.disconnected.connect(self.disconnected)
+
+    def send(self, message):
+        if self.socket.state() == QLocalSocket.LocalSocketState.ConnectedState:
+            self.socket.write((json.dumps(message) + "\n").encode('utf-8'))
+            self.socket.flush()
+
+    def _on_ready_read(self):
+        self.buffer += bytes(self.socket.readAll())
+        while b"\n" in self.buffer:
+            line, self.buffer = self.buffer.split(b"\n", 1)
+            try:
+                self.message_received.emit(json.loads(line))
+            except ValueError:
+                print(f"[Shard] Mensagem inválida ignorada: {line[:80]!r}")
+
+
+class ShardSupervisor(QObject):
+    """
+    Inicia um processo main.py por shard e mantém o canal de comandos.
+    Um shard que sai com código 0 (janela fechada) não é reiniciado; quando
+    todos saem, o supervisor encerra.
+    """
+    def __init__(self, shard_count, parent=None):
+        super().__init__(parent)
+        self.shard_count = shard_count
+        self.name = server_name()
+        self.shards = {}
+        self.stopping = False
+
+        self.server = QLocalServer(self)
+        self.server.newConnection.connect(self._on_new_connection)
+
+    def start(self):
+        # Remove um canal órfão deixado por um supervisor que travou
+        QLocalServer.removeServer(self.name)
+        if not self.server.listen(self.name):
+            raise RuntimeError(f"Não foi possível abrir o canal {self.name}: "
+                               f"{self.server.errorString()}")
+        print(f"[Shard] Supervisor ouvindo em '{self.name}' com {self.shard_count} shard(s)")
+        for index in range(self.shard_count):
+            # Reinício com backoff após uma queda (cancelável por um restart manual)
+            restart_timer = QTimer(self)
+            restart_timer.setSingleShot(True)
+            restart_timer.timeout.connect(partial(self.spawn, index))
+            self.shards[index] = {
+                'process': None, 'channel': None, 'status': None,
+                'profiles': [], 'restarts': 0, 'restart_requested': False,
+                'running': False, 'restart_timer': restart_timer,
+            }
+            self.spawn(index)
+
+    def worker_command(self, index):
+        args = ["--shard", f"{index}/{self.shard_count}", "--ipc", self.name]
+        if getattr(sys, 'frozen', False):
+            return sys.executable, args
+        main_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+        return sys.executable, [main_path] + args
+
+    def spawn(self, index):
+        if self.stopping:
+            return
+        shard = self.shards[index]
+        shard['restart_timer'].stop()
+        if shard['running']:
+            return
+        process = QProcess(self)
+        process.setProcessChannelMode(QProcess.ProcessChannelMode.ForwardedChannels)
+        process.finished.connect(partial(self._on_finished, index))
+        program, args = self.worker_command(index)
+        process.start(program, args)
+        shard['process'] = process
+        shard['running'] = True
+        print(f"[Shard] Shard {index} iniciado")
+
+    def restart(self, index):
+        shard = self.shards[index]
+        # Em backoff ou fechado pelo usuário: não há processo, inicia agora
+        if not shard['running']:
+            self.spawn(index)
+            return
+        shard['restart_requested'] = True
+        shard['process'].terminate()
+
+    def _on_finished(self, index, exit_code, exit_status):
+        shard = self.shards[index]
+        shard['running'] = False
+        shard['channel'] = None
+        shard['process'].deleteLater()
+        shard['process'] = None
+        if self.stopping:
+            return
+
+        if shard['restart_requested']:
+            shard['restart_requested'] = False
+            self.spawn(index)
+        elif exit_status == QProcess.ExitStatus.NormalExit and exit_code == 0:
+            print(f"[Shard] Shard {index} encerrado pelo usuário")
+            if not any(s['running'] for s in self.shards.values()):
+                QCoreApplication.quit()
+        else:
+            shard['restarts'] += 1
+            delay = min(RESTART_BACKOFF_BASE * 2 ** (shard['restarts'] - 1), RESTART_BACKOFF_MAX)
+            print(f"[Shard] Shard {index} caiu (código {exit_code}); "
+                  f"reiniciando em {delay // 1000}s")
+            shard['restart_timer'].start(delay)
+
+    def stop(self):
+        self.stopping = True
+        for shard in self.shards.values():
+            process = shard['process']
+            if shard['running'] and process is not None:
+                process.terminate()
+                if not process.waitForFinished(5000):
+                    process.kill()
+
+    def _on_new_connection(self):
+        while self.server.hasPendingConnections():
+            channel = LineChannel(self.server.nextPendingConnection(), self)
+            channel.message_received.connect(partial(self._on_message, channel))
+            channel.disconnected.connect(channel.deleteLater)
+
+    def shard_for_profile(self, profile_id):
+        for index, shard in self.shards.items():
+            if profile_id in shard['profiles']:
+                return index
+        return None
+
+    def summary(self):
+        return [
+            {
+                'shard': index,
+                'running': shard['running'],
+                'pid': shard['process'].processId() if shard['running'] else None,
+                'restarts': shard['restarts'],
+                'profiles': shard['profiles'],
+                'instances': (shard['status'] or {}).get('instances', []),
+            }
+            for index, shard in self.shards.items()
+        ]
+
+    def _on_message(self, channel, message):
+        kind = message.get('type')
+        # Mensagens dos trabalhadores
+        if kind == 'hello':
+            shard = self.shards.get(message.get('shard'))
+            if shard is not None:
+                shard['channel'] = channel
+                shard['profiles'] = message.get('profiles', [])
+            return
+        if kind == 'profiles':
+            # Instâncias adicionadas ou encerradas com o shard aberto
+            shard = self.shards.get(message.get('shard'))
+            if shard is not None:
+                shard['profiles'] = message.get('profiles', [])
+            return
+        if kind == 'status':
+            shard = self.shards.get(message.get('shard'))
+            if shard is not None:
+                shard['status'] = message
+            return
+
+        # Comandos de clientes de controle
+        command = message.get('cmd')
+        if command == 'status':
+            channel.send({'ok': True, 'shards': self.summary()})
+        elif command in ('reload', 'focus'):
+            index = self.shard_for_profile(message.get('profile'))
+            worker = self.shards[index]['channel'] if index is not None else None
+            if worker is None:
+                channel.send({'ok': False, 'error': "perfil não encontrado em nenhum shard ativo"})
+                return
+            worker.send({'cmd': command, 'profile': message['profile']})
+            channel.send({'ok': True, 'shard': index})
+        elif command == 'restart':
+            index = message.get('shard')
+            if index not in self.shards:
+                channel.send({'ok': False, 'error': f"shard inexistente: {index}"})
+                return
+            self.restart(index)
+            channel.send({'ok': True, 'shard': index})
+        else:
+            channel.send({'ok': False, 'error': f"comando desconhecido: {command}"})
+
+
+class ShardLink(QObject):
+    """Conexão de um processo trabalhador com o supervisor"""
+    reload_requested = pyqtSignal(str)
+    focus_requested = pyqtSignal(str)
+
+    RECONNECT_INTERVAL = 5000
+
+    def __init__(self, name, index, profiles, parent=None):
+        super().__init__(parent)
+        self.name = name
+        self.index = index
+        self.profiles = profiles
+
+        self.socket = QLocalSocket(self)
+        self.socket.connected.connect(self._on_connected)
+        self.socket.errorOccurred.connect(self._schedule_reconnect)
+        self.channel = LineChannel(self.socket, self)
+        self.channel.message_received.connect(self._on_message)
+        self.channel.disconnected.connect(self._schedule_reconnect)
+        self.socket.connectToServer(self.name)
+
+    def _schedule_reconnect(self, *args):
+        QTimer.singleShot(self.RECONNECT_INTERVAL, self._reconnect)
+
+    def _reconnect(self):
+        if self.socket.state() == QLocalSocket.LocalSocketState.UnconnectedState:
+            self.socket.connectToServer(self.name)
+
+    def _on_connected(self):
+        self.channel.send({'type': 'hello', 'shard': self.index, 'profiles': self.profiles})
+
+    def _on_message(self, message):
+        if message.get('cmd') == 'reload':
+            self.reload_requested.emit(message.get('profile', ''))
+        elif message.get('cmd') == 'focus':
+            self.focus_requested.emit(message.get('profile', ''))
+
+    def update_profiles(self, profiles):
+        """Informa ao supervisor a lista atual (reenviada no próximo hello se desconectado)"""
+        self.profiles = profiles
+        self.channel.send({'type': 'profiles', 'shard': self.index, 'profiles': profiles})
+
+    def send_status(self, instances):
+        self.channel.send({'type': 'status', 'shard': self.index, 'instances': instances})
+
+
+def run_supervisor(shard_count):
+    """Executa o supervisor até todos os shards encerrarem"""
+    app = QCoreApplication(sys.argv)
+
+    # Não criar mais shards do que perfis habilitados
+    enabled = len(ProfileManager().get_enabled_profiles())
+    if enabled == 0:
+        print("Nenhum perfil habilitado! Abra o dashboard.py para configurar.")
+        return 0
+    supervisor = ShardSupervisor(min(shard_count, enabled))
+    app.aboutToQuit.connect(supervisor.stop)
+
+    # Ctrl+C encerra os trabalhadores de forma limpa
+    signal.signal(signal.SIGINT, lambda *args: app.quit())
+    signal.signal(signal.SIGTERM, lambda *args: app.quit())
+    signal_timer = QTimer()
+    signal_timer.timeout.connect(lambda: None)  # devolve o controle ao Python
+    signal_timer.start(500)
+
+    supervisor.start()
+    return app.exec()
+
+
+def send_command(message, timeout=3000):
+    """Envia um comando ao supervisor e retorna a resposta (bloqueante)"""
+    socket = QLocalSocket()
+    socket.connectToServer(server_name())
+    if not socket.waitForConnected(timeout):
+        return {'ok': False, 'error': "supervisor não está em execução"}
+    socket.write((json.dumps(message) + "\n").encode('utf-8'))
+    socket.flush()
+
+    buffer = b""
+    while b"\n" not in buffer:
+        if not socket.waitForReadyRead(timeout):
+            return {'ok': False, 'error': "sem resposta do supervisor"}
+        buffer += bytes(socket.readAll())
+    socket.disconnectFromServer()
+    return json.loads(buffer.split(b"\n", 1)[0])
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] not in ('status', 'reload', 'focus', 'restart'):
+        print(__doc__)
+        sys.exit(1)
+
+    cmd = sys.argv[1]
+    message = {'cmd': cmd}
+    if cmd in ('reload', 'focus'):
+        message['profile'] = sys.argv[2]
+    elif cmd == 'restart':
+        message['shard'] = int(sys.argv[2])
+
+    app = QCoreApplication(sys.argv)
+    response = send_command(message)
+    print(json.dumps(response, indent=4, ensure_ascii=False))
+    sys.exit(0 if response.get('ok') else 1)
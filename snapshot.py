@@ -0,0 +1,359 @@
+"""
+Backup de Sessões - Multi-Zap
+Copia apenas os dados que mantêm o login do WhatsApp (cookies, Local Storage
+e IndexedDB) de cada perfil. Os arquivos são divididos em blocos endereçados
+por SHA-256: um bloco já guardado por qualquer backup anterior não é gravado
+de novo, e arquivos que não mudaram (tamanho + data) nem são relidos. Os
+blocos novos são comprimidos em paralelo
+
+A restauração monta a pasta do perfil ao lado e troca as pastas por rename,
+apenas com o perfil fechado
+
+Uso:
+    python snapshot.py create [perfil ...]     # todos os perfis se omitido
+    python snapshot.py list [perfil]
+    python snapshot.py restore perfil [backup]  # o mais recente se omitido
+    python snapshot.py prune --keep 7           # apaga backups antigos e blocos órfãos
+"""
+import os
+import sys
+import json
+import time
+import zlib
+import shutil
+import hashlib
+import argparse
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from login import ProfileManager, PROFILES_DIR
+import storage
+import ramcache
+
+BACKUP_DIR = os.environ.get("MULTIZAP_BACKUP_DIR", "backups")
+CHUNK_SIZE = 512 * 1024
+# Blocos aguardando gravação por thread (limita a memória no primeiro backup)
+INFLIGHT_PER_WORKER = 4
+COMPRESSION_LEVEL = 6
+
+
+class SnapshotError(Exception):
+    pass
+
+
+class SnapshotStore:
+    """
+    backups/chunks/<aa>/<sha256>          bloco comprimido (zlib)
+    backups/snapshots/<perfil>/<data>.json manifesto: arquivos -> lista de blocos
+    """
+    def __init__(self, directory=BACKUP_DIR, workers=None):
+        self.directory = directory
+        self.chunks_dir = os.path.join(directory, "chunks")
+        self.snapshots_dir = os.path.join(directory, "snapshots")
+        self.workers = workers or min(8, os.cpu_count() or 2)
+        os.makedirs(self.chunks_dir, exist_ok=True)
+        os.makedirs(self.snapshots_dir, exist_ok=True)
+
+    # ---------- blocos ----------
+
+    def _chunk_path(self, digest):
+        return os.path.join(self.chunks_dir, digest[:2], digest)
+
+    def has_chunk(self, digest):
+        return os.path.exists(self._chunk_path(digest))
+
+    def _write_chunk(self, digest, data):
+        """Comprime e grava um bloco (zlib libera o GIL: roda em paralelo)"""
+        path = self._chunk_path(digest)
+        if os.path.exists(path):
+            return 0
+        compressed = zlib.compress(data, COMPRESSION_LEVEL)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, 'wb') as f:
+            f.write(compressed)
+        os.replace(temp_path, path)
+        return len(compressed)
+
+    def read_chunk(self, digest):
+        with open(self._chunk_path(digest), 'rb') as f:
+            data = zlib.decompress(f.read())
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise SnapshotError(f"bloco corrompido: {digest}")
+        return data
+
+    # ---------- manifestos ----------
+
+    def list_snapshots(self, profile_id):
+        directory = os.path.join(self.snapshots_dir, profile_id)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(name[:-5] for name in os.listdir(directory) if name.endswith(".json"))
+
+    def load_manifest(self, profile_id, name=None):
+        names = self.list_snapshots(profile_id)
+        if not names:
+            raise SnapshotError(f"nenhum backup do perfil '{profile_id}'")
+        name = name or names[-1]
+        if name not in names:
+            raise SnapshotError(f"backup inexistente: {profile_id}/{name}")
+        with open(os.path.join(self.snapshots_dir, profile_id, f"{name}.json"), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_manifest(self, profile_id, manifest):
+        directory = os.path.join(self.snapshots_dir, profile_id)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=1, ensure_ascii=False)
+        os.replace(temp_path, os.path.join(directory, f"{manifest['name']}.json"))
+
+    # ---------- backup ----------
+
+    @staticmethod
+    def session_files(profile_dir):
+        """(diretórios, arquivos) relativos das entradas de sessão do perfil"""
+        directories, files = [], []
+        for entry in storage.SESSION_ENTRIES:
+            path = os.path.join(profile_dir, entry)
+            if os.path.isfile(path):
+                files.append(entry)
+            elif os.path.isdir(path):
+                for root, dirnames, filenames in os.walk(path):
+                    relative_root = os.path.relpath(root, profile_dir)
+                    directories.append(relative_root)
+                    files.extend(os.path.join(relative_root, name) for name in filenames)
+        return directories, files
+
+    def create(self, profile_id, profile=None, allow_running=False):
+        """Gera um backup incremental do perfil; retorna o manifesto"""
+        if storage.is_running(profile_id) and not allow_running:
+            raise SnapshotError(f"o perfil '{profile_id}' está aberto (feche-o ou use --live)")
+        profile_dir = storage.profile_path(profile_id)
+        if not os.path.isdir(profile_dir):
+            raise SnapshotError(f"pasta do perfil não encontrada: {profile_dir}")
+
+        # Arquivos iguais ao último backup reaproveitam a lista de blocos sem releitura
+        previous = {}
+        if self.list_snapshots(profile_id):
+            previous = {f['path']: f for f in self.load_manifest(profile_id)['files']}
+
+        started = time.perf_counter()
+        directories, paths = self.session_files(profile_dir)
+        files = []
+        stats = {'files': len(paths), 'reused_files': 0, 'skipped_files': 0, 'bytes': 0,
+                 'new_chunks': 0, 'stored_bytes': 0}
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            writes = deque()
+            max_inflight = self.workers * INFLIGHT_PER_WORKER
+            pending = set()
+            for relative in paths:
+                try:
+                    info = os.stat(os.path.join(profile_dir, relative))
+                except OSError:
+                    continue  # arquivo temporário que sumiu durante a leitura
+                old = previous.get(relative)
+                stats['bytes'] += info.st_size
+                if old and old['size'] == info.st_size and old['mtime_ns'] == info.st_mtime_ns:
+                    files.append(old)
+                    stats['reused_files'] += 1
+                    continue
+
+                chunks = []
+                try:
+                    with open(os.path.join(profile_dir, relative), 'rb') as f:
+                        while True:
+                            data = f.read(CHUNK_SIZE)
+                            if not data:
+                                break
+                            digest = hashlib.sha256(data).hexdigest()
+                            chunks.append(digest)
+                            if digest not in pending and not self.has_chunk(digest):
+                                pending.add(digest)
+                                writes.append(pool.submit(self._write_chunk, digest, data))
+                                stats['new_chunks'] += 1
+                                # Espera as gravações mais antigas antes de ler mais blocos
+                                while len(writes) > max_inflight:
+                                    stats['stored_bytes'] += writes.popleft().result()
+                except OSError as e:
+                    # Removido ou bloqueado pelo Chromium entre o stat e a leitura (--live)
+                    print(f"{profile_id}: aviso, {relative} ignorado ({e})")
+                    stats['bytes'] -= info.st_size
+                    stats['skipped_files'] += 1
+                    continue
+                files.append({'path': relative, 'size': info.st_size,
+                              'mtime_ns': info.st_mtime_ns, 'chunks': chunks})
+            for future in writes:
+                stats['stored_bytes'] += future.result()
+
+        manifest = {
+            'name': time.strftime("%Y%m%d-%H%M%S"),
+            'profile_id': profile_id,
+            'profile': profile,
+            'created': time.time(),
+            'directories': directories,
+            'files': files,
+            'stats': stats,
+        }
+        # Dois backups no mesmo segundo não se sobrescrevem
+        while manifest['name'] in self.list_snapshots(profile_id):
+            manifest['name'] += "b"
+        stats['seconds'] = time.perf_counter() - started
+        self._save_manifest(profile_id, manifest)
+        return manifest
+
+    # ---------- restauração ----------
+
+    def restore(self, profile_id, name=None):
+        """Restaura as entradas de sessão do backup; as demais pastas do perfil são mantidas"""
+        # Pré-criado também conta: o perfil pode ser aberto a qualquer momento
+        if storage.lock_state(profile_id) is not None:
+            raise SnapshotError(f"o perfil '{profile_id}' está aberto; feche-o antes de restaurar")
+        manifest = self.load_manifest(profile_id, name)
+        profile_dir = storage.profile_path(profile_id)
+        os.makedirs(PROFILES_DIR, exist_ok=True)
+
+        # 1) Monta a sessão numa pasta ao lado (mesmo disco: a troca é um rename)
+        staging = tempfile.mkdtemp(prefix=f".restore-{profile_id}-", dir=PROFILES_DIR)
+        try:
+            for directory in manifest['directories']:
+                os.makedirs(os.path.join(staging, directory), exist_ok=True)
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                list(pool.map(lambda entry: self._restore_file(staging, entry), manifest['files']))
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        moved = []
+        previous = None
+        try:
+            # 2) O restante do perfil atual (caches etc.) passa para a pasta nova
+            # A marca de sincronização fica para trás: uma cópia antiga do perfil
+            # na RAM (MULTIZAP_RAM_CACHE=full) não pode sobrescrever a restauração
+            if os.path.isdir(profile_dir):
+                for entry in os.listdir(profile_dir):
+                    if entry in storage.SESSION_ENTRIES or entry == ramcache.SYNC_MARKER:
+                        continue
+                    os.rename(os.path.join(profile_dir, entry), os.path.join(staging, entry))
+                    moved.append(entry)
+
+            # 3) Troca as pastas; a sessão antiga só é apagada depois da troca
+            if os.path.isdir(profile_dir):
+                previous = tempfile.mkdtemp(prefix=f".previous-{profile_id}-", dir=PROFILES_DIR)
+                os.rmdir(previous)
+                os.rename(profile_dir, previous)
+            os.rename(staging, profile_dir)
+        except OSError:
+            # Desfaz: devolve as entradas movidas e a pasta original
+            if previous and not os.path.exists(profile_dir):
+                os.rename(previous, profile_dir)
+            for entry in moved:
+                os.rename(os.path.join(staging, entry), os.path.join(profile_dir, entry))
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        if previous:
+            shutil.rmtree(previous, ignore_errors=True)
+        return manifest
+
+    def _restore_file(self, staging, entry):
+        path = os.path.join(staging, entry['path'])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            for digest in entry['chunks']:
+                f.write(self.read_chunk(digest))
+        os.utime(path, ns=(entry['mtime_ns'], entry['mtime_ns']))
+
+    # ---------- limpeza ----------
+
+    def prune(self, keep):
+        """Mantém os `keep` backups mais recentes de cada perfil e apaga blocos órfãos"""
+        removed_snapshots = 0
+        referenced = set()
+        for profile_id in os.listdir(self.snapshots_dir):
+            names = self.list_snapshots(profile_id)
+            for name in names[:-keep] if keep else names:
+                os.remove(os.path.join(self.snapshots_dir, profile_id, f"{name}.json"))
+                removed_snapshots += 1
+            for name in self.list_snapshots(profile_id):
+                for entry in self.load_manifest(profile_id, name)['files']:
+                    referenced.update(entry['chunks'])
+
+        removed_chunks = freed = 0
+        for root, _, filenames in os.walk(self.chunks_dir):
+            for name in filenames:
+                if name not in referenced:
+                    path = os.path.join(root, name)
+                    freed += os.path.getsize(path)
+                    os.remove(path)
+                    removed_chunks += 1
+        return removed_snapshots, removed_chunks, freed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backup incremental das sessões dos perfis")
+    sub = parser.add_subparsers(dest="command", required=True)
+    create_cmd = sub.add_parser("create", help="gera backups (todos os perfis se nenhum for informado)")
+    create_cmd.add_argument("profiles", nargs="*")
+    create_cmd.add_argument("--live", action="store_true",
+                            help="permite copiar perfis abertos (o backup pode ficar inconsistente)")
+    list_cmd = sub.add_parser("list", help="lista os backups")
+    list_cmd.add_argument("profile", nargs="?")
+    restore_cmd = sub.add_parser("restore", help="restaura a sessão de um perfil fechado")
+    restore_cmd.add_argument("profile")
+    restore_cmd.add_argument("snapshot", nargs="?")
+    prune_cmd = sub.add_parser("prune", help="apaga backups antigos e blocos sem uso")
+    prune_cmd.add_argument("--keep", type=int, default=7)
+    args = parser.parse_args()
+
+    store = SnapshotStore()
+    manager = ProfileManager()
+
+    if args.command == "create":
+        profile_ids = args.profiles or [p['profile_id'] for p in manager.get_all_profiles()]
+        failed = False
+        for profile_id in profile_ids:
+            try:
+                manifest = store.create(profile_id, manager.get_profile(profile_id), args.live)
+            except SnapshotError as e:
+                print(f"{profile_id}: {e}")
+                failed = True
+                continue
+            stats = manifest['stats']
+            print(f"{profile_id}: {manifest['name']} | {stats['files']} arquivos "
+                  f"({stats['reused_files']} sem mudança), {stats['bytes'] / (1024**2):.1f} MB lidos, "
+                  f"{stats['new_chunks']} blocos novos ({stats['stored_bytes'] / (1024**2):.1f} MB gravados) "
+                  f"em {stats['seconds']:.1f}s")
+        return 1 if failed else 0
+
+    if args.command == "list":
+        profile_ids = [args.profile] if args.profile else sorted(os.listdir(store.snapshots_dir))
+        for profile_id in profile_ids:
+            for name in store.list_snapshots(profile_id):
+                manifest = store.load_manifest(profile_id, name)
+                size = sum(f['size'] for f in manifest['files'])
+                print(f"{profile_id:<20} {name:<20} {len(manifest['files']):>6} arquivos "
+                      f"{size / (1024**2):>8.1f} MB")
+        return 0
+
+    if args.command == "restore":
+        try:
+            manifest = store.restore(args.profile, args.snapshot)
+        except SnapshotError as e:
+            print(f"Erro: {e}")
+            return 1
+        # Em uma máquina nova, o perfil volta também para a lista do dashboard
+        profile = manifest.get('profile')
+        if profile and manager.get_profile(args.profile) is None:
+            manager.add_profile(profile['name'], args.profile, profile['color'])
+            manager.flush()
+        print(f"{args.profile}: sessão restaurada do backup {manifest['name']}")
+        return 0
+
+    removed, chunks, freed = store.prune(args.keep)
+    print(f"{removed} backups e {chunks} blocos removidos ({freed / (1024**2):.1f} MB liberados)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
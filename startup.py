@@ -0,0 +1,74 @@
+"""
+Fila de Inicialização - Multi-Zap
+Carrega as instâncias de forma escalonada, com no máximo K páginas carregando
+ao mesmo tempo, priorizando as células visíveis do canto superior esquerdo
+"""
+from functools import partial
+from PyQt6.QtCore import QObject, QTimer
+
+
+class StartupQueue(QObject):
+    """
+    Enfileira instâncias já criadas (exibindo o aviso de espera) e libera o
+    carregamento da próxima a cada loadFinished. Um tempo limite por página
+    evita que um carregamento travado segure a fila inteira.
+    """
+    def __init__(self, concurrency, load_timeout=60000, parent=None):
+        super().__init__(parent)
+        self.concurrency = max(1, concurrency)
+        self.load_timeout = load_timeout
+        self.pending = []  # [(instância, (linha, coluna))]
+        self.loading = {}  # instância -> conexão do loadFinished
+        self.started = False
+
+    def enqueue(self, instance, position):
+        self.pending.append((instance, position))
+        if self.started:
+            self._pump()
+
+    def remove(self, instance):
+        self.pending = [entry for entry in self.pending if entry[0] is not instance]
+        # A vaga de uma instância removida durante o carregamento vai para a próxima
+        if self._release(instance):
+            self._pump()
+
+    def promote(self, instance):
+        """Coloca a instância no início da fila (ex.: usuário clicou nela)"""
+        for entry in self.pending:
+            if entry[0] is instance:
+                self.pending.remove(entry)
+                self.pending.insert(0, (instance, (-1, -1)))
+                break
+        self._pump()
+
+    def start(self):
+        self.started = True
+        self._pump()
+
+    def _priority(self, entry):
+        instance, position = entry
+        # Células fora da área visível ficam por último
+        hidden = instance.visibleRegion().isEmpty()
+        return (position != (-1, -1), hidden, position)
+
+    def _pump(self):
+        if not self.started:
+            return
+        self.pending.sort(key=self._priority)
+        while self.pending and len(self.loading) < self.concurrency:
+            instance, _ = self.pending.pop(0)
+            handler = partial(self._on_load_finished, instance)
+            self.loading[instance] = instance.browser.loadFinished.connect(handler)
+            QTimer.singleShot(self.load_timeout, handler)
+            instance.start()
+
+    def _on_load_finished(self, instance, ok=True):
+        if self._release(instance):
+            self._pump()
+
+    def _release(self, instance):
+        connection = self.loading.pop(instance, None)
+        if connection is None:
+            return False
+        instance.browser.loadFinished.disconnect(connection)
+        return True
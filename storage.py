@@ -0,0 +1,286 @@
+"""
+Armazenamento dos Perfis - Multi-Zap
+Mede em paralelo o tamanho de cada categoria (Cache, GPUCache, CacheStorage,
+IndexedDB, Code Cache...) das pastas em profiles/, aplica cotas e apaga os
+caches descartáveis de perfis que não estão abertos. Dados de sessão
+(cookies, Local Storage, IndexedDB) nunca são tocados
+
+Uso:
+    python storage.py report [--json]
+    python storage.py prune [--quota MB] [--all] [--dry-run]
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import psutil
+from login import PROFILES_DIR
+
+# Caminho relativo dentro da pasta do perfil -> categoria
+CATEGORIES = {
+    'Cache': 'cache',
+    'GPUCache': 'gpu_cache',
+    'GrShaderCache': 'gpu_cache',
+    'ShaderCache': 'gpu_cache',
+    'GraphiteDawnCache': 'gpu_cache',
+    'Code Cache': 'code_cache',
+    os.path.join('Service Worker', 'CacheStorage'): 'cache_storage',
+    os.path.join('Service Worker', 'ScriptCache'): 'service_worker',
+    os.path.join('Service Worker', 'Database'): 'service_worker',
+    'IndexedDB': 'indexeddb',
+    'Local Storage': 'local_storage',
+    'Session Storage': 'session_storage',
+    'Cookies': 'cookies',
+    'Cookies-journal': 'cookies',
+}
+
+# Podem ser apagados com o perfil fechado (o Chromium recria sob demanda)
+DISPOSABLE = ('cache', 'gpu_cache', 'code_cache', 'cache_storage')
+
+# Dados que mantêm a sessão do WhatsApp (login sem QR Code)
+SESSION_ENTRIES = ('Cookies', 'Cookies-journal', 'Local Storage', 'IndexedDB')
+
+# Pastas com subcategorias próprias
+NESTED = ('Service Worker',)
+
+# Marcas de perfil aberto em algum processo do Multi-Zap: ficam fora das pastas
+# dos perfis, que podem ser trocadas por rename (ramcache, snapshot.py restore)
+LOCK_DIR = os.path.join(PROFILES_DIR, ".locks")
+# Marca antiga, dentro da pasta do perfil (nunca copiada nem espelhada)
+LOCK_FILE = ".multizap.lock"
+
+# Cota padrão de caches descartáveis por perfil (MB)
+DEFAULT_QUOTA_MB = int(os.environ.get("MULTIZAP_CACHE_QUOTA_MB", "200"))
+
+
+def profile_path(profile_id):
+    return os.path.join(PROFILES_DIR, profile_id)
+
+
+def lock_path(profile_id):
+    return os.path.join(LOCK_DIR, f"{profile_id}.lock")
+
+
+def mark_running(profile_id, warm=False):
+    """
+    Registra que o perfil está aberto por este processo. warm = só pré-criado
+    (pool, sem página): não conta como aberto para limpeza e backup
+    """
+    os.makedirs(LOCK_DIR, exist_ok=True)
+    with open(lock_path(profile_id), 'w', encoding='utf-8') as f:
+        f.write(f"{os.getpid()} warm" if warm else str(os.getpid()))
+
+
+def clear_running(profile_id):
+    try:
+        os.remove(lock_path(profile_id))
+    except OSError:
+        pass
+
+
+def lock_state(profile_id):
+    """'running' (página aberta), 'warm' (pré-criado) ou None"""
+    try:
+        with open(lock_path(profile_id), 'r', encoding='utf-8') as f:
+            fields = f.read().split()
+        pid = int(fields[0]) if fields else 0
+    except (OSError, ValueError):
+        return None
+    # Marcas de processos que já morreram (ex.: após uma queda) são ignoradas
+    if pid <= 0 or not psutil.pid_exists(pid):
+        return None
+    return 'warm' if 'warm' in fields[1:] else 'running'
+
+
+def is_running(profile_id):
+    """True se algum processo vivo está com uma página aberta no perfil"""
+    return lock_state(profile_id) == 'running'
+
+
+def remove_legacy_cache(path, current_path):
+    """
+    Apaga em segundo plano o cache HTTP do local padrão do Qt
+    (~/.cache/<app>/QtWebEngine/<perfil>), abandonado quando o cache passou
+    para dentro da pasta do perfil. Só age em pastas do QtWebEngine
+    """
+    if not path or os.path.abspath(path) == os.path.abspath(current_path):
+        return
+    if 'QtWebEngine' not in path.split(os.sep) or not os.path.isdir(path):
+        return
+
+    def remove():
+        size = directory_size(path)[0]
+        shutil.rmtree(path, ignore_errors=True)
+        print(f"[Perfis] Cache antigo removido: {path} ({size / (1024**2):.1f} MB)")
+
+    threading.Thread(target=remove, name="legacy-cache-cleanup", daemon=True).start()
+
+
+def list_profile_ids():
+    """Pastas de perfil existentes (ignora pastas ocultas/internas)"""
+    if not os.path.isdir(PROFILES_DIR):
+        return []
+    with os.scandir(PROFILES_DIR) as entries:
+        return sorted(e.name for e in entries if e.is_dir() and not e.name.startswith('.'))
+
+
+def directory_size(path):
+    """Soma (bytes, arquivos) de uma pasta usando os.scandir sem seguir links"""
+    total = files = 0
+    stack = [path]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        else:
+                            total += entry.stat(follow_symlinks=False).st_size
+                            files += 1
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    return total, files
+
+
+def _entry_size(path):
+    if os.path.isdir(path) and not os.path.islink(path):
+        return directory_size(path)
+    try:
+        return os.lstat(path).st_size, 1
+    except OSError:
+        return 0, 0
+
+
+def _profile_units(profile_id):
+    """Entradas de primeiro nível (e as de Service Worker) de um perfil"""
+    base = profile_path(profile_id)
+    units = []
+    try:
+        with os.scandir(base) as entries:
+            for entry in entries:
+                if entry.name in NESTED and entry.is_dir(follow_symlinks=False):
+                    with os.scandir(entry.path) as children:
+                        for child in children:
+                            units.append(os.path.join(entry.name, child.name))
+                else:
+                    units.append(entry.name)
+    except OSError:
+        pass
+    return units
+
+
+def categorize(relative_path):
+    return CATEGORIES.get(relative_path, 'other')
+
+
+def analyze(profile_ids=None, workers=None):
+    """
+    Retorna {profile_id: {'categories': {categoria: bytes}, 'files': n,
+    'total': bytes, 'disposable': bytes, 'running': bool}}
+    """
+    profile_ids = profile_ids if profile_ids is not None else list_profile_ids()
+    tasks = [(pid, unit) for pid in profile_ids for unit in _profile_units(pid)]
+
+    report = {
+        pid: {'categories': {}, 'files': 0, 'total': 0, 'disposable': 0,
+              'running': is_running(pid), 'warm': lock_state(pid) == 'warm'}
+        for pid in profile_ids
+    }
+    with ThreadPoolExecutor(max_workers=workers or min(8, (os.cpu_count() or 2) * 2)) as pool:
+        sizes = pool.map(lambda task: _entry_size(os.path.join(profile_path(task[0]), task[1])), tasks)
+        for (pid, unit), (size, files) in zip(tasks, sizes):
+            entry = report[pid]
+            category = categorize(unit)
+            entry['categories'][category] = entry['categories'].get(category, 0) + size
+            entry['files'] += files
+            entry['total'] += size
+            if category in DISPOSABLE:
+                entry['disposable'] += size
+    return report
+
+
+def prune(report, quota_mb=DEFAULT_QUOTA_MB, prune_all=False, dry_run=False):
+    """
+    Apaga caches descartáveis dos perfis fechados que passaram da cota, do
+    maior para o menor, até voltar à cota. Retorna {profile_id: bytes liberados}
+    """
+    quota = 0 if prune_all else quota_mb * 1024 * 1024
+    freed = {}
+    for profile_id, entry in report.items():
+        if entry['running'] or entry['disposable'] <= quota:
+            continue
+        # Confere de novo: o perfil pode ter sido aberto depois da análise
+        if is_running(profile_id):
+            continue
+
+        excess = entry['disposable'] - quota
+        units = [u for u in _profile_units(profile_id) if categorize(u) in DISPOSABLE]
+        sized = sorted(((_entry_size(os.path.join(profile_path(profile_id), u))[0], u) for u in units),
+                       reverse=True)
+        released = 0
+        for size, unit in sized:
+            if released >= excess:
+                break
+            path = os.path.join(profile_path(profile_id), unit)
+            if not dry_run:
+                if os.path.isdir(path) and not os.path.islink(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        continue
+            released += size
+        if released:
+            freed[profile_id] = released
+    return freed
+
+
+def format_report(report):
+    """Tabela legível com os tamanhos em MB"""
+    columns = ('cache', 'gpu_cache', 'code_cache', 'cache_storage', 'indexeddb', 'total')
+    lines = [f"{'Perfil':<20}" + "".join(f"{c:>15}" for c in columns) + "  Estado"]
+    for profile_id, entry in report.items():
+        values = [entry['categories'].get(c, 0) for c in columns[:-1]] + [entry['total']]
+        state = "aberto" if entry['running'] else "pré-criado" if entry.get('warm') else "fechado"
+        lines.append(f"{profile_id:<20}" + "".join(f"{v / (1024**2):>12.1f} MB" for v in values)
+                     + f"  {state}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Análise e limpeza das pastas de perfis")
+    sub = parser.add_subparsers(dest="command", required=True)
+    report_cmd = sub.add_parser("report", help="mostra o tamanho de cada categoria")
+    report_cmd.add_argument("--json", action="store_true", help="saída em JSON")
+    prune_cmd = sub.add_parser("prune", help="apaga caches descartáveis de perfis fechados")
+    prune_cmd.add_argument("--quota", type=int, default=DEFAULT_QUOTA_MB, help="cota por perfil (MB)")
+    prune_cmd.add_argument("--all", action="store_true", help="apaga todos os caches descartáveis")
+    prune_cmd.add_argument("--dry-run", action="store_true", help="apenas mostra o que seria apagado")
+    args = parser.parse_args()
+
+    report = analyze()
+    if args.command == "report":
+        print(json.dumps(report, indent=4) if args.json else format_report(report))
+        return 0
+
+    freed = prune(report, args.quota, args.all, args.dry_run)
+    verb = "Seriam liberados" if args.dry_run else "Liberados"
+    for profile_id, size in freed.items():
+        print(f"{profile_id}: {verb.lower()} {size / (1024**2):.1f} MB")
+    skipped = [pid for pid, entry in report.items() if entry['running']]
+    if skipped:
+        print(f"Ignorados (abertos): {', '.join(skipped)}")
+    print(f"{verb}: {sum(freed.values()) / (1024**2):.1f} MB")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
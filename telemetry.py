@@ -0,0 +1,122 @@
+"""
+Telemetria de Recursos - Multi-Zap
+Associa cada instância ao seu processo de renderização e amostra RSS, CPU,
+I/O e threads em buffers circulares de tamanho fixo
+"""
+import csv
+import json
+import time
+from collections import deque
+import psutil
+from PyQt6.QtCore import QObject
+
+# Colunas exportadas (na ordem do CSV)
+SAMPLE_FIELDS = ('time', 'profile_id', 'pid', 'rss', 'cpu_percent',
+                 'read_bytes', 'write_bytes', 'threads', 'blocked_requests', 'bytes_saved',
+                 'priority')
+
+
+class TelemetrySampler(QObject):
+    """
+    Cada chamada de sample_all (feita pelo agendador) percorre todas as
+    instâncias registradas. Os objetos psutil.Process são reaproveitados entre
+    amostras para que cpu_percent meça o intervalo desde a coleta anterior.
+    """
+    def __init__(self, history=120, parent=None):
+        super().__init__(parent)
+        self.history = history
+        self.instances = []
+        self.samples = {}    # instância -> deque de amostras
+        self.processes = {}  # pid -> psutil.Process
+
+    def register(self, instance):
+        if instance not in self.instances:
+            self.instances.append(instance)
+            self.samples[instance] = deque(maxlen=self.history)
+
+    def unregister(self, instance):
+        if instance in self.instances:
+            self.instances.remove(instance)
+            self.samples.pop(instance, None)
+
+    def _process(self, pid):
+        process = self.processes.get(pid)
+        if process is None:
+            process = psutil.Process(pid)
+            self.processes[pid] = process
+        return process
+
+    def sample(self, instance):
+        """Coleta uma amostra do renderizador da instância (ou None)"""
+        pid = instance.page.renderProcessPid()
+        if not pid:
+            return None
+        try:
+            process = self._process(pid)
+            with process.oneshot():
+                memory = process.memory_info()
+                cpu = process.cpu_percent()
+                threads = process.num_threads()
+                try:
+                    io = process.io_counters()
+                    read_bytes, write_bytes = io.read_bytes, io.write_bytes
+                except (AttributeError, psutil.AccessDenied):
+                    # io_counters não existe no macOS
+                    read_bytes = write_bytes = 0
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            self.processes.pop(pid, None)
+            return None
+
+        # Contadores do filtro de requisições do perfil
+        request_filter = instance.request_filter
+        return {
+            'time': time.time(),
+            'profile_id': instance.profile_name,
+            'pid': pid,
+            'rss': memory.rss,
+            'cpu_percent': cpu,
+            'read_bytes': read_bytes,
+            'write_bytes': write_bytes,
+            'threads': threads,
+            'blocked_requests': request_filter.blocked if request_filter else 0,
+            'bytes_saved': request_filter.bytes_saved if request_filter else 0,
+            'priority': instance.priority_level,
+        }
+
+    def sample_all(self):
+        live_pids = set()
+        for instance in self.instances:
+            sample = self.sample(instance)
+            if sample is None:
+                continue
+            live_pids.add(sample['pid'])
+            self.samples[instance].append(sample)
+            instance.show_telemetry(sample)
+
+        # Descartar processos que já morreram (ex.: páginas descartadas)
+        for pid in list(self.processes):
+            if pid not in live_pids:
+                del self.processes[pid]
+
+    def latest(self, instance):
+        buffer = self.samples.get(instance)
+        return buffer[-1] if buffer else None
+
+    def all_samples(self):
+        rows = []
+        for buffer in self.samples.values():
+            rows.extend(buffer)
+        return sorted(rows, key=lambda row: row['time'])
+
+    def export_json(self, path):
+        data = {}
+        for instance, buffer in self.samples.items():
+            data[instance.profile_name] = list(buffer)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=4)
+
+    def export_csv(self, path):
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=SAMPLE_FIELDS)
+            writer.writeheader()
+            writer.writerows(self.all_samples())
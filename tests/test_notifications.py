@@ -0,0 +1,7 @@
+import notifications
+
+
+def test_tray_icon_is_not_null_without_window_icon(qapp):
+    # Nenhuma janela do Multi-Zap define setWindowIcon
+    assert qapp.windowIcon().isNull()
+    assert not notifications.tray_icon().isNull()
@@ -0,0 +1,258 @@
+"""
+Rastreamento - Multi-Zap
+Linha do tempo da inicialização e do ciclo de vida das instâncias no formato
+de trace events do Chrome (abra o arquivo em chrome://tracing ou
+ui.perfetto.dev). Cada instância vira uma trilha com a criação do perfil,
+o setup_browser, a injeção dos scripts, o carregamento (início, progresso e
+fim), pedidos de permissão, keep-alive, falhas e recuperação; a trilha
+"Interface" mostra as fases da abertura e as tarefas do agendador
+
+Opcionalmente o cProfile registra as funções Python da thread da interface
+
+    python main.py --trace                     # trace_AAAAMMDD_HHMMSS.json
+    python main.py --trace lento.json --profile lento.prof
+    python tracing.py merge total.json trace.shard*.json   # junta os fragmentos
+
+Desligado (padrão), cada ponto de medição custa apenas uma verificação
+"""
+import os
+import sys
+import json
+import time
+import atexit
+import argparse
+from collections import deque
+from contextlib import nullcontext
+
+TRACE_OUTPUT = os.environ.get("MULTIZAP_TRACE", "")
+PROFILE_OUTPUT = os.environ.get("MULTIZAP_PROFILE", "")
+# Eventos guardados (os mais antigos são descartados em sessões longas)
+MAX_EVENTS = int(os.environ.get("MULTIZAP_TRACE_MAX_EVENTS", "500000"))
+
+MAIN_TRACK = 1
+PROFILE_TOP = 25  # funções exibidas no resumo do cProfile
+
+
+def default_trace_path():
+    return time.strftime("trace_%Y%m%d_%H%M%S.json")
+
+
+def default_profile_path():
+    return time.strftime("profile_%Y%m%d_%H%M%S.prof")
+
+
+def shard_path(path, shard):
+    """trace.json -> trace.shard1.json (um arquivo por processo trabalhador)"""
+    if shard is None:
+        return path
+    stem, extension = os.path.splitext(path)
+    return f"{stem}.shard{shard[0]}{extension}"
+
+
+def _now():
+    # Relógio monotônico do sistema: trilhas de processos diferentes se alinham
+    return time.perf_counter_ns() // 1000
+
+
+class _Span:
+    """Evento completo (ph X) medido do __enter__ ao __exit__"""
+    __slots__ = ('tracer', 'name', 'category', 'track', 'args', 'started')
+
+    def __init__(self, tracer, name, category, track, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.track = track
+        self.args = args
+
+    def __enter__(self):
+        self.started = _now()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        self.tracer.complete(self.name, self.category, self.track, self.started, _now(), self.args)
+        return False
+
+
+class Tracer:
+    """Acumula os eventos em memória; o arquivo é gravado ao fechar"""
+    def __init__(self, path, process_name="Multi-Zap"):
+        self.path = path
+        self.pid = os.getpid()
+        self.events = deque(maxlen=MAX_EVENTS)
+        # Nomes de processo/trilhas ficam fora do buffer (nunca descartados)
+        self.metadata = []
+        self.open_spans = {}  # chave -> (nome, categoria, trilha, início, args)
+        self.next_track = MAIN_TRACK + 1
+        self.written = False
+        self._meta('process_name', 0, process_name)
+        self._meta('thread_name', MAIN_TRACK, "Interface")
+
+    def _meta(self, kind, track, name):
+        self.metadata.append({'ph': 'M', 'name': kind, 'pid': self.pid, 'tid': track,
+                              'args': {'name': name}})
+
+    def track(self, label):
+        """Nova trilha (ex.: uma por instância)"""
+        track = self.next_track
+        self.next_track += 1
+        self._meta('thread_name', track, label)
+        self.metadata.append({'ph': 'M', 'name': 'thread_sort_index', 'pid': self.pid,
+                              'tid': track, 'args': {'sort_index': track}})
+        return track
+
+    def complete(self, name, category, track, started, finished, args):
+        self.events.append({'ph': 'X', 'name': name, 'cat': category, 'pid': self.pid,
+                            'tid': track, 'ts': started, 'dur': finished - started, 'args': args})
+
+    def span(self, name, category, track, args):
+        return _Span(self, name, category, track, args)
+
+    def begin(self, key, name, category, track, args):
+        """Início de um intervalo que termina em outro callback (ex.: carregamento)"""
+        self.open_spans[key] = (name, category, track, _now(), args)
+
+    def end(self, key, args):
+        entry = self.open_spans.pop(key, None)
+        if entry is None:
+            return
+        name, category, track, started, begin_args = entry
+        begin_args.update(args)
+        self.complete(name, category, track, started, _now(), begin_args)
+
+    def instant(self, name, category, track, args):
+        self.events.append({'ph': 'i', 's': 't', 'name': name, 'cat': category, 'pid': self.pid,
+                            'tid': track, 'ts': _now(), 'args': args})
+
+    def counter(self, name, values):
+        self.events.append({'ph': 'C', 'name': name, 'pid': self.pid, 'ts': _now(), 'args': values})
+
+    def write(self):
+        """Grava o JSON (intervalos ainda abertos terminam agora)"""
+        for key in list(self.open_spans):
+            self.end(key, {'unfinished': True})
+        payload = {'traceEvents': self.metadata + list(self.events), 'displayTimeUnit': 'ms'}
+        temporary = f"{self.path}.tmp"
+        try:
+            with open(temporary, 'w', encoding='utf-8') as f:
+                json.dump(payload, f, separators=(',', ':'))
+            os.replace(temporary, self.path)
+        except OSError as e:
+            print(f"[Trace] Erro ao gravar {self.path}: {e}")
+            return
+        self.written = True
+        print(f"[Trace] {len(self.events)} eventos gravados em {self.path}")
+
+
+_tracer = None
+_profiler = None
+_profile_path = None
+
+
+def start(shard=None):
+    """
+    Liga o rastreamento e/ou o cProfile conforme MULTIZAP_TRACE/MULTIZAP_PROFILE
+    (definidas pelas opções --trace/--profile e herdadas pelos fragmentos)
+    """
+    global _tracer, _profiler, _profile_path
+    trace_output = os.environ.get("MULTIZAP_TRACE", TRACE_OUTPUT)
+    profile_output = os.environ.get("MULTIZAP_PROFILE", PROFILE_OUTPUT)
+    if trace_output and _tracer is None:
+        name = "Multi-Zap" if shard is None else f"Multi-Zap fragmento {shard[0]}/{shard[1]}"
+        _tracer = Tracer(shard_path(trace_output, shard), name)
+        print(f"[Trace] Gravando linha do tempo em {_tracer.path}")
+    if profile_output and _profiler is None:
+        import cProfile
+        _profile_path = shard_path(profile_output, shard)
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+        print(f"[Trace] cProfile ativo ({_profile_path})")
+    if _tracer is not None or _profiler is not None:
+        atexit.register(finish)
+
+
+def finish():
+    """Grava o trace e o perfil (chamado ao fechar a janela e na saída do processo)"""
+    global _profiler
+    if _tracer is not None and not _tracer.written:
+        _tracer.write()
+    if _profiler is not None:
+        import pstats
+        _profiler.disable()
+        try:
+            _profiler.dump_stats(_profile_path)
+            print(f"[Trace] cProfile gravado em {_profile_path} (funções mais custosas):")
+            pstats.Stats(_profiler).sort_stats('cumulative').print_stats(PROFILE_TOP)
+        except OSError as e:
+            print(f"[Trace] Erro ao gravar {_profile_path}: {e}")
+        _profiler = None
+
+
+def enabled():
+    return _tracer is not None
+
+
+def track(label):
+    """Trilha de uma instância (0 com o rastreamento desligado)"""
+    return _tracer.track(label) if _tracer is not None else 0
+
+
+def span(name, category='app', track=MAIN_TRACK, **args):
+    """with tracing.span('create_profile', 'profile', profile=...): ..."""
+    if _tracer is None:
+        return nullcontext()
+    return _tracer.span(name, category, track or MAIN_TRACK, args)
+
+
+def begin(key, name, category='app', track=MAIN_TRACK, **args):
+    if _tracer is not None:
+        _tracer.begin(key, name, category, track or MAIN_TRACK, args)
+
+
+def end(key, **args):
+    if _tracer is not None:
+        _tracer.end(key, args)
+
+
+def instant(name, category='app', track=MAIN_TRACK, **args):
+    if _tracer is not None:
+        _tracer.instant(name, category, track or MAIN_TRACK, args)
+
+
+def counter(name, **values):
+    if _tracer is not None:
+        _tracer.counter(name, values)
+
+
+def merge(output, inputs):
+    """Junta os traces dos fragmentos num único arquivo"""
+    events = []
+    for path in inputs:
+        with open(path, 'r', encoding='utf-8') as f:
+            events += json.load(f).get('traceEvents', [])
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, separators=(',', ':'))
+    return len(events)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ferramentas dos traces do Multi-Zap")
+    sub = parser.add_subparsers(dest="command", required=True)
+    merge_cmd = sub.add_parser("merge", help="junta os traces dos fragmentos (--shards)")
+    merge_cmd.add_argument("output", help="arquivo de saída")
+    merge_cmd.add_argument("inputs", nargs="+", help="traces de entrada")
+    args = parser.parse_args()
+
+    try:
+        count = merge(args.output, args.inputs)
+    except (OSError, ValueError) as e:
+        print(f"Erro ao juntar os traces: {e}")
+        return 1
+    print(f"{count} eventos gravados em {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,254 @@
+"""
+Scripts de Usuário - Multi-Zap
+Estilos e ajustes das páginas são registrados uma única vez em cada perfil
+como QWebEngineScript na criação do documento: valem desde o primeiro quadro
+(sem o cabeçalho piscando sem cor), sobrevivem a recarregamentos, navegações
+e à recriação da página, e não custam nada ao carregar
+
+Pacotes embutidos:
+    coloring      cor da conta no cabeçalho e na lateral
+    performance   sem animações/transições, texto e imagens mais leves, GC após carregar
+    lazy_media    imagens/iframes com loading=lazy e vídeos/áudios sem pré-carregamento
+
+Configuração (userscripts.json, opcional):
+    {"default": ["coloring", "performance"], "profiles": {"zap_vendas": ["coloring"]}}
+Arquivos extras: userscripts/*.css|*.js (todos os perfis) e userscripts/<perfil>/*.css|*.js
+
+Cada script leva a versão (hash do conteúdo) no nome e registra o próprio
+tempo de execução em window.__multizapTimings (mundo isolado da aplicação)
+"""
+import os
+import json
+import time
+import hashlib
+from PyQt6.QtWebEngineCore import QWebEngineScript
+
+USERSCRIPTS_CONFIG = "userscripts.json"
+USERSCRIPTS_DIR = "userscripts"
+DEFAULT_BUNDLES = ('coloring', 'performance', 'lazy_media')
+NAME_PREFIX = "multizap/"
+
+InjectionPoint = QWebEngineScript.InjectionPoint
+APPLICATION_WORLD = QWebEngineScript.ScriptWorldId.ApplicationWorld
+
+# Insere (ou substitui) um <style>; antes de existir <html>, espera por ele
+STYLE_HELPER = """
+function __multizapStyle(id, css) {
+    function insert() {
+        var root = document.head || document.documentElement;
+        if (!root) return false;
+        var style = document.getElementById(id) || document.createElement('style');
+        style.id = id;
+        style.textContent = css;
+        if (!style.parentNode) root.appendChild(style);
+        return true;
+    }
+    if (!insert()) {
+        new MutationObserver(function(mutations, observer) {
+            if (insert()) observer.disconnect();
+        }).observe(document, {childList: true});
+    }
+}
+"""
+
+# Mede o script e guarda a duração (ms) pelo nome
+TIMING_WRAPPER = """(function() {
+    var started = performance.now();
+    try {
+%(body)s
+    } finally {
+        var timings = window.__multizapTimings || (window.__multizapTimings = {});
+        timings[%(name)s] = performance.now() - started;
+    }
+})();"""
+
+COLORING_CSS = """
+header { background-color: %(color)s !important; }
+#side { border-right: 5px solid %(color)s !important; }
+"""
+
+PERFORMANCE_CSS = """
+*, *::before, *::after {
+    animation-duration: 0s !important;
+    animation-delay: 0s !important;
+    transition-duration: 0s !important;
+    transition-delay: 0s !important;
+    scroll-behavior: auto !important;
+    -webkit-font-smoothing: antialiased;
+    text-rendering: optimizeSpeed;
+}
+img { image-rendering: -webkit-optimize-contrast; }
+"""
+
+GC_SCRIPT = """
+// Liberar memória do garbage collector após 5 segundos
+setTimeout(function() { if (window.gc) window.gc(); }, 5000);
+"""
+
+LAZY_MEDIA_SCRIPT = """
+function lazy(node) {
+    if (node.tagName === 'IMG' || node.tagName === 'IFRAME') {
+        if (!node.hasAttribute('loading')) node.setAttribute('loading', 'lazy');
+        if (node.tagName === 'IMG' && !node.hasAttribute('decoding')) node.setAttribute('decoding', 'async');
+    } else if ((node.tagName === 'VIDEO' || node.tagName === 'AUDIO') && !node.autoplay) {
+        if (!node.hasAttribute('preload')) node.setAttribute('preload', 'none');
+    }
+}
+new MutationObserver(function(mutations) {
+    for (var i = 0; i < mutations.length; i++) {
+        var added = mutations[i].addedNodes;
+        for (var j = 0; j < added.length; j++) {
+            var node = added[j];
+            if (node.nodeType !== 1) continue;
+            lazy(node);
+            if (node.firstElementChild) node.querySelectorAll('img, iframe, video, audio').forEach(lazy);
+        }
+    }
+}).observe(document, {childList: true, subtree: true});
+"""
+
+
+def _style(style_id, css):
+    return f"{STYLE_HELPER}\n__multizapStyle({json.dumps(style_id)}, {json.dumps(css)});"
+
+
+def _bundle_scripts(bundle, color):
+    """(nome, código, ponto de injeção) de um pacote embutido"""
+    if bundle == 'coloring':
+        return [('coloring', _style('multizap-coloring', COLORING_CSS % {'color': color}),
+                 InjectionPoint.DocumentCreation)]
+    if bundle == 'performance':
+        return [('performance-css', _style('multizap-performance', PERFORMANCE_CSS),
+                 InjectionPoint.DocumentCreation),
+                ('gc', GC_SCRIPT, InjectionPoint.Deferred)]
+    if bundle == 'lazy_media':
+        return [('lazy-media', LAZY_MEDIA_SCRIPT, InjectionPoint.DocumentCreation)]
+    return []
+
+
+def _file_scripts(directory, label):
+    """Arquivos .css/.js de uma pasta de scripts do usuário"""
+    scripts = []
+    if not os.path.isdir(directory):
+        return scripts
+    for filename in sorted(os.listdir(directory)):
+        path = os.path.join(directory, filename)
+        stem, extension = os.path.splitext(filename)
+        if extension not in ('.css', '.js') or not os.path.isfile(path):
+            continue
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                source = f.read()
+        except OSError as e:
+            print(f"[Scripts] Erro ao ler {path}: {e}")
+            continue
+        if extension == '.css':
+            source = _style(f"multizap-user-{label}-{stem}", source)
+        scripts.append((f"{label}/{stem}", source, InjectionPoint.DocumentCreation))
+    return scripts
+
+
+class ScriptLibrary:
+    """Monta e compila (uma vez por conteúdo) os scripts de cada perfil"""
+    def __init__(self):
+        self.config = self._load_config()
+        self.compiled = {}  # (nome, versão) -> QWebEngineScript
+        self.install_times = {}  # profile_id -> ms
+
+    @staticmethod
+    def _load_config():
+        if not os.path.exists(USERSCRIPTS_CONFIG):
+            return {}
+        try:
+            with open(USERSCRIPTS_CONFIG, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[Scripts] Erro ao ler {USERSCRIPTS_CONFIG}: {e}")
+            return {}
+
+    def bundles_for(self, profile_id):
+        profiles = self.config.get('profiles', {})
+        if profile_id in profiles:
+            return list(profiles[profile_id])
+        return list(self.config.get('default', DEFAULT_BUNDLES))
+
+    def sources_for(self, profile_id, color):
+        """[(nome completo, código, ponto de injeção)] do perfil"""
+        sources = []
+        for bundle in self.bundles_for(profile_id):
+            for name, source, point in _bundle_scripts(bundle, color):
+                sources.append((f"{bundle}/{name}", source, point))
+        sources += _file_scripts(USERSCRIPTS_DIR, "user")
+        sources += _file_scripts(os.path.join(USERSCRIPTS_DIR, profile_id), "profile")
+        return sources
+
+    def compile(self, name, source, point):
+        version = hashlib.sha1(source.encode('utf-8')).hexdigest()[:8]
+        key = (name, version)
+        script = self.compiled.get(key)
+        if script is None:
+            script = QWebEngineScript()
+            script.setName(f"{NAME_PREFIX}{name}@{version}")
+            script.setSourceCode(TIMING_WRAPPER % {'body': source, 'name': json.dumps(name)})
+            script.setInjectionPoint(point)
+            script.setWorldId(APPLICATION_WORLD)
+            script.setRunsOnSubFrames(False)
+            self.compiled[key] = script
+        return script
+
+    def install(self, profile, profile_id, color):
+        """
+        Registra os scripts na coleção do perfil: versões iguais ficam, as
+        antigas e as de pacotes removidos saem. Retorna os scripts instalados
+        """
+        started = time.perf_counter()
+        scripts = [self.compile(*entry) for entry in self.sources_for(profile_id, color)]
+        wanted = {script.name() for script in scripts}
+
+        collection = profile.scripts()
+        existing = set()
+        for script in collection.toList():
+            name = script.name()
+            if not name.startswith(NAME_PREFIX):
+                continue
+            if name in wanted:
+                existing.add(name)
+            else:
+                collection.remove(script)
+        for script in scripts:
+            if script.name() not in existing:
+                collection.insert(script)
+
+        self.install_times[profile_id] = (time.perf_counter() - started) * 1000
+        return scripts
+
+    def stats(self):
+        return {
+            'compiled': len(self.compiled),
+            'install_ms': {profile_id: round(ms, 2) for profile_id, ms in self.install_times.items()},
+        }
+
+
+_library = None
+
+
+def script_library():
+    """Biblioteca única do processo (a configuração é lida uma vez)"""
+    global _library
+    if _library is None:
+        _library = ScriptLibrary()
+    return _library
+
+
+def apply_now(page, scripts, bundle):
+    """Executa na página atual os scripts de um pacote (ex.: cor trocada)"""
+    prefix = f"{NAME_PREFIX}{bundle}/"
+    for script in scripts:
+        if script.name().startswith(prefix):
+            page.runJavaScript(script.sourceCode(), APPLICATION_WORLD)
+
+
+def collect_timings(page, callback):
+    """Entrega a callback o dict {script: ms} medido na página atual"""
+    page.runJavaScript("JSON.stringify(window.__multizapTimings || {})", APPLICATION_WORLD,
+                       lambda result: callback({name: round(ms, 2) for name, ms in json.loads(result or '{}').items()}))
@@ -0,0 +1,75 @@
+"""
+Partida a Quente - Multi-Zap
+Inicializa o QtWebEngine e pré-cria os perfis em segundo plano enquanto o
+dashboard está aberto, para que a grade abra no mesmo processo sem esperar
+a inicialização do Chromium. A grade mantém um pool pequeno do mesmo tipo
+para que uma conta habilitada com o app aberto apareça na hora
+"""
+from PyQt6.QtCore import QObject, QTimer, QUrl
+from PyQt6.QtWebEngineCore import QWebEngineProfile, QWebEnginePage
+
+
+class WarmPool(QObject):
+    """
+    Cria um perfil por volta do loop de eventos (o dashboard continua
+    respondendo) e os entrega à grade via take(). A primeira volta abre uma
+    página em branco no perfil padrão, o que sobe o processo do Chromium.
+    """
+    def __init__(self, create_profile, parent=None, boot=True):
+        super().__init__(parent)
+        self.create_profile = create_profile
+        self.profiles = {}  # profile_id -> QWebEngineProfile pronto
+        self.queue = []
+        # Sem boot (Chromium já iniciado) nenhuma página em branco é aberta
+        self.boot_page = None if boot else False
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(0)
+        self.timer.timeout.connect(self._warm_next)
+
+    def prewarm(self, profile_ids):
+        for profile_id in profile_ids:
+            if profile_id not in self.profiles and profile_id not in self.queue:
+                self.queue.append(profile_id)
+        if self.queue or self.boot_page is None:
+            self.timer.start()
+
+    def _warm_next(self):
+        if self.boot_page is None:
+            self.boot_page = QWebEnginePage(QWebEngineProfile.defaultProfile(), self)
+            self.boot_page.setUrl(QUrl("about:blank"))
+            return
+        if not self.queue:
+            self.timer.stop()
+            return
+        profile_id = self.queue.pop(0)
+        self.profiles[profile_id] = self.create_profile(profile_id, self)
+        print(f"[Partida a quente] Perfil pronto: {profile_id}")
+
+    def take(self, profile_id):
+        """Entrega o perfil pré-criado (ou None se ainda não estiver pronto)"""
+        if profile_id in self.queue:
+            self.queue.remove(profile_id)
+        return self.profiles.pop(profile_id, None)
+
+    def adopt(self, profile_id, profile):
+        """Guarda o perfil de uma instância removida para reutilizá-lo"""
+        profile.setParent(self)
+        self.profiles[profile_id] = profile
+
+    def discard(self, profile_id):
+        if profile_id in self.queue:
+            self.queue.remove(profile_id)
+        profile = self.profiles.pop(profile_id, None)
+        if profile is not None:
+            profile.deleteLater()
+
+    def release_unused(self):
+        """Libera a página de inicialização e os perfis que não foram usados"""
+        self.timer.stop()
+        self.queue.clear()
+        if self.boot_page:
+            self.boot_page.deleteLater()
+        for profile in self.profiles.values():
+            profile.deleteLater()
+        self.profiles.clear()
@@ -0,0 +1,251 @@
+"""
+Vigia do Laço de Eventos - Multi-Zap
+Quando a grade congela é preciso saber se o culpado é código Python, uma
+janela modal ou o IPC do Chromium. Um timer na thread da interface mede o
+atraso de cada despertar (quanto o laço de eventos demorou a atendê-lo) e
+acumula um histograma; uma thread vigia percebe quando o laço para de
+responder e grava as pilhas de todas as threads Python (faulthandler) junto
+com os callbacks marcados que estavam rodando (keep-alive, on_load_finished,
+grant_permission, tarefas do agendador...)
+
+Se a pilha da thread principal termina em app.exec(), a interface estava
+presa fora do Python (Qt/Chromium); caso contrário ela mostra a linha exata
+
+Configuração:
+    MULTIZAP_WATCHDOG=0                 desliga
+    MULTIZAP_WATCHDOG_TICK_MS=500       intervalo da medição
+    MULTIZAP_WATCHDOG_STALL_MS=1000     atraso considerado travamento
+    MULTIZAP_WATCHDOG_LOG=watchdog_stalls.log
+"""
+import os
+import sys
+import json
+import time
+import threading
+import traceback
+import functools
+import faulthandler
+from collections import deque
+from contextlib import nullcontext
+from PyQt6.QtCore import QObject, QTimer, Qt
+import tracing
+
+ENABLED = os.environ.get("MULTIZAP_WATCHDOG", "1") != "0"
+TICK_INTERVAL = int(os.environ.get("MULTIZAP_WATCHDOG_TICK_MS", "500"))
+STALL_THRESHOLD = int(os.environ.get("MULTIZAP_WATCHDOG_STALL_MS", "1000"))
+STALL_LOG = os.environ.get("MULTIZAP_WATCHDOG_LOG", "watchdog_stalls.log")
+
+# Limites superiores (ms) das faixas do histograma; a última faixa é "acima de 5000"
+BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+MAX_DUMPS = 20  # pilhas gravadas por sessão (travamentos seguintes só são contados)
+STALL_HISTORY = 50
+
+# Callbacks marcados em execução na thread da interface: [(nome, rótulo)]
+_callbacks = []
+_active = False
+
+
+class _Marker:
+    __slots__ = ('entry',)
+
+    def __init__(self, name, label):
+        self.entry = (name, label)
+
+    def __enter__(self):
+        _callbacks.append(self.entry)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _callbacks.pop()
+        return False
+
+
+def callback(name, label=None):
+    """with watchdog.callback('keep_alive', 'Vendas'): ... (identifica travamentos)"""
+    if not _active:
+        return nullcontext()
+    return _Marker(name, label)
+
+
+def marked(method):
+    """Marca um método de instância (rótulo = título da instância)"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if not _active:
+            return method(self, *args, **kwargs)
+        with _Marker(method.__name__, getattr(self, 'instance_title', None)):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def current_callbacks():
+    """Descrição dos callbacks marcados ativos (lida pela thread vigia)"""
+    entries = list(_callbacks)
+    return " > ".join(f"{name} ({label})" if label else name for name, label in entries)
+
+
+def bucket_index(lag_ms):
+    for index, limit in enumerate(BUCKETS):
+        if lag_ms <= limit:
+            return index
+    return len(BUCKETS)
+
+
+class LoopWatchdog(QObject):
+    """
+    O timer é de disparo único e rearmado a cada despertar: o atraso medido é
+    só o do laço de eventos, sem acumular. A thread vigia apenas lê o horário
+    do último despertar, então o custo com a interface saudável é um timer a
+    cada TICK_INTERVAL e uma verificação por fração do limite. A medição só
+    começa com o laço de eventos rodando (a construção síncrona da janela e
+    das instâncias não é um travamento)
+    """
+    def __init__(self, interval=TICK_INTERVAL, threshold=STALL_THRESHOLD, log_path=STALL_LOG, parent=None):
+        super().__init__(parent)
+        self.interval = interval / 1000
+        self.threshold = threshold / 1000
+        self.log_path = log_path
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.ticks = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+        self.stalls = deque(maxlen=STALL_HISTORY)
+        self.stall_count = 0
+        self.dumps = 0
+        self.main_thread_id = threading.get_ident()
+
+        # Estado compartilhado com a thread vigia (atribuições simples sob o GIL)
+        self.last_beat = time.monotonic()
+        self.stalled_at = None  # (último despertar visto, callbacks) do travamento em curso
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.timer.timeout.connect(self._beat)
+
+        self._stop = threading.Event()
+        self.thread = threading.Thread(target=self._watch, name="multizap-watchdog", daemon=True)
+        QTimer.singleShot(0, self.start)
+
+    def start(self):
+        """Chamado na primeira volta do laço de eventos"""
+        global _active
+        if self._stop.is_set() or self.thread.is_alive():
+            return
+        self.last_beat = time.monotonic()
+        self.timer.start(int(self.interval * 1000))
+        self.thread.start()
+        _active = True
+
+    def _beat(self):
+        now = time.monotonic()
+        previous = self.last_beat
+        lag = max(0.0, now - previous - self.interval)
+        self.last_beat = now
+        self.timer.start(int(self.interval * 1000))
+
+        lag_ms = lag * 1000
+        self.ticks += 1
+        self.total_lag += lag_ms
+        self.max_lag = max(self.max_lag, lag_ms)
+        self.counts[bucket_index(lag_ms)] += 1
+
+        stalled = self.stalled_at
+        if stalled is not None:
+            self.stalled_at = None
+            # Marcado a partir de um despertar anterior ao último: a vigia leu um
+            # horário que já tinha sido atualizado, não houve travamento
+            if stalled[0] == previous:
+                self._record_stall(lag_ms, stalled[1])
+
+    def _record_stall(self, lag_ms, callbacks):
+        self.stall_count += 1
+        self.stalls.append({'time': time.strftime("%H:%M:%S"), 'lag_ms': round(lag_ms),
+                            'callbacks': callbacks})
+        where = f" em {callbacks}" if callbacks else ""
+        print(f"[Watchdog] Interface travada por {lag_ms / 1000:.1f}s{where}")
+        tracing.instant('stall', 'watchdog', lag_ms=round(lag_ms), callbacks=callbacks)
+
+    def _watch(self):
+        check = min(self.threshold, self.interval) / 4
+        while not self._stop.wait(check):
+            beat = self.last_beat
+            lag = time.monotonic() - beat - self.interval
+            if lag < self.threshold or self.stalled_at is not None:
+                continue
+            callbacks = current_callbacks()
+            self.stalled_at = (beat, callbacks)
+            # A interface respondeu entre a leitura e a marcação
+            if self.last_beat != beat:
+                self.stalled_at = None
+                continue
+            self._dump(lag, callbacks)
+
+    def _main_frame(self):
+        """Linha em que a thread da interface está parada"""
+        frame = sys._current_frames().get(self.main_thread_id)
+        if frame is None:
+            return "?"
+        entry = traceback.extract_stack(frame, limit=1)[-1]
+        return f"{os.path.basename(entry.filename)}:{entry.lineno} {entry.name}"
+
+    def _dump(self, lag, callbacks):
+        where = f" em {callbacks}" if callbacks else ""
+        location = self._main_frame()
+        if self.dumps >= MAX_DUMPS:
+            print(f"[Watchdog] Interface parada há {lag:.1f}s{where} ({location})")
+            return
+        self.dumps += 1
+        try:
+            with open(self.log_path, 'a', encoding='utf-8') as f:
+                f.write(f"\n=== {time.strftime('%Y-%m-%d %H:%M:%S')} interface parada há {lag:.2f}s"
+                        f"{where} ({location})\n")
+                f.flush()
+                faulthandler.dump_traceback(file=f, all_threads=True)
+        except OSError as e:
+            print(f"[Watchdog] Erro ao gravar {self.log_path}: {e}")
+            return
+        print(f"[Watchdog] Interface parada há {lag:.1f}s{where} ({location}) - pilhas em {self.log_path}")
+
+    def percentile(self, fraction):
+        """Limite superior da faixa do histograma que contém o percentil"""
+        if not self.ticks:
+            return 0
+        target = self.ticks * fraction
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return BUCKETS[index] if index < len(BUCKETS) else round(self.max_lag)
+        return round(self.max_lag)
+
+    def stats(self):
+        return {
+            'ticks': self.ticks,
+            'mean_ms': round(self.total_lag / self.ticks, 2) if self.ticks else 0,
+            'p50_ms': self.percentile(0.50),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': round(self.max_lag),
+            'stalls': self.stall_count,
+            'dumps': self.dumps,
+        }
+
+    def export_json(self, path):
+        """Histograma completo e últimos travamentos, para análise"""
+        labels = [f"<={limit}" for limit in BUCKETS] + [f">{BUCKETS[-1]}"]
+        data = {
+            'interval_ms': round(self.interval * 1000),
+            'threshold_ms': round(self.threshold * 1000),
+            'summary': self.stats(),
+            'histogram_ms': dict(zip(labels, self.counts)),
+            'stalls': list(self.stalls),
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+    def stop(self):
+        global _active
+        _active = False
+        self._stop.set()
+        self.timer.stop()
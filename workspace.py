@@ -0,0 +1,223 @@
+"""
+Grade Paginada - Multi-Zap
+Mostra apenas uma página de instâncias por vez (linhas x colunas). As contas
+das outras páginas ficam ocultas (sem custo de composição) e aparecem numa
+faixa de miniaturas com a última captura da tela e o contador de não lidas
+"""
+from PyQt6.QtWidgets import (QWidget, QGridLayout, QHBoxLayout, QVBoxLayout,
+                             QPushButton, QLabel, QToolButton, QScrollArea)
+from PyQt6.QtCore import Qt, QSize, pyqtSignal
+from PyQt6.QtGui import QIcon, QShortcut, QKeySequence
+
+THUMBNAIL_SIZE = QSize(120, 72)
+
+
+class ThumbnailTile(QToolButton):
+    """Miniatura de uma instância fora da página atual"""
+    def __init__(self, instance, parent=None):
+        super().__init__(parent)
+        self.instance = instance
+        self.setToolButtonStyle(Qt.ToolButtonStyle.ToolButtonTextUnderIcon)
+        self.setIconSize(THUMBNAIL_SIZE)
+        self.setStyleSheet(
+            f"QToolButton {{ background-color: {instance.header_color}; color: white;"
+            f" border: none; font-size: 10px; padding: 2px; }}"
+        )
+        self.refresh()
+
+    def refresh(self):
+        instance = self.instance
+        if instance.snapshot is not None:
+            self.setIcon(QIcon(instance.snapshot.scaled(
+                THUMBNAIL_SIZE,
+                Qt.AspectRatioMode.KeepAspectRatio,
+                Qt.TransformationMode.SmoothTransformation
+            )))
+        badge = f" 🔴 {instance.unread}" if instance.unread else ""
+        self.setText(f"{instance.instance_title}{badge}")
+
+
+class PagedGrid(QWidget):
+    """
+    Distribui as instâncias em páginas. Ao trocar de página, as instâncias que
+    saem têm a tela capturada e são ocultadas; as que entram voltam ao grid.
+    Ctrl+PgDown/Ctrl+PgUp trocam de página.
+    """
+    page_changed = pyqtSignal(int)
+
+    def __init__(self, columns=2, rows=2, parent=None):
+        super().__init__(parent)
+        self.columns = max(1, columns)
+        self.rows = max(1, rows)
+        self.instances = []
+        self.tiles = {}
+        self.page = 0
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(4)
+
+        # Área das instâncias da página atual
+        self.cells = QWidget()
+        self.grid = QGridLayout(self.cells)
+        self.grid.setSpacing(10)
+        self.grid.setContentsMargins(10, 10, 10, 10)
+        layout.addWidget(self.cells, 1)
+
+        # Navegação: anterior / página / próxima + miniaturas das outras páginas
+        self.nav_bar = QWidget()
+        nav_layout = QHBoxLayout(self.nav_bar)
+        nav_layout.setContentsMargins(10, 0, 10, 6)
+        self.btn_prev = QPushButton("◀")
+        self.btn_next = QPushButton("▶")
+        for button in (self.btn_prev, self.btn_next):
+            button.setFixedSize(28, 28)
+            button.setStyleSheet("background-color: #333; color: white; border: none;")
+        self.btn_prev.clicked.connect(lambda: self.set_page(self.page - 1))
+        self.btn_next.clicked.connect(lambda: self.set_page(self.page + 1))
+        self.page_label = QLabel("")
+        self.page_label.setStyleSheet("color: white; font-size: 11px;")
+
+        self.strip = QWidget()
+        self.strip_layout = QHBoxLayout(self.strip)
+        self.strip_layout.setContentsMargins(0, 0, 0, 0)
+        self.strip_layout.addStretch()
+        strip_area = QScrollArea()
+        strip_area.setWidget(self.strip)
+        strip_area.setWidgetResizable(True)
+        strip_area.setFrameShape(QScrollArea.Shape.NoFrame)
+        strip_area.setFixedHeight(THUMBNAIL_SIZE.height() + 34)
+
+        nav_layout.addWidget(self.btn_prev)
+        nav_layout.addWidget(self.page_label)
+        nav_layout.addWidget(self.btn_next)
+        nav_layout.addWidget(strip_area, 1)
+        layout.addWidget(self.nav_bar)
+        self.nav_bar.hide()
+
+        QShortcut(QKeySequence("Ctrl+PgDown"), self).activated.connect(
+            lambda: self.set_page(self.page + 1))
+        QShortcut(QKeySequence("Ctrl+PgUp"), self).activated.connect(
+            lambda: self.set_page(self.page - 1))
+
+    @property
+    def page_size(self):
+        return self.columns * self.rows
+
+    def page_count(self):
+        return max(1, -(-len(self.instances) // self.page_size))
+
+    def page_of(self, instance):
+        return self.instances.index(instance) // self.page_size
+
+    def position(self, instance):
+        """(linha, coluna) global, usada para ordenar a fila de inicialização"""
+        index = self.instances.index(instance)
+        return index // self.columns, index % self.columns
+
+    def visible_instances(self):
+        start = self.page * self.page_size
+        return self.instances[start:start + self.page_size]
+
+    def add_instance(self, instance):
+        self.instances.append(instance)
+        instance.setParent(self.cells)
+        instance.unread_changed.connect(self._on_unread_changed)
+
+        tile = ThumbnailTile(instance)
+        tile.clicked.connect(lambda: self.show_instance(instance))
+        self.strip_layout.insertWidget(self.strip_layout.count() - 1, tile)
+        self.tiles[instance] = tile
+
+        if self.page_of(instance) == self.page:
+            self._place(instance)
+        else:
+            instance.hide()
+        self._update_navigation()
+
+    def _place(self, instance):
+        index = self.instances.index(instance) % self.page_size
+        self.grid.addWidget(instance, index // self.columns, index % self.columns)
+        instance.show()
+
+    def set_page(self, page):
+        page = max(0, min(page, self.page_count() - 1))
+        if page == self.page:
+            return
+        # As instâncias que saem guardam a última imagem para a miniatura
+        for instance in self.visible_instances():
+            instance.capture_snapshot()
+            self.grid.removeWidget(instance)
+            instance.hide()
+        self.page = page
+        for instance in self.visible_instances():
+            self._place(instance)
+        self._update_navigation()
+        self.page_changed.emit(page)
+
+    def show_instance(self, instance):
+        """Vai para a página da instância"""
+        self.set_page(self.page_of(instance))
+
+    def remove_instance(self, instance):
+        """Tira a instância da grade; as seguintes sobem uma posição"""
+        if instance not in self.instances:
+            return
+        self.grid.removeWidget(instance)
+        self.instances.remove(instance)
+        instance.unread_changed.disconnect(self._on_unread_changed)
+        tile = self.tiles.pop(instance)
+        self.strip_layout.removeWidget(tile)
+        tile.deleteLater()
+        self._relayout()
+
+    def reorder(self, instances):
+        """Aplica uma nova ordem (instâncias fora da lista mantêm a posição relativa no fim)"""
+        ordered = [instance for instance in instances if instance in self.instances]
+        ordered += [instance for instance in self.instances if instance not in ordered]
+        if ordered == self.instances:
+            return
+        self.instances = ordered
+        for instance in ordered:
+            tile = self.tiles[instance]
+            self.strip_layout.removeWidget(tile)
+            self.strip_layout.insertWidget(self.strip_layout.count() - 1, tile)
+        self._relayout()
+
+    def _relayout(self):
+        """Recoloca a página atual depois de remoções ou mudanças de ordem"""
+        self.page = min(self.page, self.page_count() - 1)
+        visible = self.visible_instances()
+        for instance in self.instances:
+            # Instâncias abertas em janela própria (modo headless) não voltam à grade
+            if instance.isWindow():
+                continue
+            self.grid.removeWidget(instance)
+            if instance not in visible:
+                instance.capture_snapshot()
+                instance.hide()
+        for instance in visible:
+            if not instance.isWindow():
+                self._place(instance)
+        self._update_navigation()
+
+    def _on_unread_changed(self, instance):
+        self.tiles[instance].refresh()
+        self._update_navigation()
+
+    def _update_navigation(self):
+        count = self.page_count()
+        self.nav_bar.setVisible(count > 1)
+        self.btn_prev.setEnabled(self.page > 0)
+        self.btn_next.setEnabled(self.page < count - 1)
+
+        hidden_unread = 0
+        visible = self.visible_instances()
+        for instance, tile in self.tiles.items():
+            on_page = instance in visible
+            tile.setVisible(not on_page)
+            if not on_page:
+                tile.refresh()
+                hidden_unread += instance.unread
+        badge = f" · 🔴 {hidden_unread}" if hidden_unread else ""
+        self.page_label.setText(f"Página {self.page + 1}/{count}{badge}")